@@ -12,28 +12,53 @@ os.environ["OTEL_SDK_DISABLED"] = "true"
 
 
 import streamlit as st
-import nltk
 
 # ------------------------------------------------------------------
-# 1. SETUP PATHS & NLTK
+# 1. SETUP PATHS
 # ------------------------------------------------------------------
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-    nltk.download('brown', quiet=True)
-    nltk.download('punkt_tab', quiet=True)
-
 # ------------------------------------------------------------------
 # 2. IMPORT CREW
 # ------------------------------------------------------------------
-try:
-    from ai_trading_agent.crew import AiTradingAgent
-except ImportError as e:
-    st.error(f"🚨 Import Error: {e}")
-    st.stop()
+# crewAI takes seconds to import: the page renders first, the crew module
+# loads and a warm crew is built on a background thread (once per server
+# process), and they are only waited for when an analysis is launched
+from ai_trading_agent.warmup import crew_pool, preload
+
+preload()
+
+
+@st.cache_resource(show_spinner=False)
+def get_crew_pool():
+    """Warm crews shared by every session and rerun: only the inputs change between analyses."""
+    return crew_pool()
+
+
+def stream_analysis(pool, execution_mode, inputs):
+    """Runs the crew on a background thread and renders each task live; returns the CrewOutput."""
+    from ai_trading_agent.streaming import CrewStream
+
+    tasks = {}  # task name -> [placeholder of its live answer, answer so far]
+    for event in CrewStream().start(pool, execution_mode, inputs):
+        if event.kind == 'started':
+            title = event.task.replace('_', ' ').capitalize()
+            st.write(f"🧠 **{event.agent}** is working on *{title}*...")
+            tasks[event.task] = [st.empty(), ""]
+        elif event.kind == 'token' and event.task in tasks:
+            live = tasks[event.task]
+            live[1] += event.text
+            live[0].markdown(live[1] + " ▌")
+        elif event.kind == 'finished' and event.task in tasks:
+            title = event.task.replace('_', ' ').capitalize()
+            with tasks[event.task][0].container():
+                with st.expander(f"✅ {title} ({event.agent})"):
+                    st.markdown(event.output.raw if event.output is not None else "")
+        elif event.kind == 'done':
+            return event.output
+        elif event.kind == 'failed':
+            raise RuntimeError(event.text)
+    raise RuntimeError("The analysis stopped without a result")
 
 # ------------------------------------------------------------------
 # 3. STREAMLIT APP UI
@@ -47,6 +72,10 @@ with st.sidebar:
     ticker = st.text_input("Stock Ticker", value="MSFT").upper()
     amount = st.number_input("Capital ($)", value=10000, min_value=100)
     period = st.selectbox("Analysis Window", ["1mo", "3mo", "6mo", "1y"], index=1)
+    parallel = st.toggle("⚡ Parallel agents", value=False,
+                         help="Run the independent analyses (market data, technicals, fundamentals, news, social) concurrently")
+    stream = st.toggle("📡 Stream progress", value=True,
+                       help="Show each agent's answer as it is written and each report as soon as its task completes")
     
     run_btn = st.button("🚀 Launch Analysis", type="primary")
 
@@ -62,14 +91,32 @@ if run_btn:
         st.write("Initializing AI Crew...")
         
         try:
+            try:
+                pool = get_crew_pool()
+            except ImportError as e:
+                st.error(f"🚨 Import Error: {e}")
+                st.stop()
             
-            agent = AiTradingAgent()
-            result = agent.crew().kickoff(inputs=inputs)
+            execution_mode = "parallel" if parallel else "sequential"
+            if stream:
+                result = stream_analysis(pool, execution_mode, inputs)
+            else:
+                with pool.crew(execution_mode) as crew:
+                    result = crew.kickoff(inputs=inputs)
             
             status.update(label="✅ Analysis Complete!", state="complete", expanded=False)
             
             st.divider()
             st.subheader(f"📊 Trading Report: {ticker}")
+
+            decision = result.pydantic
+            if decision is not None:
+                cols = st.columns(4)
+                cols[0].metric("Decision", decision.decision)
+                cols[1].metric("Entry", f"${decision.entry_price:,.2f}" if decision.entry_price else "—")
+                cols[2].metric("Stop-Loss", f"${decision.stop_loss:,.2f}" if decision.stop_loss else "—")
+                cols[3].metric("Confidence", decision.confidence)
+
             st.markdown(str(result))
             
             st.download_button(
@@ -0,0 +1,238 @@
+"""
+Backtest of the decisions stored in `trade_analysis`.
+
+Every BUY/SELL decision is entered on the next session (at the open, or as a
+limit order at its entry price), then held until its stop-loss, its first
+take-profit or the horizon is reached, whichever comes first. All decisions
+are simulated at once: prices are gathered into (decisions x bars) arrays and
+the first stop/target bar of every trade is found with array operations.
+
+    python backtest.py                                  # every stored decision
+    python backtest.py --since 2025-01-01 --by ticker --by month
+    python backtest.py --entry limit --horizon 10 --csv trades.csv
+"""
+import argparse
+import warnings
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+import database
+from database import TradeAnalysis
+from src.ai_trading_agent.tools.market_cache import market_cache
+from src.ai_trading_agent.tools.price_store import price_store
+
+warnings.simplefilter(action='ignore', category=FutureWarning)
+
+HORIZON_BARS = 20       # trading days a position is held at most
+ENTRY_WINDOW_BARS = 5   # trading days a limit entry may take to fill
+NOTIONAL = 10_000       # dollars per trade for the P&L columns
+HISTORY_PERIOD = "5y"   # fetched when the price store is disabled
+PERIODS = {'week': 'W', 'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+
+
+def load_decisions(since=None, until=None, tickers=None, engine=None):
+    """BUY/SELL rows of trade_analysis as a DataFrame (HOLDs have nothing to simulate)."""
+    query = select(
+        TradeAnalysis.id, TradeAnalysis.timestamp, TradeAnalysis.ticker, TradeAnalysis.decision,
+        TradeAnalysis.entry_price, TradeAnalysis.stop_loss, TradeAnalysis.take_profit_1,
+        TradeAnalysis.confidence,
+    ).where(TradeAnalysis.decision.in_(['BUY', 'SELL']))
+    if since is not None:
+        query = query.where(TradeAnalysis.timestamp >= pd.Timestamp(since).to_pydatetime())
+    if until is not None:
+        query = query.where(TradeAnalysis.timestamp < pd.Timestamp(until).to_pydatetime())
+    if tickers:
+        query = query.where(TradeAnalysis.ticker.in_([t.upper() for t in tickers]))
+    with (engine or database.engine).connect() as connection:
+        decisions = pd.read_sql(query.order_by(TradeAnalysis.timestamp), connection)
+    decisions['timestamp'] = pd.to_datetime(decisions['timestamp'])
+    return decisions
+
+
+def load_prices(tickers):
+    """Wide dates x tickers arrays of daily Open/High/Low/Close from the local price store."""
+    frames = {}
+    if price_store is not None:
+        price_store.update(tickers)
+        for ticker in tickers:
+            frames[ticker] = price_store.load(ticker)
+    else:
+        for ticker in tickers:
+            try:
+                frames[ticker] = market_cache.history(ticker, period=HISTORY_PERIOD)
+            except Exception as e:
+                print(f"⚠️ No prices for {ticker}: {e}")
+    frames = {t: f for t, f in frames.items() if f is not None and not f.empty}
+    if not frames:
+        return None
+    for frame in frames.values():
+        frame.index = pd.DatetimeIndex(frame.index).tz_localize(None).normalize()
+    panel = pd.concat(frames, axis=1).sort_index()
+    return {field: panel.xs(field, axis=1, level=1).reindex(columns=tickers)
+            for field in ('Open', 'High', 'Low', 'Close')}
+
+
+def _first(mask):
+    """Index of the first True in every row of a 2-D mask (the row length where there is none)."""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), mask.shape[1])
+
+
+def simulate(decisions, prices, horizon=HORIZON_BARS, entry="open", entry_window=ENTRY_WINDOW_BARS):
+    """
+    One row per decision with its fill, exit and return. `exit_reason` is stop,
+    target, time (horizon reached), open (still running at the last bar) or
+    unfilled / no_data.
+    """
+    trades = decisions.reset_index(drop=True).copy()
+    dates = prices['Close'].index
+    columns = {t: i for i, t in enumerate(prices['Close'].columns)}
+    O, H, L = (prices[f].to_numpy() for f in ('Open', 'High', 'Low'))
+    C = prices['Close'].ffill().to_numpy()
+    T = len(dates)
+
+    col = trades['ticker'].map(columns).fillna(-1).astype(int).to_numpy()
+    long = (trades['decision'] == 'BUY').to_numpy()
+    side = np.where(long, 1.0, -1.0)
+    stop = trades['stop_loss'].to_numpy(dtype=float)
+    target = trades['take_profit_1'].to_numpy(dtype=float)
+    limit = trades['entry_price'].to_numpy(dtype=float)
+    # Decisions are acted on from the next session
+    start = dates.searchsorted(trades['timestamp'].dt.normalize().to_numpy(), side='right')
+    has_data = (col >= 0) & (start < T)
+    col_safe = np.where(col >= 0, col, 0)
+
+    def window(array, first, length):
+        idx = first[:, None] + np.arange(length)
+        inside = idx < T
+        return array[np.minimum(idx, T - 1), col_safe[:, None]], inside
+
+    # Entry
+    if entry == "limit":
+        lows, inside = window(L, start, entry_window)
+        highs, _ = window(H, start, entry_window)
+        touched = inside & np.where(long[:, None], lows <= limit[:, None], highs >= limit[:, None])
+        offset = _first(touched)
+        filled = has_data & (offset < entry_window) & ~np.isnan(limit)
+        fill_bar = np.minimum(start + offset, T - 1)
+        opens = O[fill_bar, col_safe]
+        # A session that opens through the limit fills at the open
+        entry_price = np.where(long, np.fmin(opens, limit), np.fmax(opens, limit))
+    else:
+        fill_bar = np.minimum(start, T - 1)
+        entry_price = O[fill_bar, col_safe]
+        filled = has_data & ~np.isnan(entry_price)
+
+    # Exit: first bar whose range crosses the stop or the target
+    highs, inside = window(H, fill_bar, horizon)
+    lows, _ = window(L, fill_bar, horizon)
+    opens, _ = window(O, fill_bar, horizon)
+    adverse = np.where(long[:, None], lows, -highs)
+    favourable = np.where(long[:, None], highs, -lows)
+    stop_bar = _first(inside & (adverse <= (side * stop)[:, None]))
+    target_bar = _first(inside & (favourable >= (side * target)[:, None]))
+    bars_available = inside.sum(axis=1)
+
+    # A bar that touches both is counted as stopped out (daily bars cannot tell which came first)
+    hit_stop = (stop_bar < horizon) & (stop_bar <= target_bar)
+    hit_target = (target_bar < horizon) & ~hit_stop
+    exit_offset = np.where(hit_stop, stop_bar, np.where(hit_target, target_bar, np.maximum(bars_available - 1, 0)))
+    exit_bar = np.minimum(fill_bar + exit_offset, T - 1)
+    exit_open = opens[np.arange(len(trades)), np.minimum(exit_offset, horizon - 1)]
+    # Gaps through a level fill at the open
+    stop_fill = np.where(long, np.fmin(exit_open, stop), np.fmax(exit_open, stop))
+    target_fill = np.where(long, np.fmax(exit_open, target), np.fmin(exit_open, target))
+    exit_price = np.where(hit_stop, stop_fill, np.where(hit_target, target_fill, C[exit_bar, col_safe]))
+
+    reason = np.select(
+        [~has_data, ~filled, hit_stop, hit_target, bars_available < horizon],
+        ['no_data', 'unfilled', 'stop', 'target', 'open'], default='time')
+    ret = np.where(filled, side * (exit_price / entry_price - 1), np.nan)
+
+    trades['entry_date'] = pd.Series(dates[fill_bar]).where(filled)
+    trades['fill_price'] = np.where(filled, entry_price, np.nan)
+    trades['exit_date'] = pd.Series(dates[exit_bar]).where(filled)
+    trades['exit_price'] = np.where(filled, exit_price, np.nan)
+    trades['exit_reason'] = reason
+    trades['bars_held'] = np.where(filled, exit_offset + 1, 0)
+    trades['return'] = ret
+    trades['pnl'] = ret * NOTIONAL
+    return trades
+
+
+def _max_drawdown(pnl):
+    equity = pnl.cumsum()
+    return float((equity - equity.cummax().clip(lower=0)).min()) if len(equity) else 0.0
+
+
+def summarize(trades, by=None):
+    """
+    Hit rate, P&L and drawdown per group. `by` is a column (ticker, decision,
+    confidence) or a period (week, month, quarter, year); None summarizes all.
+    Trades still open are marked to the last close and counted.
+    """
+    closed = trades[trades['return'].notna()].sort_values('exit_date')
+    if by in PERIODS:
+        keys = closed['timestamp'].dt.to_period(PERIODS[by]).astype(str).rename(by)
+    elif by:
+        keys = closed[by]
+    else:
+        keys = pd.Series('all', index=closed.index, name='group')
+    groups = closed.groupby(keys, sort=True)
+    summary = pd.DataFrame({
+        'trades': groups.size(),
+        'hit_rate': groups['return'].apply(lambda r: (r > 0).mean()),
+        'avg_return': groups['return'].mean(),
+        'total_pnl': groups['pnl'].sum(),
+        'max_drawdown': groups['pnl'].apply(_max_drawdown),
+        'stops': groups['exit_reason'].apply(lambda r: (r == 'stop').sum()),
+        'targets': groups['exit_reason'].apply(lambda r: (r == 'target').sum()),
+        'avg_bars': groups['bars_held'].mean(),
+    })
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--since', help="first decision date (YYYY-MM-DD)")
+    parser.add_argument('--until', help="last decision date, exclusive")
+    parser.add_argument('--ticker', action='append', help="only these tickers (repeatable)")
+    parser.add_argument('--horizon', type=int, default=HORIZON_BARS, help="max trading days held")
+    parser.add_argument('--entry', choices=('open', 'limit'), default='open',
+                        help="fill at the next open, or at the stored entry price within a few sessions")
+    parser.add_argument('--by', action='append', default=[],
+                        help="group by ticker, decision, confidence, week, month, quarter or year (repeatable)")
+    parser.add_argument('--csv', help="write every simulated trade to this file")
+    args = parser.parse_args(argv)
+
+    decisions = load_decisions(args.since, args.until, args.ticker)
+    if decisions.empty:
+        print("📭 No BUY/SELL decisions stored yet.")
+        return
+    print(f"📚 Backtesting {len(decisions)} decisions on {decisions['ticker'].nunique()} tickers...")
+    prices = load_prices(sorted(decisions['ticker'].unique()))
+    if prices is None:
+        print("❌ No price history available.")
+        return
+    trades = simulate(decisions, prices, horizon=args.horizon, entry=args.entry)
+
+    pd.set_option('display.width', 160)
+    formats = {'hit_rate': '{:.1%}'.format, 'avg_return': '{:.2%}'.format, 'total_pnl': '${:,.0f}'.format,
+               'max_drawdown': '${:,.0f}'.format, 'avg_bars': '{:.1f}'.format}
+    print(f"\n📊 Overall (${NOTIONAL:,} per trade, {args.horizon}-day horizon, {args.entry} entry)")
+    print(summarize(trades).to_string(formatters=formats))
+    for by in args.by:
+        print(f"\n📊 By {by}")
+        print(summarize(trades, by).to_string(formatters=formats))
+    skipped = trades.loc[trades['exit_reason'].isin(['unfilled', 'no_data']), 'exit_reason'].value_counts()
+    if len(skipped):
+        print(f"\n⚠️ {skipped.sum()} decisions not simulated: {skipped.to_dict()}")
+
+    if args.csv:
+        trades.to_csv(args.csv, index=False)
+        print(f"\n💾 Trades written to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
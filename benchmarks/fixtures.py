@@ -0,0 +1,184 @@
+"""
+Market data fixtures for the offline benchmarks.
+
+`record_fixtures` captures real Yahoo, Serper and StockTwits responses for a
+handful of tickers into a pickle; `load_fixtures` replays those and fills
+any other ticker with deterministic synthetic data of the same shape, so a
+500-ticker universe can be benchmarked without network access.
+"""
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+FIXTURE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "recorded.pkl")
+HISTORY_BARS = 520  # a little over 2y of trading days, enough for every screener rule and the price store
+
+WORDS = ("great strong buy moon breakout beat weak sell crash dump not earnings "
+         "guidance revenue support resistance long short calls puts the a this").split()
+
+
+@dataclass
+class Fixtures:
+    """Recorded or synthetic responses for every provider, keyed by ticker."""
+    history: Dict[str, pd.DataFrame] = field(default_factory=dict)  # daily OHLCV, tz-naive index
+    info: Dict[str, dict] = field(default_factory=dict)
+    financials: Dict[str, dict] = field(default_factory=dict)       # income_stmt / balance_sheet / cashflow
+    news: Dict[str, dict] = field(default_factory=dict)             # Serper JSON
+    stocktwits: Dict[str, dict] = field(default_factory=dict)       # StockTwits stream JSON
+
+    @property
+    def tickers(self) -> List[str]:
+        return list(self.history)
+
+    def update(self, other: "Fixtures") -> None:
+        for name in ('history', 'info', 'financials', 'news', 'stocktwits'):
+            getattr(self, name).update(getattr(other, name))
+
+
+def universe(size: int, path: str = FIXTURE_FILE) -> List[str]:
+    """Recorded tickers first, topped up with synthetic symbols T0000, T0001, ..."""
+    recorded = load_recorded(path)
+    tickers = recorded.tickers[:size] if recorded is not None else []
+    return tickers + [f"T{i:04d}" for i in range(size - len(tickers))]
+
+
+def _statements(rng: np.random.Generator, revenue: float) -> dict:
+    columns = pd.to_datetime([f"{year}-12-31" for year in range(2024, 2020, -1)])
+    growth = 1 + rng.normal(0.08, 0.05, len(columns))
+    revenues = revenue / np.cumprod(growth)
+    income = pd.DataFrame({
+        'Total Revenue': revenues,
+        'Net Income': revenues * rng.uniform(0.05, 0.25),
+        'Operating Income': revenues * rng.uniform(0.1, 0.3),
+    }, index=columns).T
+    balance = pd.DataFrame({
+        'Total Assets': revenues * 1.5,
+        'Total Debt': revenues * rng.uniform(0.1, 0.8),
+        'Stockholders Equity': revenues * rng.uniform(0.4, 1.0),
+    }, index=columns).T
+    cashflow = pd.DataFrame({
+        'Free Cash Flow': revenues * rng.uniform(0.02, 0.2),
+        'Operating Cash Flow': revenues * rng.uniform(0.1, 0.3),
+    }, index=columns).T
+    return {'income_stmt': income, 'balance_sheet': balance, 'cashflow': cashflow}
+
+
+def synthetic_fixtures(tickers: List[str], seed: int = 7, end: Optional[pd.Timestamp] = None) -> Fixtures:
+    """Deterministic random-walk prices, plausible fundamentals, news and social messages."""
+    end = end or pd.Timestamp.today().normalize() - pd.tseries.offsets.BDay(1)
+    dates = pd.bdate_range(end=end, periods=HISTORY_BARS)
+    fixtures = Fixtures()
+    for n, ticker in enumerate(tickers):
+        rng = np.random.default_rng(seed + n)
+        start = rng.uniform(5, 500)
+        close = start * np.exp(np.cumsum(rng.normal(0.0004, 0.02, len(dates))))
+        spread = close * rng.uniform(0.002, 0.02, len(dates))
+        fixtures.history[ticker] = pd.DataFrame({
+            'Open': close - spread / 2,
+            'High': close + spread,
+            'Low': close - spread,
+            'Close': close,
+            'Volume': rng.integers(100_000, 20_000_000, len(dates)).astype(float),
+        }, index=dates)
+
+        shares = rng.uniform(1e8, 5e9)
+        fixtures.info[ticker] = {
+            'longName': f"{ticker} Holdings Inc.",
+            'sector': rng.choice(['Technology', 'Healthcare', 'Financials', 'Energy', 'Industrials']),
+            'industry': 'Synthetic',
+            'currentPrice': float(close[-1]),
+            'previousClose': float(close[-2]),
+            'marketCap': float(close[-1] * shares),
+            'trailingPE': float(rng.uniform(8, 60)),
+            'forwardPE': float(rng.uniform(8, 50)),
+            'priceToBook': float(rng.uniform(0.8, 15)),
+            'returnOnEquity': float(rng.uniform(-0.1, 0.4)),
+            'debtToEquity': float(rng.uniform(10, 200)),
+            'revenueGrowth': float(rng.normal(0.08, 0.1)),
+            'profitMargins': float(rng.uniform(-0.05, 0.35)),
+            'beta': float(rng.uniform(0.5, 2.0)),
+            'fiftyTwoWeekHigh': float(close[-252:].max()),
+            'fiftyTwoWeekLow': float(close[-252:].min()),
+            'averageVolume': float(fixtures.history[ticker]['Volume'][-63:].mean()),
+        }
+        fixtures.financials[ticker] = _statements(rng, float(close[-1] * shares * rng.uniform(0.1, 1.0)))
+        fixtures.news[ticker] = {'news': [{
+            'title': f"{ticker} {rng.choice(['beats', 'misses', 'raises', 'cuts'])} guidance",
+            'source': 'Synthetic Wire',
+            'date': f"{i + 1} days ago",
+            'snippet': ' '.join(rng.choice(WORDS, 25)),
+            'link': f"https://example.com/{ticker}/{i}",
+        } for i in range(10)]}
+        fixtures.stocktwits[ticker] = {'messages': [{
+            'id': int(seed * 1_000_000 + n * 100 + i),
+            'body': ' '.join(rng.choice(WORDS, 15)),
+            'created_at': (end - pd.Timedelta(minutes=5 * i)).isoformat(),
+            'user': {'username': f"trader{i}", 'followers': int(rng.integers(0, 50_000))},
+            'entities': {'sentiment': {'basic': rng.choice(['Bullish', 'Bearish'])}} if rng.random() < 0.5 else {},
+        } for i in range(30)]}
+    return fixtures
+
+
+def record_fixtures(tickers: List[str], path: str = FIXTURE_FILE) -> Fixtures:
+    """Fetches real responses for `tickers` (needs network and API keys) and merges them into `path`."""
+    import requests
+    import yfinance as yf
+
+    fixtures = load_recorded(path) or Fixtures()
+    for ticker in tickers:
+        print(f"📼 Recording {ticker}...")
+        stock = yf.Ticker(ticker)
+        hist = stock.history(period="2y", interval="1d", auto_adjust=True)
+        hist.index = hist.index.tz_localize(None).normalize()
+        fixtures.history[ticker] = hist[['Open', 'High', 'Low', 'Close', 'Volume']]
+        fixtures.info[ticker] = stock.info
+        fixtures.financials[ticker] = {
+            'income_stmt': stock.income_stmt,
+            'balance_sheet': stock.balance_sheet,
+            'cashflow': stock.cashflow,
+        }
+        if os.getenv('SERPER_API_KEY'):
+            fixtures.news[ticker] = requests.post(
+                "https://google.serper.dev/search",
+                json={"q": f"{ticker} stock news", "num": 10, "tbm": "nws"},
+                headers={'X-API-KEY': os.getenv('SERPER_API_KEY')}, timeout=10).json()
+        fixtures.stocktwits[ticker] = requests.get(
+            f"https://api.stocktwits.com/api/2/streams/symbol/{ticker}.json",
+            headers={'User-Agent': 'Mozilla/5.0'}, timeout=10).json()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump(fixtures, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return fixtures
+
+
+def load_recorded(path: str = FIXTURE_FILE) -> Optional[Fixtures]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def load_fixtures(tickers: List[str], path: str = FIXTURE_FILE, seed: int = 7) -> Fixtures:
+    """Recorded responses where available, synthetic ones for every other ticker."""
+    fixtures = Fixtures()
+    recorded = load_recorded(path)
+    missing = list(tickers)
+    if recorded is not None:
+        for ticker in tickers:
+            if ticker in recorded.history:
+                fixtures.update(Fixtures(
+                    history={ticker: recorded.history[ticker]},
+                    info={ticker: recorded.info.get(ticker, {})},
+                    financials={ticker: recorded.financials.get(ticker, {})},
+                    news={ticker: recorded.news.get(ticker, {'news': []})},
+                    stocktwits={ticker: recorded.stocktwits.get(ticker, {'messages': []})},
+                ))
+                missing.remove(ticker)
+    if missing:
+        fixtures.update(synthetic_fixtures(missing, seed=seed))
+    return fixtures
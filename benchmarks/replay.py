@@ -0,0 +1,184 @@
+"""
+Offline replay of every external provider from benchmark fixtures.
+
+`offline_replay` swaps yfinance, the Serper and StockTwits HTTP calls (on
+the shared http_client and on plain `requests`), the rate limiter's buckets,
+the market cache, the price store and the database for fixture-backed or
+throwaway equivalents, and counts every call that would have gone over the
+network. Alpha Vantage is only reached through the
+opt-in cross-check, which the benchmarks leave disabled.
+"""
+import contextlib
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from unittest import mock
+
+import httpx
+import pandas as pd
+import requests
+import sqlalchemy
+import yfinance as yf
+
+import database
+from src.ai_trading_agent.http_client import http_client
+from src.ai_trading_agent.rate_limiter import RateLimiter, rate_limiter
+from src.ai_trading_agent.tools import price_store as price_store_module
+from src.ai_trading_agent.tools.market_cache import market_cache
+from src.ai_trading_agent.tools.prefetch import period_start
+
+from .fixtures import Fixtures
+
+
+class CallCounter(Counter):
+    """Thread-safe Counter of provider calls."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def hit(self, provider: str) -> None:
+        with self._lock:
+            self[provider] += 1
+
+
+class _Response:
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = {}
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}", response=self)
+
+
+def _window(frame: pd.DataFrame, period=None, start=None) -> pd.DataFrame:
+    if start is not None:
+        return frame[frame.index >= pd.Timestamp(start)]
+    begin = period_start(frame.index, period or "1mo")
+    return frame if begin is None else frame[frame.index >= begin]
+
+
+class FixtureTicker:
+    """Stands in for `yf.Ticker`."""
+
+    def __init__(self, fixtures: Fixtures, calls: CallCounter, ticker: str):
+        self._fixtures = fixtures
+        self._calls = calls
+        self.ticker = ticker.upper()
+
+    def history(self, period="1mo", interval="1d", start=None, **kwargs):
+        self._calls.hit('yahoo')
+        frame = self._fixtures.history.get(self.ticker)
+        return pd.DataFrame() if frame is None else _window(frame, period, start).copy()
+
+    @property
+    def info(self):
+        self._calls.hit('yahoo')
+        return dict(self._fixtures.info.get(self.ticker, {}))
+
+    def _statement(self, name):
+        self._calls.hit('yahoo')
+        return self._fixtures.financials.get(self.ticker, {}).get(name, pd.DataFrame())
+
+    income_stmt = property(lambda self: self._statement('income_stmt'))
+    balance_sheet = property(lambda self: self._statement('balance_sheet'))
+    cashflow = property(lambda self: self._statement('cashflow'))
+
+
+def _download(fixtures: Fixtures, calls: CallCounter):
+    def download(tickers, period=None, interval="1d", start=None, group_by='column', **kwargs):
+        calls.hit('yahoo')
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {t: _window(fixtures.history[t], period, start) for t in tickers if t in fixtures.history}
+        if not frames:
+            return pd.DataFrame()
+        panel = pd.concat(frames, axis=1)  # (ticker, field)
+        if group_by != 'ticker':
+            panel = panel.swaplevel(axis=1).sort_index(axis=1)  # (field, ticker)
+        return panel
+    return download
+
+
+def _stocktwits(fixtures: Fixtures, calls: CallCounter, url: str) -> dict:
+    calls.hit('stocktwits')
+    ticker = url.rstrip('/').rsplit('/', 1)[-1].split('.')[0].upper()
+    return fixtures.stocktwits.get(ticker, {'messages': []})
+
+
+def _serper(fixtures: Fixtures, calls: CallCounter, body) -> dict:
+    calls.hit('serper')
+    query = body.get('q', '') if isinstance(body, dict) else str(body)
+    ticker = next((t for t in query.upper().split() if t in fixtures.news), None)
+    return fixtures.news.get(ticker, {'news': [], 'organic': []})
+
+
+def _http(fixtures: Fixtures, calls: CallCounter, real_get, real_post):
+    """`requests` replacements for third-party tools (crewai_tools' SerperDevTool)."""
+    def get(url, *args, **kwargs):
+        if 'stocktwits.com' in url:
+            return _Response(_stocktwits(fixtures, calls, url))
+        return real_get(url, *args, **kwargs)
+
+    def post(url, *args, **kwargs):
+        if 'serper.dev' in url:
+            return _Response(_serper(fixtures, calls, kwargs.get('json') or {}))
+        return real_post(url, *args, **kwargs)
+
+    return get, post
+
+
+def _transport(fixtures: Fixtures, calls: CallCounter) -> httpx.MockTransport:
+    """Transport for the shared http_client, serving both its sync and async clients."""
+    def handle(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        if 'stocktwits.com' in url:
+            return httpx.Response(200, json=_stocktwits(fixtures, calls, url))
+        if 'serper.dev' in url:
+            return httpx.Response(200, json=_serper(fixtures, calls, json.loads(request.content or b'{}')))
+        return httpx.Response(404, json={'error': f'not replayed: {url}'})
+    return httpx.MockTransport(handle)
+
+
+@contextlib.contextmanager
+def offline_replay(fixtures: Fixtures):
+    """
+    Serves every provider from `fixtures` and yields the CallCounter. Runs in a
+    scratch directory so reports and the database never touch the repo.
+    """
+    calls = CallCounter()
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    original_engine = database.engine
+    engine = sqlalchemy.create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    store = price_store_module.price_store
+    get, post = _http(fixtures, calls, requests.get, requests.post)
+    unlimited = RateLimiter({name: (10 ** 9, 1.0) for name in rate_limiter.buckets})
+
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.object(yf, 'Ticker', lambda ticker, *a, **k: FixtureTicker(fixtures, calls, ticker)))
+        stack.enter_context(mock.patch.object(yf, 'download', _download(fixtures, calls)))
+        stack.enter_context(mock.patch.object(requests, 'get', get))
+        stack.enter_context(mock.patch.object(requests, 'post', post))
+        stack.enter_context(mock.patch.object(http_client, 'transport', _transport(fixtures, calls)))
+        stack.enter_context(mock.patch.object(http_client, '_client', None))
+        stack.enter_context(mock.patch.object(rate_limiter, 'buckets', unlimited.buckets))
+        stack.enter_context(mock.patch.object(database, 'engine', engine))
+        stack.enter_context(mock.patch.object(market_cache, 'disk_dir', None))
+        if store is not None:
+            stack.enter_context(mock.patch.object(store, 'root', os.path.join(workdir, 'prices')))
+            stack.enter_context(mock.patch.object(store, 'offline', False))
+            stack.enter_context(mock.patch.object(store, '_frames', {}))
+            stack.enter_context(mock.patch.object(store, '_checked', {}))
+        database.SessionLocal.configure(bind=engine)
+        stack.callback(database.SessionLocal.configure, bind=original_engine)
+        market_cache.clear()
+        stack.callback(market_cache.clear)
+        stack.callback(os.chdir, os.getcwd())
+        os.chdir(workdir)
+        yield calls
@@ -0,0 +1,260 @@
+"""
+Offline performance benchmarks for the screener, the tools and the batch runner.
+
+    python -m benchmarks.run                          # 10, 100 and 500 tickers
+    python -m benchmarks.run --sizes 10 --json bench.json
+    python -m benchmarks.run --baseline bench.json    # exit 1 if anything got slower than the tolerance
+
+Every provider is replayed from fixtures (benchmarks/fixtures.py) and the LLM
+is a deterministic stub (benchmarks/stub_llm.py), so runs need no network or
+API keys and are comparable between commits.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from unittest import mock
+
+from crewai.events.utils.console_formatter import ConsoleFormatter
+
+import main_scalable
+from screener import MarketScreener
+from src.ai_trading_agent.compaction import token_ledger
+from src.ai_trading_agent.crew import AiTradingAgent, CrewTask
+from src.ai_trading_agent.tools.financial_tools import (
+    FinancialNewsTool,
+    FundamentalAnalysisTool,
+    PortfolioCorrelationTool,
+    PortfolioOptimizerTool,
+    PortfolioRiskTool,
+    StockDataTool,
+    TechnicalIndicatorsTool,
+)
+from src.ai_trading_agent.tools.stocktwits_sentiment_tool import StockTwitsSentimentTool
+
+from .fixtures import load_fixtures, universe
+from .replay import offline_replay
+from .stub_llm import StubLLM
+
+DEFAULT_SIZES = (10, 100, 500)
+TOOL_SAMPLES = 20  # tickers each tool is timed on
+DEFAULT_TOLERANCE = 0.25
+
+TOOLS = {
+    'StockDataTool': (StockDataTool, lambda t, peer: dict(ticker=t, period="3mo")),
+    'TechnicalIndicatorsTool': (TechnicalIndicatorsTool, lambda t, peer: dict(ticker=t)),
+    'FinancialNewsTool': (FinancialNewsTool, lambda t, peer: dict(ticker=t)),
+    'FundamentalAnalysisTool': (FundamentalAnalysisTool, lambda t, peer: dict(ticker=t)),
+    'PortfolioRiskTool': (PortfolioRiskTool, lambda t, peer: dict(tickers=f"{t},{peer}", weights="0.5,0.5")),
+    'PortfolioOptimizerTool': (PortfolioOptimizerTool, lambda t, peer: dict(tickers=f"{t},{peer}", max_weight=0.8)),
+    'PortfolioCorrelationTool': (PortfolioCorrelationTool, lambda t, peer: dict(ticker=t, holdings=f"{peer}:100%")),
+    'StockTwitsSentimentTool': (StockTwitsSentimentTool, lambda t, peer: dict(ticker=t)),
+}
+
+
+class Timings:
+    """Thread-safe accumulator of (count, seconds) per name."""
+
+    def __init__(self):
+        self.count = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.count[name] += 1
+            self.seconds[name] += seconds
+
+    def report(self):
+        return {name: {'calls': self.count[name], 'seconds': round(self.seconds[name], 4),
+                       'mean_ms': round(1000 * self.seconds[name] / self.count[name], 2)}
+                for name in sorted(self.count)}
+
+
+@contextlib.contextmanager
+def measure():
+    """Wall time and peak traced memory of the block, with its prints discarded."""
+    result = {}
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield result
+    finally:
+        result['seconds'] = round(time.perf_counter() - started, 4)
+        result['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        tracemalloc.stop()
+
+
+@contextlib.contextmanager
+def timed_tools(timings):
+    """Records the latency of every tool `_run` call."""
+    def wrap(name, original):
+        def _run(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(self, *args, **kwargs)
+            finally:
+                timings.add(name, time.perf_counter() - started)
+        return _run
+
+    with contextlib.ExitStack() as stack:
+        for name, (tool_class, _) in TOOLS.items():
+            stack.enter_context(mock.patch.object(tool_class, '_run', wrap(name, tool_class._run)))
+        yield
+
+
+@contextlib.contextmanager
+def timed_agents(timings):
+    """Records how long each agent spends on its task (LLM calls plus tools)."""
+    original = CrewTask._execute_core
+
+    def _execute_core(self, agent, context, tools):
+        started = time.perf_counter()
+        try:
+            return original(self, agent, context, tools)
+        finally:
+            timings.add((agent or self.agent).role.strip(), time.perf_counter() - started)
+
+    with mock.patch.object(CrewTask, '_execute_core', _execute_core):
+        yield
+
+
+def bench_screener(tickers, fixtures):
+    with offline_replay(fixtures) as calls, measure() as result:
+        candidates = MarketScreener(tickers).filter_stocks()
+    return dict(result, candidates=len(candidates), provider_calls=dict(calls))
+
+
+def bench_tools(tickers, fixtures):
+    sample = tickers[:TOOL_SAMPLES]
+    results = {}
+    for name, (tool_class, arguments) in TOOLS.items():
+        with offline_replay(fixtures) as calls, measure() as result:
+            tool = tool_class()
+            for ticker in sample:
+                tool._run(**arguments(ticker, tickers[0]))
+        result['mean_ms'] = round(1000 * result['seconds'] / len(sample), 2)
+        results[name] = dict(result, calls=len(sample), provider_calls=dict(calls))
+    return results
+
+
+def bench_batch(tickers, fixtures, llm_delay):
+    llm = StubLLM(tickers, delay=llm_delay)
+    tool_timings, agent_timings = Timings(), Timings()
+    with offline_replay(fixtures) as calls, \
+            mock.patch.object(AiTradingAgent, 'llm', llm), \
+            mock.patch.object(main_scalable, 'MIN_CONCURRENCY', main_scalable.MAX_CONCURRENCY), \
+            timed_tools(tool_timings), timed_agents(agent_timings), \
+            measure() as result:
+        asyncio.run(main_scalable.run_batch(tickers))
+    return dict(
+        result,
+        llm_calls=sum(llm.calls.values()),
+        provider_calls=dict(calls),
+        agents={role: dict(stats, llm_calls=llm.calls.get(role, 0))
+                for role, stats in agent_timings.report().items()},
+        tools=tool_timings.report(),
+        tokens=token_ledger.report(),
+    )
+
+
+def print_report(results):
+    for size, stages in results.items():
+        print(f"\n{'=' * 70}\n📏 {size} tickers\n{'=' * 70}")
+        screener = stages['screener']
+        print(f"🔍 Screener: {screener['seconds']:.3f}s, peak {screener['peak_mb']} MB, "
+              f"{screener['candidates']} candidates, calls {screener['provider_calls']}")
+        print("🛠️ Tools (cold cache, per call):")
+        for name, tool in stages['tools'].items():
+            print(f"   {name:<26} {tool['mean_ms']:>9.2f} ms   peak {tool['peak_mb']:>6} MB   calls {tool['provider_calls']}")
+        batch = stages.get('batch')
+        if batch:
+            print(f"🚀 run_batch: {batch['seconds']:.2f}s, peak {batch['peak_mb']} MB, "
+                  f"{batch['llm_calls']} LLM calls, provider calls {batch['provider_calls']}")
+            for role, agent in batch['agents'].items():
+                print(f"   🤖 {role:<42} {agent['calls']:>5} tasks {agent['mean_ms']:>9.2f} ms/task")
+            for name, tool in batch['tools'].items():
+                print(f"   🛠️ {name:<42} {tool['calls']:>5} calls {tool['mean_ms']:>9.2f} ms/call")
+            for task, tokens in batch.get('tokens', {}).items():
+                print(f"   🔤 {task:<42} context {tokens['context_in']:>8} → {tokens['context_out']:<8} "
+                      f"prompt {tokens['prompt']:>8} tokens")
+
+
+def _timings(results, prefix=""):
+    """Flattens every 'seconds' entry into {path: seconds} for baseline comparison."""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_timings(value, f"{prefix}{key}/"))
+        elif key == 'seconds':
+            flat[prefix.rstrip('/')] = value
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    """Returns the list of timings that regressed by more than `tolerance`."""
+    current, previous = _timings(results), _timings(baseline)
+    regressions = []
+    for path, seconds in current.items():
+        before = previous.get(path)
+        if before and seconds > before * (1 + tolerance) and seconds - before > 0.01:
+            regressions.append(f"{path}: {before:.3f}s → {seconds:.3f}s (+{(seconds / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated universe sizes")
+    parser.add_argument('--skip-batch', action='store_true', help="only benchmark the screener and the tools")
+    parser.add_argument('--llm-delay', type=float, default=0.0, help="simulated seconds per LLM completion")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--baseline', help="results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    # crewAI renders its panels from event-bus threads, possibly after a stage ends,
+    # so its console stays muted for the whole run
+    mock.patch.object(ConsoleFormatter, 'print', lambda self, *a, **k: None).start()
+    # The shared LLM and tools are built on first use; keep that out of the timed stages
+    AiTradingAgent()
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(',')]:
+        tickers = universe(size)
+        fixtures = load_fixtures(tickers)
+        print(f"⏱️ Benchmarking {size} tickers...", file=sys.stderr)
+        results[str(size)] = {
+            'screener': bench_screener(tickers, fixtures),
+            'tools': bench_tools(tickers, fixtures),
+        }
+        if not args.skip_batch:
+            results[str(size)]['batch'] = bench_batch(tickers, fixtures, args.llm_delay)
+
+    print_report(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} performance regressions:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"\n✅ No regressions beyond {args.tolerance * 100:.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Startup-time profile of the entry points, each measured in fresh interpreters.
+
+    python -m benchmarks.startup                        # median of 3 runs per entry point
+    python -m benchmarks.startup --json startup.json
+    python -m benchmarks.startup --baseline startup.json   # exit 1 if any entry point got slower
+
+Every entry point runs until it is ready for the user (the CLI's first prompt,
+the Streamlit page's first render, a built crew) and then exits, so the time
+covers interpreter start and imports. A second run under `python -X importtime`
+attributes the import time to the top-level packages that caused it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+TOP_PACKAGES = 6
+
+# Entry point -> code that brings it to the point where the user can interact
+ENTRY_POINTS = {
+    'cli': "import ai_trading_agent.main",                                   # main.py run: first prompt
+    'app': "import runpy; runpy.run_path('app.py')",                        # Streamlit page rendered
+    'crew_module': "import ai_trading_agent.crew",
+    'crew': "from ai_trading_agent.crew import AiTradingAgent; AiTradingAgent().crew()",  # replay/test/train
+    'batch': "import main_scalable",
+}
+
+_PRELUDE = ("import os, sys, warnings; warnings.simplefilter('ignore'); "
+            "sys.path[:0] = [{root!r}, os.path.join({root!r}, 'src')]\n")
+
+
+def _run(code, importtime=False):
+    """Runs `code` in a fresh interpreter; returns (wall seconds, stderr)."""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + [
+        '-c', _PRELUDE.format(root=ROOT) + code + "\nos._exit(0)"]
+    env = dict(os.environ, OTEL_SDK_DISABLED='true', CREWAI_DISABLE_TELEMETRY='true')
+    started = time.perf_counter()
+    process = subprocess.run(command, cwd=ROOT, env=env, stdin=subprocess.DEVNULL,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    seconds = time.perf_counter() - started
+    if process.returncode:
+        raise RuntimeError(f"{code!r} failed:\n{process.stderr[-2000:]}")
+    return seconds, process.stderr
+
+
+def import_profile(stderr, top=TOP_PACKAGES):
+    """Self import time in seconds per top-level package, largest first."""
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us)
+    ranked = sorted(totals.items(), key=lambda item: -item[1])[:top]
+    return {package: round(us / 1e6, 3) for package, us in ranked}
+
+
+def profile(names, repeat):
+    results = {}
+    for name in names:
+        print(f"⏱️ Starting {name} {repeat}x...", file=sys.stderr)
+        runs = [_run(ENTRY_POINTS[name])[0] for _ in range(repeat)]
+        results[name] = {
+            'seconds': round(statistics.median(runs), 3),
+            'imports': import_profile(_run(ENTRY_POINTS[name], importtime=True)[1]),
+        }
+    return results
+
+
+def print_report(results):
+    print(f"\n{'=' * 70}\n🚦 Startup time (fresh interpreter, median)\n{'=' * 70}")
+    for name, result in results.items():
+        imports = ", ".join(f"{package} {seconds:.2f}s" for package, seconds in result['imports'].items())
+        print(f"   {name:<12} {result['seconds']:>7.2f}s   {imports}")
+
+
+def compare(results, baseline, tolerance):
+    """Returns the entry points that start more than `tolerance` slower than in `baseline`."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name, {}).get('seconds')
+        seconds = result['seconds']
+        if before and seconds > before * (1 + tolerance) and seconds - before > 0.05:
+            regressions.append(f"{name}: {before:.2f}s → {seconds:.2f}s (+{(seconds / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entry-points', default=",".join(ENTRY_POINTS),
+                        help=f"comma-separated subset of {', '.join(ENTRY_POINTS)}")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="fresh interpreters per entry point")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--baseline', help="results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = profile(args.entry_points.split(','), args.repeat)
+    print_report(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} startup regressions:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"\n✅ No regressions beyond {args.tolerance * 100:.0f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Durable queue of crew runs on the trading database (the `crew_jobs` table).
+
+Any number of worker processes, on one host or many, claim jobs with a
+conditional UPDATE, so two workers never run the same ticker. A worker holds
+a lease on its job and keeps extending it while the crew runs; if the worker
+dies, the lease expires and the job goes back to the next free worker.
+Failed runs are retried with exponential backoff until JOB_MAX_ATTEMPTS.
+
+Point DATABASE_URL at a shared Postgres to spread workers over several hosts;
+SQLite (WAL) is fine for the processes of a single host.
+"""
+import json
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+
+from database import CrewJob, SessionLocal, build_record
+
+# Configuration (override through environment variables)
+LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+RETRY_BACKOFF_SECONDS = int(os.getenv("JOB_RETRY_BACKOFF", "30"))  # doubled on every further attempt
+CLAIM_CANDIDATES = 8  # jobs tried per claim before giving up to a busier worker
+
+
+def worker_name(index=0):
+    """Unique, readable worker id: host, process and slot."""
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+class JobQueue:
+    """Enqueue, claim, heartbeat and settle crew jobs."""
+
+    def __init__(self, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS,
+                 retry_backoff=RETRY_BACKOFF_SECONDS):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def enqueue(self, tickers, inputs=None, batch=None):
+        """
+        Queues one job per ticker (skipping tickers that already have a pending
+        or running job) and returns the batch id. `inputs(ticker)` builds the
+        crew inputs of each job.
+        """
+        batch = batch or datetime.utcnow().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        with SessionLocal() as session:
+            active = set(session.scalars(
+                select(CrewJob.ticker).where(CrewJob.ticker.in_(tickers),
+                                             CrewJob.status.in_(['pending', 'running']))))
+            jobs = [CrewJob(batch=batch, ticker=ticker,
+                            inputs=json.dumps(inputs(ticker) if inputs else {'stock_ticker': ticker}))
+                    for ticker in tickers if ticker not in active]
+            session.add_all(jobs)
+            session.commit()
+        if active:
+            print(f"⏭️ Already queued: {', '.join(sorted(active))}")
+        print(f"📥 Queued {len(jobs)} jobs in batch {batch}")
+        return batch
+
+    def retry_failed(self, batch=None):
+        """Puts failed jobs back in the queue with a fresh attempt budget."""
+        query = update(CrewJob).where(CrewJob.status == 'failed')
+        if batch:
+            query = query.where(CrewJob.batch == batch)
+        with SessionLocal() as session:
+            count = session.execute(query.values(
+                status='pending', attempts=0, available_at=datetime.utcnow(),
+                worker=None, lease_expires=None, finished_at=None)).rowcount
+            session.commit()
+        return count
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+    def _expire_abandoned(self, session, now):
+        """Fails jobs whose lease ran out on their last allowed attempt."""
+        session.execute(
+            update(CrewJob)
+            .where(CrewJob.status == 'running', CrewJob.lease_expires < now,
+                   CrewJob.attempts >= self.max_attempts)
+            .values(status='failed', finished_at=now, lease_expires=None,
+                    error=func.coalesce(CrewJob.error, 'worker lost (lease expired)')))
+
+    def claim(self, worker):
+        """
+        Takes the oldest available job for `worker`: a pending job past its
+        backoff, or a running job whose lease expired. Returns (id, ticker,
+        inputs) or None when nothing is available.
+        """
+        now = datetime.utcnow()
+        available = or_(
+            and_(CrewJob.status == 'pending', CrewJob.available_at <= now),
+            and_(CrewJob.status == 'running', CrewJob.lease_expires < now,
+                 CrewJob.attempts < self.max_attempts),
+        )
+        with SessionLocal() as session:
+            self._expire_abandoned(session, now)
+            session.commit()
+            candidates = session.scalars(
+                select(CrewJob.id).where(available).order_by(CrewJob.id).limit(CLAIM_CANDIDATES)).all()
+            for job_id in candidates:
+                # Only one worker's UPDATE can match while the job is still available
+                claimed = session.execute(
+                    update(CrewJob).where(CrewJob.id == job_id, available)
+                    .values(status='running', worker=worker, attempts=CrewJob.attempts + 1,
+                            lease_expires=now + timedelta(seconds=self.lease_seconds))).rowcount
+                session.commit()
+                if claimed:
+                    job = session.get(CrewJob, job_id)
+                    return job.id, job.ticker, json.loads(job.inputs)
+        return None
+
+    def heartbeat(self, job_id, worker):
+        """Extends the lease; False means the job was taken over and the result must be dropped."""
+        with SessionLocal() as session:
+            extended = session.execute(
+                update(CrewJob)
+                .where(CrewJob.id == job_id, CrewJob.worker == worker, CrewJob.status == 'running')
+                .values(lease_expires=datetime.utcnow() + timedelta(seconds=self.lease_seconds))).rowcount
+            session.commit()
+        return bool(extended)
+
+    def complete(self, job_id, worker, ticker, result):
+        """Saves the analysis and closes the job in one transaction. False if the lease was lost."""
+        with SessionLocal() as session:
+            record = build_record(ticker, result)
+            session.add(record)
+            session.flush()
+            done = session.execute(
+                update(CrewJob)
+                .where(CrewJob.id == job_id, CrewJob.worker == worker, CrewJob.status == 'running')
+                .values(status='done', finished_at=datetime.utcnow(), lease_expires=None,
+                        analysis_id=record.id, error=None)).rowcount
+            if not done:
+                session.rollback()
+                return False
+            session.commit()
+        return True
+
+    def fail(self, job_id, worker, error):
+        """Schedules a retry with backoff, or fails the job once its attempts are used up."""
+        now = datetime.utcnow()
+        with SessionLocal() as session:
+            job = session.get(CrewJob, job_id)
+            if job is None or job.worker != worker or job.status != 'running':
+                return None
+            if job.attempts >= self.max_attempts:
+                job.status, job.finished_at = 'failed', now
+            else:
+                job.status = 'pending'
+                job.available_at = now + timedelta(seconds=self.retry_backoff * 2 ** (job.attempts - 1))
+            job.error, job.lease_expires = str(error)[:2000], None
+            session.commit()
+            return job.status
+
+    def keep_alive(self, job_id, worker):
+        """Starts a thread that heartbeats every third of the lease; set the returned event to stop it."""
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.heartbeat(job_id, worker):
+                    print(f"⚠️ Lost the lease on job {job_id}")
+                    return
+
+        threading.Thread(target=beat, name=f"lease-{job_id}", daemon=True).start()
+        return stop
+
+    # ------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------
+    def counts(self, batch=None):
+        """Jobs per status, e.g. {'pending': 3, 'running': 2, 'done': 40}."""
+        query = select(CrewJob.status, func.count()).group_by(CrewJob.status)
+        if batch:
+            query = query.where(CrewJob.batch == batch)
+        with SessionLocal() as session:
+            return dict(session.execute(query).all())
+
+    def is_drained(self, batch=None):
+        counts = self.counts(batch)
+        return not counts.get('pending') and not counts.get('running')
+
+    def failures(self, batch=None, limit=20):
+        query = (select(CrewJob.ticker, CrewJob.attempts, CrewJob.error)
+                 .where(CrewJob.status == 'failed').order_by(CrewJob.id.desc()).limit(limit))
+        if batch:
+            query = query.where(CrewJob.batch == batch)
+        with SessionLocal() as session:
+            return session.execute(query).all()
+
+
+# Shared instance
+job_queue = JobQueue()
@@ -0,0 +1,155 @@
+"""
+Distributed batch runs: a coordinator screens the universe into the durable
+job queue (job_queue.py) and any number of worker processes, on this host or
+others sharing DATABASE_URL, drain it. Work survives crashes: a job whose
+worker died is picked up again when its lease expires, failed runs are
+retried with backoff, and finished jobs are never run twice.
+
+    python main_distributed.py enqueue [TICKERS ...]     # screen and queue (default: main_scalable universe)
+    python main_distributed.py worker --processes 4      # run workers until stopped
+    python main_distributed.py run --processes 4         # queue, then work until the batch is done
+    python main_distributed.py status [--batch ID]
+    python main_distributed.py retry [--batch ID]        # re-queue failed jobs
+
+Every process gets an equal share of this host's API budgets (RATE_LIMIT_*);
+with several hosts, set RATE_LIMIT_* on each host to its share of the account
+quota, or pass --share.
+"""
+import argparse
+import multiprocessing
+import time
+import traceback
+
+import main_scalable
+from database import init_db
+from job_queue import job_queue, worker_name
+from screener import MarketScreener
+
+POLL_SECONDS = 5  # idle wait between claims when the queue is empty
+
+
+def enqueue(tickers=None):
+    """Screens the universe and queues a job per candidate; returns the batch id (None if nothing passed)."""
+    init_db()
+    candidates = MarketScreener(tickers or main_scalable.INPUT_TICKERS).filter_stocks()
+    if not candidates:
+        print("No stocks passed the screener. Nothing queued.")
+        return None
+    return job_queue.enqueue(candidates, inputs=main_scalable.crew_inputs)
+
+
+def work(index, share=1.0, batch=None, until_drained=False):
+    """
+    Worker loop of one process: claim a job, run its crew while a heartbeat
+    holds the lease, then save the result or schedule a retry.
+    """
+    from src.ai_trading_agent.crew_pool import crew_pool
+    from src.ai_trading_agent.rate_limiter import rate_limiter
+
+    if share < 1:
+        rate_limiter.share(share)
+    worker = worker_name(index)
+    print(f"👷 Worker {worker} started ({share:.0%} of the API budget)")
+    processed = 0
+    try:
+        while True:
+            job = job_queue.claim(worker)
+            if job is None:
+                if until_drained and job_queue.is_drained(batch):
+                    break
+                time.sleep(POLL_SECONDS)
+                continue
+
+            job_id, ticker, inputs = job
+            print(f"🚀 [{worker}] Job {job_id}: {ticker}")
+            lease = job_queue.keep_alive(job_id, worker)
+            try:
+                with crew_pool.crew(main_scalable.EXECUTION_MODE) as crew:
+                    result = crew.kickoff(inputs=inputs)
+            except Exception as e:
+                lease.set()
+                status = job_queue.fail(job_id, worker, f"{type(e).__name__}: {e}")
+                print(f"❌ [{worker}] {ticker} failed ({status or 'lease lost'}): {e}")
+                traceback.print_exc()
+                continue
+            lease.set()
+            if job_queue.complete(job_id, worker, ticker, result):
+                processed += 1
+                print(f"✅ [{worker}] Finished {ticker}")
+            else:
+                print(f"⚠️ [{worker}] Dropped the result for {ticker}: another worker took the job over")
+    except KeyboardInterrupt:
+        pass
+    print(f"👋 Worker {worker} stopped after {processed} jobs")
+    return processed
+
+
+def run_workers(processes=1, share=None, batch=None, until_drained=False):
+    """Starts `processes` worker processes (in-process for one) and waits for them."""
+    share = share or 1 / processes
+    if processes == 1:
+        return work(0, share, batch, until_drained)
+    # Fresh interpreters: crews, HTTP pools and DB connections are not fork-safe
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=work, args=(i, share, batch, until_drained), name=f"crew-worker-{i}")
+               for i in range(processes)]
+    for process in workers:
+        process.start()
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        for process in workers:
+            process.join()
+
+
+def status(batch=None):
+    init_db()
+    counts = job_queue.counts(batch)
+    total = sum(counts.values())
+    print(f"📋 {'Batch ' + batch if batch else 'All batches'}: {total} jobs")
+    for state in ('pending', 'running', 'done', 'failed'):
+        print(f"   {state:8} {counts.get(state, 0)}")
+    for ticker, attempts, error in job_queue.failures(batch):
+        print(f"   ❌ {ticker} after {attempts} attempts: {(error or '').splitlines()[0] if error else ''}")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    queue_cmd = commands.add_parser('enqueue', help="screen tickers and queue the candidates")
+    queue_cmd.add_argument('tickers', nargs='*')
+    for name in ('worker', 'run'):
+        cmd = commands.add_parser(name, help="process queued jobs" if name == 'worker' else
+                                  "queue tickers, then process them until the batch is done")
+        cmd.add_argument('--processes', type=int, default=1, help="worker processes on this host")
+        cmd.add_argument('--share', type=float,
+                         help="fraction of RATE_LIMIT_* each process may use (default: 1/processes)")
+        if name == 'worker':
+            cmd.add_argument('--until-drained', action='store_true', help="exit once no job is pending or running")
+        else:
+            cmd.add_argument('tickers', nargs='*')
+    for name in ('status', 'retry'):
+        commands.add_parser(name).add_argument('--batch')
+    args = parser.parse_args(argv)
+
+    if args.command == 'enqueue':
+        enqueue(args.tickers)
+    elif args.command == 'worker':
+        init_db()
+        run_workers(args.processes, args.share, until_drained=args.until_drained)
+    elif args.command == 'run':
+        batch = enqueue(args.tickers)
+        if batch:
+            run_workers(args.processes, args.share, batch=batch, until_drained=True)
+            status(batch)
+    elif args.command == 'status':
+        status(args.batch)
+    elif args.command == 'retry':
+        init_db()
+        print(f"🔁 Re-queued {job_queue.retry_failed(args.batch)} failed jobs")
+
+
+if __name__ == "__main__":
+    main()
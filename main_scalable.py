@@ -1,81 +1,211 @@
+import argparse
 import asyncio
+import os
 import sys
-from src.ai_trading_agent.crew import AiTradingAgent
-from database import init_db, save_analysis_result
+from src.ai_trading_agent.crew_pool import crew_pool
+from database import init_db, AnalysisWriter
 from screener import MarketScreener
+from src.ai_trading_agent.tools.market_cache import market_cache
+from src.ai_trading_agent.llm_cache import llm_cache
+from src.ai_trading_agent.checkpoints import checkpoint_store
+from src.ai_trading_agent.compaction import token_ledger
+from src.ai_trading_agent.telemetry import telemetry
+from src.ai_trading_agent.tools.prefetch import prefetch_feeds, prefetch_universe
+from src.ai_trading_agent.rate_limiter import rate_limiter, ConcurrencyController
 
 # Configuration
-BATCH_SIZE = 1  # How many AI agents to run at the exact same time (Don't set too high or APIs will ban you)
+# Crew concurrency adapts to provider headroom (see rate_limiter.ConcurrencyController):
+# it starts at MIN_CONCURRENCY, grows while every API has spare quota and halves on a 429
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 16
+# "sequential" or "parallel" (opt-in: independent analyses run concurrently inside each crew)
+EXECUTION_MODE = os.getenv("EXECUTION_MODE", "sequential")
 INPUT_TICKERS = ["AAPL", "TSLA", "NVDA", "AMD", "MSFT", "GOOGL", "AMZN", "META", "NFLX", "INTC"]
 
-async def run_single_crew(ticker):
-    """
-    Runs a single instance of the crew for a specific ticker.
-    """
-    print(f"🚀 [Async] Starting AI Crew for {ticker}...")
-    
-    inputs = {
+def crew_inputs(ticker):
+    """Inputs every batch crew runs with."""
+    return {
         'stock_ticker': ticker,
         'account_size': '10000',
         'analysis_period': '3mo',
         'current_portfolio': 'None'
     }
+
+async def run_single_crew(ticker, writer, checkpoint=None):
+    """
+    Runs a single instance of the crew for a specific ticker.
+    """
+    print(f"🚀 [Async] Starting AI Crew for {ticker}...")
+    
+    inputs = crew_inputs(ticker)
     
     try:
-        # We create a NEW instance of the agent for every thread
-        # kickoff_async returns a Future object
-        agent = AiTradingAgent()
-        crew_instance = agent.crew()
+        # A warm crew from the pool: only the inputs change between tickers
+        with crew_pool.crew(EXECUTION_MODE, checkpoint) as crew_instance:
+            # Use kickoff_async for parallel execution
+            result = await crew_instance.kickoff_async(inputs=inputs)
         
-        # Use kickoff_async for parallel execution
-        result = await crew_instance.kickoff_async(inputs=inputs)
-        
-        # Save to Database
-        save_analysis_result(ticker, str(result))
+        # Queue for the background database writer (never blocks the event loop)
+        writer.submit(ticker, result)
         
         return f"✅ Finished {ticker}"
     except Exception as e:
         return f"❌ Failed {ticker}: {str(e)}"
 
-async def run_batch(tickers):
+def print_telemetry(summary):
+    """Where the batch's time went: per task, agent (LLM calls), tool and provider."""
+    titles = {'task': "🧩 Tasks", 'agent': "🤖 Agents (LLM calls)", 'tool': "🛠️ Tools",
+              'provider': "🌐 Providers (incl. rate-limit waits)"}
+    for kind, title in titles.items():
+        rows = summary.get(kind)
+        if not rows:
+            continue
+        print(f"\n{title}:")
+        for name, t in rows.items():
+            calls = max(t['calls'], 1)
+            details = [f"{t['calls']:>5} calls", f"{t['seconds']:>8.2f}s total", f"{1000 * t['seconds'] / calls:>8.1f} ms avg"]
+            if t['errors']:
+                details.append(f"{t['errors']} errors")
+            if t['retries']:
+                details.append(f"{t['retries']} retries")
+            if t['bytes']:
+                details.append(f"{t['bytes'] / 1e3:.0f} kB fetched")
+            if t['prompt_tokens']:
+                details.append(f"{t['prompt_tokens']} prompt / {t['completion_tokens']} completion tokens")
+            if t['cache_hits'] or t['cache_misses']:
+                details.append(f"{t['cache_hits']}/{t['cache_hits'] + t['cache_misses']} cache hits")
+            print(f"   {name[:40]:40} " + "  ".join(details))
+
+def resume_candidates(run_id=None):
+    """Run id and the tickers of a checkpointed run that never reached the database."""
+    run_id = run_id or checkpoint_store.latest_run()
+    tickers = checkpoint_store.run_tickers(run_id) if run_id else []
+    if not tickers:
+        return None, []
+    progress = checkpoint_store.progress(run_id)
+    remaining = [t for t in tickers if t not in progress['finished']]
+    print(f"⏯️ Resuming run {run_id}: {len(progress['finished'])} of {len(tickers)} tickers already saved, "
+          f"{len(progress['partial'])} restart from their last completed task")
+    return run_id, remaining
+
+async def run_batch(tickers, select=None, resume=None):
     """
     Manages the worker pool to ensure we don't exceed rate limits.
+    `select` may narrow the screened candidates further (the scheduler passes
+    its change detector so unchanged tickers are skipped). `resume` continues
+    an interrupted run from its checkpoints: a run id, or True for the latest.
     """
     # 1. Initialize Database
     init_db()
-    
-    # 2. Run Screener (Synchronous is fine here as it's fast)
-    screener = MarketScreener(tickers)
-    candidates = screener.filter_stocks()
-    
-    if not candidates:
-        print("No stocks passed the screener. Exiting.")
-        return
+    market_cache.reset_stats()
+    token_ledger.reset()
+    telemetry.reset()
+    crew_pool.reset_stats()
+    metrics_port = telemetry.serve()
+    if metrics_port:
+        print(f"📡 Metrics at http://127.0.0.1:{metrics_port}/metrics")
+    run_id, history = None, None
+
+    if resume:
+        if checkpoint_store is None:
+            print("Checkpoints are disabled (CHECKPOINT_PATH is empty), nothing to resume. Exiting.")
+            return
+        run_id, candidates = resume_candidates(None if resume is True else resume)
+        if run_id is None:
+            print("No checkpointed run to resume. Exiting.")
+            return
+        if not candidates:
+            print("Every ticker of this run is already saved. Exiting.")
+            return
+    else:
+        # 2. Run Screener (Synchronous is fine here as it's fast)
+        screener = MarketScreener(tickers)
+        candidates = screener.filter_stocks()
+        history = screener.data
+
+        if not candidates:
+            print("No stocks passed the screener. Exiting.")
+            return
+
+        if select is not None:
+            candidates = await asyncio.to_thread(select, candidates)
+            if not candidates:
+                print("No candidates need a new analysis. Exiting.")
+                return
+
+        # Every completed task is checkpointed so an interrupted run can be resumed
+        if checkpoint_store is not None:
+            run_id = checkpoint_store.start_run(candidates)
+            print(f"📍 Checkpointing run {run_id} (resume with --resume)")
+
+    # 3. Pre-fetch history, info and statements for every candidate in bulk
+    # so the crews below run against the local snapshot only
+    snapshot = await asyncio.to_thread(prefetch_universe, candidates, history=history)
+    market_cache.install_snapshot(snapshot)
+    # News and social feeds over pooled async HTTP, concurrently for every candidate
+    await prefetch_feeds(candidates)
 
     print(f"\n🤖 Spawning AI Agents for: {', '.join(candidates)}\n")
 
-    # 3. Process in Batches (Semaphore pattern)
-    # This ensures we only run BATCH_SIZE agents at once
-    semaphore = asyncio.Semaphore(BATCH_SIZE)
+    # 4. Process with adaptive concurrency
+    # Every API call goes through the shared rate limiter; the controller only
+    # admits more crews while all providers still have headroom
+    controller = ConcurrencyController(rate_limiter, MIN_CONCURRENCY, MAX_CONCURRENCY)
+    writer = AnalysisWriter(on_saved=(lambda saved: checkpoint_store.finish(run_id, saved)) if run_id else None)
 
     async def sem_task(ticker):
-        async with semaphore:
-            return await run_single_crew(ticker)
+        checkpoint = checkpoint_store.ticker(run_id, ticker) if run_id else None
+        async with controller.slot():
+            return await run_single_crew(ticker, writer, checkpoint)
 
     # Gather all tasks
     tasks = [sem_task(ticker) for ticker in candidates]
-    results = await asyncio.gather(*tasks)
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        market_cache.install_snapshot(None)
+        await asyncio.to_thread(writer.close)
     
-    # 4. Final Report
+    # 5. Final Report
     print("\n" + "="*50)
     print("🏁 BATCH EXECUTION COMPLETE")
     print("="*50)
     for res in results:
         print(res)
 
+    pool_stats = crew_pool.stats()
+    print(f"\n♨️ Crew pool: {pool_stats['built']} crews built, {pool_stats['reused']} reused")
+    print(f"🎛️ Peak concurrency: {controller.peak} crews, {rate_limiter.throttle_count()} rate-limit backoffs")
+    print(f"💾 Database: {writer.saved} analyses saved, {writer.failed} failed")
+
+    stats = market_cache.stats()
+    print(f"\n📦 Market data cache: {stats['saved_fetches']} fetches saved "
+          f"({stats['snapshot_hits']} from the pre-fetch snapshot, {stats['store_hits']} from the price store), "
+          f"{stats['misses']} upstream calls ({stats['hit_rate']*100:.0f}% hit rate)")
+
+    print_telemetry(telemetry.summary())
+
+    tokens = token_ledger.report()
+    if tokens:
+        print(f"\n🔤 Estimated tokens per task (upstream context before → after compaction, LLM prompt / completion):")
+        for task, t in tokens.items():
+            runs = max(t['runs'], 1)
+            print(f"   {task:32} context {t['context_in'] // runs:>6} → {t['context_out'] // runs:<6} "
+                  f"prompt {t['prompt'] // runs:>6}  completion {t['completion'] // runs:>5}  (per ticker)")
+
+    if llm_cache is not None:
+        llm_stats = llm_cache.stats()
+        print(f"🧠 LLM response cache: {llm_stats['hits']} replayed, {llm_stats['misses']} new completions "
+              f"({llm_stats['entries']} stored, {llm_stats['bytes'] / 1e6:.1f} MB)")
+
 if __name__ == "__main__":
     # Ensure Windows compatibility for asyncio
     if sys.platform.startswith('win'):
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    parser = argparse.ArgumentParser(description="Screen INPUT_TICKERS and analyze every candidate.")
+    parser.add_argument('--resume', nargs='?', const=True, metavar='RUN_ID',
+                        help="continue an interrupted run (default: the latest) instead of starting over")
+    args = parser.parse_args()
         
-    asyncio.run(run_batch(INPUT_TICKERS))
\ No newline at end of file
+    asyncio.run(run_batch(INPUT_TICKERS, resume=args.resume))
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""
+Scheduled universe-wide runs with incremental re-analysis.
+
+On every tick of SCHEDULE_CRON the universe is screened, and only candidates
+whose inputs materially changed since their last analysis are handed to the
+crews: a price move, a batch of new headlines, a shift in headline sentiment,
+or an analysis older than CHANGE_MAX_AGE_DAYS. LLM spend therefore follows
+market activity rather than the size of the universe.
+
+    python scheduler.py                      # run on the cron schedule
+    python scheduler.py --once               # one cycle now
+    python scheduler.py --once --dry-run     # only show what would be re-analyzed
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import func, select
+
+import main_scalable
+from database import InputSnapshot, SessionLocal, TradeAnalysis, init_db
+from screener import MarketScreener
+from src.ai_trading_agent.tools.financial_tools import fetch_news
+from src.ai_trading_agent.tools.market_cache import market_cache
+from src.ai_trading_agent.tools.sentiment import sentiment_scorer
+
+# Configuration (override through environment variables)
+SCHEDULE_CRON = os.getenv("SCHEDULE_CRON", "30 16 * * mon-fri")  # after the US close
+SCHEDULE_TIMEZONE = os.getenv("SCHEDULE_TIMEZONE", "America/New_York")
+SCHEDULE_TICKERS = os.getenv("SCHEDULE_TICKERS")  # comma-separated; defaults to main_scalable.INPUT_TICKERS
+
+PRICE_MOVE_THRESHOLD = float(os.getenv("CHANGE_PRICE_MOVE", "0.03"))          # 3% since the last analysis
+NEW_HEADLINES_THRESHOLD = int(os.getenv("CHANGE_NEW_HEADLINES", "3"))         # unseen headlines
+SENTIMENT_SHIFT_THRESHOLD = float(os.getenv("CHANGE_SENTIMENT_SHIFT", "0.2"))  # on the -1..1 lexicon scale
+MAX_AGE_DAYS = float(os.getenv("CHANGE_MAX_AGE_DAYS", "7"))                  # re-analyze at least this often
+
+
+def headline_key(item):
+    """Fingerprint of a headline that survives punctuation and case changes between searches."""
+    title = re.sub(r"[^a-z0-9 ]", "", (item.get('title') or '').lower())
+    return hashlib.sha1(" ".join(title.split()).encode()).hexdigest()[:16]
+
+
+def news_inputs(ticker):
+    """Headline fingerprints and mean lexicon sentiment of the latest news."""
+    news = fetch_news(ticker)
+    texts = [f"{item.get('title', '')} {item.get('snippet', '')}" for item in news]
+    sentiment = float(sentiment_scorer.score_texts(texts).mean()) if texts else None
+    return [headline_key(item) for item in news], sentiment
+
+
+class ChangeDetector:
+    """
+    Decides which screened candidates need a new analysis. Pass an instance
+    as `run_batch(select=...)`, then call `record()` once the batch has saved
+    its results so the next run compares against today's inputs.
+    """
+
+    def __init__(self, now=None):
+        self.now = now or datetime.utcnow()
+        self.changes = {}  # ticker -> reasons for re-analysis
+        self.inputs = {}   # ticker -> (close, headline keys, news sentiment)
+
+    def _reference_close(self, ticker, when):
+        """Close on the last session at or before `when`, for tickers analyzed before snapshots existed."""
+        closes = market_cache.close_prices([ticker], period="1y")[ticker].dropna()
+        closes = closes[closes.index <= when]
+        return float(closes.iloc[-1]) if len(closes) else None
+
+    def __call__(self, tickers):
+        tickers = [t.upper() for t in tickers]
+        with SessionLocal() as session:
+            last_analysis = dict(session.execute(
+                select(TradeAnalysis.ticker, func.max(TradeAnalysis.timestamp))
+                .where(TradeAnalysis.ticker.in_(tickers))
+                .group_by(TradeAnalysis.ticker)).all())
+            snapshots = {s.ticker: s for s in session.scalars(
+                select(InputSnapshot).where(InputSnapshot.ticker.in_(tickers)))}
+        closes = market_cache.close_prices(tickers, period="1mo").ffill().iloc[-1]
+
+        for ticker in tickers:
+            reasons = []
+            close = float(closes[ticker])
+            last = last_analysis.get(ticker)
+            snapshot = snapshots.get(ticker)
+            if last is None:
+                reasons.append("never analyzed")
+            else:
+                age = self.now - last
+                if age > timedelta(days=MAX_AGE_DAYS):
+                    reasons.append(f"last analysis {age.days}d old")
+                reference = snapshot.close if snapshot is not None else self._reference_close(ticker, last)
+                if reference:
+                    move = close / reference - 1
+                    if abs(move) >= PRICE_MOVE_THRESHOLD:
+                        reasons.append(f"price {move:+.1%}")
+
+            # News is only searched when price and age did not already decide,
+            # or to record the baseline of a ticker that is about to be analyzed
+            headlines, sentiment = [], None
+            if snapshot is not None or reasons:
+                try:
+                    headlines, sentiment = news_inputs(ticker)
+                except Exception as e:
+                    print(f"⚠️ News check failed for {ticker}: {e}")
+            if snapshot is not None and not reasons:
+                new = len(set(headlines) - set(json.loads(snapshot.headlines or "[]")))
+                if new >= NEW_HEADLINES_THRESHOLD:
+                    reasons.append(f"{new} new headlines")
+                if sentiment is not None and snapshot.news_sentiment is not None:
+                    shift = sentiment - snapshot.news_sentiment
+                    if abs(shift) >= SENTIMENT_SHIFT_THRESHOLD:
+                        reasons.append(f"news sentiment {shift:+.2f}")
+
+            self.inputs[ticker] = (close, headlines, sentiment)
+            if reasons:
+                self.changes[ticker] = reasons
+
+        skipped = len(tickers) - len(self.changes)
+        print(f"🔄 {len(self.changes)} of {len(tickers)} candidates changed since their last analysis "
+              f"({skipped} skipped)")
+        for ticker, reasons in self.changes.items():
+            print(f"   {ticker}: {', '.join(reasons)}")
+        return list(self.changes)
+
+    def record(self, since=None):
+        """Stores the inputs of every changed ticker that got a new analysis after `since`."""
+        since = since or self.now
+        with SessionLocal() as session:
+            analyzed = set(session.scalars(
+                select(TradeAnalysis.ticker).distinct()
+                .where(TradeAnalysis.ticker.in_(list(self.changes)), TradeAnalysis.timestamp >= since)))
+            for ticker in analyzed:
+                close, headlines, sentiment = self.inputs[ticker]
+                session.merge(InputSnapshot(ticker=ticker, analyzed_at=self.now, close=close,
+                                            headlines=json.dumps(headlines), news_sentiment=sentiment))
+            session.commit()
+        return analyzed
+
+
+def universe():
+    if SCHEDULE_TICKERS:
+        return [t.strip().upper() for t in SCHEDULE_TICKERS.split(',') if t.strip()]
+    return main_scalable.INPUT_TICKERS
+
+
+def run_cycle(tickers=None, dry_run=False):
+    """Screens the universe and analyzes the candidates whose inputs changed."""
+    tickers = tickers or universe()
+    detector = ChangeDetector()
+    print(f"\n⏰ Scheduled run at {detector.now:%Y-%m-%d %H:%M} UTC for {len(tickers)} tickers")
+    if dry_run:
+        init_db()
+        detector(MarketScreener(tickers).filter_stocks())
+        return detector.changes
+    asyncio.run(main_scalable.run_batch(tickers, select=detector))
+    analyzed = detector.record()
+    print(f"📌 Recorded inputs for {len(analyzed)} analyzed tickers")
+    return detector.changes
+
+
+def start(cron=SCHEDULE_CRON, timezone=SCHEDULE_TIMEZONE, tickers=None):
+    """Blocks, running `run_cycle` on the cron schedule (missed runs are coalesced into one)."""
+    scheduler = BlockingScheduler(timezone=timezone)
+    trigger = CronTrigger.from_crontab(cron, timezone=timezone)
+    scheduler.add_job(run_cycle, trigger, kwargs={'tickers': tickers},
+                      max_instances=1, coalesce=True, misfire_grace_time=3600)
+    next_run = trigger.get_next_fire_time(None, datetime.now(trigger.timezone))
+    print(f"📅 Scheduler started ({cron}, {timezone}), next run {next_run:%Y-%m-%d %H:%M %Z}; press Ctrl+C to stop")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        print("👋 Scheduler stopped")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--once', action='store_true', help="run a single cycle now and exit")
+    parser.add_argument('--dry-run', action='store_true', help="with --once, only report the changed tickers")
+    parser.add_argument('--cron', default=SCHEDULE_CRON, help="crontab expression (default: %(default)s)")
+    parser.add_argument('--tickers', help="comma-separated universe (default: SCHEDULE_TICKERS or main_scalable)")
+    args = parser.parse_args(argv)
+    tickers = [t.strip().upper() for t in args.tickers.split(',')] if args.tickers else None
+
+    if args.once:
+        run_cycle(tickers, dry_run=args.dry_run)
+    else:
+        start(args.cron, tickers=tickers)
+
+
+if __name__ == "__main__":
+    if sys.platform.startswith('win'):
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    main()
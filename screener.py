@@ -1,86 +1,140 @@
-import yfinance as yf
+import os
+import re
 import pandas as pd
 import warnings
+import yaml
+from src.ai_trading_agent.tools.market_cache import market_cache
+from src.ai_trading_agent.tools.price_store import price_store
+from src.ai_trading_agent.tools.indicators import sma, ema, rsi
 
 # Suppress standard warnings for cleaner output
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'screener_rules.yaml')
+
+# Indicator columns that rule expressions may reference, e.g. sma_200 or volume_avg_20
+INDICATOR_PATTERN = re.compile(r'\b(sma|ema|rsi|volume_avg|return)_(\d+)\b')
+
+# yfinance periods and the number of trading days they roughly contain
+PERIOD_BARS = [('3mo', 63), ('6mo', 126), ('1y', 252), ('2y', 504), ('5y', 1260), ('max', None)]
+
+
+def load_rules(path=RULES_FILE):
+    """Reads the screening rules (name -> expression) and the trend expression from YAML."""
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    rules = config.get('rules') or {}
+    if not isinstance(rules, dict) or not rules:
+        # Screening with no rules would send the whole universe to the crews
+        raise ValueError(f"{path} defines no screening rules: add at least one `name: expression` under `rules:`")
+    return rules, config.get('trend')
+
+
+def required_period(expressions):
+    """Shortest yfinance period that covers the longest indicator window in the rules."""
+    longest = max([int(n) for expr in expressions for _, n in INDICATOR_PATTERN.findall(expr)] or [1])
+    needed = int(longest * 1.1) + 5  # a little slack for holidays and missing bars
+    for period, bars in PERIOD_BARS:
+        if bars is None or bars >= needed:
+            return period
+
+
+def panel_field(data, field, tickers):
+    """Returns a wide dates x tickers frame for one OHLCV field of a batched download."""
+    if not isinstance(data.columns, pd.MultiIndex):
+        return data[[field]].set_axis(tickers[:1], axis=1)
+    level = 1 if field in data.columns.get_level_values(1) else 0
+    panel = data.xs(field, axis=1, level=level)
+    return panel.reindex(columns=tickers)
+
+
+def compute_indicators(close, volume, expressions):
+    """
+    Evaluates every indicator referenced by the rules across the whole panel at
+    once and returns one row per ticker with the latest values.
+    """
+    latest = {
+        'close': close.ffill().iloc[-1],
+        'volume': volume.ffill().iloc[-1],
+    }
+    for name, window in sorted({m for expr in expressions for m in INDICATOR_PATTERN.findall(expr)}):
+        window = int(window)
+        if name == 'sma':
+            values = sma(close, window)
+        elif name == 'ema':
+            values = ema(close, window)
+        elif name == 'rsi':
+            values = rsi(close, window)
+        elif name == 'volume_avg':
+            values = sma(volume, window)
+        else:  # return
+            values = close.pct_change(window, fill_method=None)
+        latest[f'{name}_{window}'] = values.ffill().iloc[-1]
+    return pd.DataFrame(latest)
+
+
 class MarketScreener:
-    def __init__(self, tickers):
+    def __init__(self, tickers, rules=None, trend=None):
         self.tickers = tickers
+        if rules is None:
+            rules, default_trend = load_rules()
+            trend = trend or default_trend
+        self.rules = rules
+        self.trend = trend
+        self.data = None     # Last batched download, reused by the pre-fetch stage
+        self.results = None  # Per-ticker indicator values and verdicts from the last run
 
     def filter_stocks(self):
         """
-        Returns a list of tickers that meet basic technical criteria.
+        Returns a list of tickers that meet every screening rule.
         """
-        candidates = []
-        print(f"🔍 Screening {len(self.tickers)} stocks for opportunities...")
+        expressions = list(self.rules.values()) + ([self.trend] if self.trend else [])
+        period = required_period(expressions)
+        print(f"🔍 Screening {len(self.tickers)} stocks for opportunities ({period} of history)...")
 
-        # Download data in batch
-        # We use 'auto_adjust=True' to get the actual price behavior
-        data = yf.download(self.tickers, period="6mo", group_by='ticker', progress=True, auto_adjust=True)
+        # Read the local price store (only bars newer than the last run are downloaded),
+        # or download in batch through the shared cache when the store is disabled.
+        # Both use 'auto_adjust=True' prices to get the actual price behavior
+        if price_store is not None and price_store.supports(period):
+            data = price_store.panel(self.tickers, period)
+        else:
+            data = market_cache.download(self.tickers, period=period, group_by='ticker', progress=True, auto_adjust=True)
+        self.data = data
 
-        print("\n📊 SCREENER RESULTS:")
-        print(f"{'TICKER':<8} | {'PRICE':<10} | {'TREND':<15} | {'STATUS'}")
-        print("-" * 50)
+        # 1. Calculate indicators for the whole universe at once (dates x tickers frames)
+        close = panel_field(data, 'Close', self.tickers)
+        volume = panel_field(data, 'Volume', self.tickers)
+        frame = compute_indicators(close, volume, expressions)
+
+        # 2. Evaluate each rule as a vectorized boolean column (NaN compares as False)
+        checks = pd.DataFrame({name: frame.eval(expr) for name, expr in self.rules.items()}, index=frame.index)
+        passed = checks.all(axis=1) & frame['close'].notna()
 
-        for ticker in self.tickers:
-            try:
-                # 1. Extract and COPY the dataframe to avoid SettingWithCopyWarning
-                # Handle cases where only one ticker is downloaded (structure changes)
-                if len(self.tickers) == 1:
-                    df = data.copy()
-                else:
-                    df = data[ticker].copy()
-                
-                if df.empty: 
-                    continue
-
-                # 2. Calculate Indicators
-                df['SMA_50'] = df['Close'].rolling(window=50).mean()
-                df['SMA_200'] = df['Close'].rolling(window=200).mean()
-                df['Volume_Avg'] = df['Volume'].rolling(window=20).mean()
-                
-                # Get the latest valid row
-                latest = df.iloc[-1]
-                
-                # 3. Define Logic
-                price = latest['Close']
-                sma_50 = latest['SMA_50']
-                sma_200 = latest['SMA_200']
-                volume = latest['Volume_Avg']
-                
-                # RELAXED CRITERIA FOR TESTING:
-                # 1. Price is above $10 (avoid penny stocks)
-                # 2. Volume is decent (> 500k)
-                # 3. NOT in a massive crash (Price > 0.9 * SMA50) -> allows slight downtrends
-                
-                is_valid_price = price > 10
-                is_liquid = volume > 500_000
-                is_not_crashing = price > (sma_50 * 0.9) # Only filter if price is 10% below 50 SMA
-
-                if is_valid_price and is_liquid and is_not_crashing:
-                    candidates.append(ticker)
-                    status = "✅ PASSED"
-                    trend = "Bullish" if price > sma_200 else "Recovering"
-                else:
-                    status = "❌ REJECTED"
-                    if not is_liquid: trend = "Low Vol"
-                    elif not is_not_crashing: trend = "Downtrend"
-                    else: trend = "Penny Stock"
-
-                print(f"{ticker:<8} | ${price:<9.2f} | {trend:<15} | {status}")
-                    
-            except Exception as e:
-                print(f"{ticker:<8} | {'ERROR':<10} | {str(e):<15} | ❌ ERROR")
-                continue
-                
+        # 3. Label the results
+        status = passed.map({True: "✅ PASSED", False: "❌ REJECTED"})
+        if checks.columns.empty:  # rules={} passed explicitly: every ticker with data passes
+            failed_rule = pd.Series("", index=frame.index)
+        else:
+            failed_rule = "✗ " + (~checks).idxmax(axis=1)
+        trend_up = frame.eval(self.trend) if self.trend else pd.Series(True, index=frame.index)
+        trend = failed_rule.where(~passed, trend_up.map({True: "Bullish", False: "Recovering"}))
+        trend = trend.where(frame['close'].notna(), "No data")
+
+        self.results = frame.assign(trend=trend, status=status)
+        candidates = [ticker for ticker in self.tickers if passed.get(ticker, False)]
+
+        print("\n📊 SCREENER RESULTS:")
+        print(pd.DataFrame({
+            'PRICE': frame['close'].map(lambda p: f"${p:.2f}" if pd.notna(p) else "ERROR"),
+            'TREND': trend,
+            'STATUS': status,
+        }).rename_axis('TICKER').to_string())
         print("-" * 50)
         print(f"🎯 Found {len(candidates)} candidates for AI analysis.\n")
-        
+
         # If no candidates found, force add AAPL just for testing
         if not candidates:
             print("⚠️ No strict matches found. Adding 'AAPL' and 'MSFT' for testing purposes.")
             return ['AAPL', 'MSFT']
-            
-        return candidates
\ No newline at end of file
+
+        return candidates
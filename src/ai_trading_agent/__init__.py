@@ -0,0 +1,5 @@
+import os
+
+# litellm (imported by crewAI) downloads its model cost map on every import
+# unless told to use the copy it ships with; set it to "False" to fetch it again
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
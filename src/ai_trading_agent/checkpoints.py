@@ -0,0 +1,164 @@
+"""
+Per-ticker, per-task checkpoints of batch runs, stored in SQLite.
+
+Every task output is saved the moment the task completes, together with each
+tool output its agent fetched, so an interrupted batch can be resumed: tickers
+that were saved are skipped, and a partial ticker replays its finished tasks
+and cached tool calls locally and only asks the LLM for the remaining tasks.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from crewai.agents.cache.cache_handler import CacheHandler
+from pydantic import PrivateAttr
+
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "data/checkpoints.sqlite")  # set to "" to disable checkpoints
+CHECKPOINT_KEEP_RUNS = int(os.getenv("CHECKPOINT_KEEP_RUNS", "5"))  # older runs are pruned on a new run
+
+
+class CheckpointStore:
+    """SQLite store of runs, task outputs and tool outputs."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY, tickers TEXT NOT NULL, created REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " run_id TEXT, ticker TEXT, task TEXT, output TEXT NOT NULL, created REAL NOT NULL,"
+            " PRIMARY KEY (run_id, ticker, task));"
+            "CREATE TABLE IF NOT EXISTS tools ("
+            " run_id TEXT, ticker TEXT, tool TEXT, input TEXT, output TEXT NOT NULL,"
+            " PRIMARY KEY (run_id, ticker, tool, input));"
+            "CREATE TABLE IF NOT EXISTS finished ("
+            " run_id TEXT, ticker TEXT, finished REAL NOT NULL, PRIMARY KEY (run_id, ticker));"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def _write(self, sql: str, *params) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def _read(self, sql: str, *params) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ------------------------------------------------------------------
+    # Runs
+    # ------------------------------------------------------------------
+    def start_run(self, tickers: List[str], run_id: Optional[str] = None) -> str:
+        """Registers a run over `tickers` and prunes all but the latest CHECKPOINT_KEEP_RUNS runs."""
+        run_id = run_id or datetime.utcnow().strftime("%Y%m%d-%H%M%S-%f")
+        self._write("INSERT OR REPLACE INTO runs (run_id, tickers, created) VALUES (?, ?, ?)",
+                    run_id, json.dumps(list(tickers)), time.time())
+        self.prune(CHECKPOINT_KEEP_RUNS)
+        return run_id
+
+    def latest_run(self) -> Optional[str]:
+        rows = self._read("SELECT run_id FROM runs ORDER BY created DESC LIMIT 1")
+        return rows[0][0] if rows else None
+
+    def run_tickers(self, run_id: str) -> List[str]:
+        rows = self._read("SELECT tickers FROM runs WHERE run_id = ?", run_id)
+        return json.loads(rows[0][0]) if rows else []
+
+    def finish(self, run_id: str, tickers: List[str]) -> None:
+        """Marks tickers whose analysis reached the database."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO finished (run_id, ticker, finished) VALUES (?, ?, ?)",
+                                   [(run_id, ticker, now) for ticker in tickers])
+            self._conn.commit()
+
+    def progress(self, run_id: str) -> Dict[str, Any]:
+        """Finished tickers, and the completed tasks of every partial one."""
+        finished = {t for (t,) in self._read("SELECT ticker FROM finished WHERE run_id = ?", run_id)}
+        partial: Dict[str, List[str]] = {}
+        for ticker, task in self._read("SELECT ticker, task FROM tasks WHERE run_id = ? ORDER BY created", run_id):
+            if ticker not in finished:
+                partial.setdefault(ticker, []).append(task)
+        return {'finished': finished, 'partial': partial}
+
+    def prune(self, keep: int) -> None:
+        with self._lock:
+            stale = [r for (r,) in self._conn.execute(
+                "SELECT run_id FROM runs ORDER BY created DESC LIMIT -1 OFFSET ?", (keep,))]
+            for table in ('runs', 'tasks', 'tools', 'finished'):
+                self._conn.executemany(f"DELETE FROM {table} WHERE run_id = ?", [(r,) for r in stale])
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Task and tool outputs
+    # ------------------------------------------------------------------
+    def task_output(self, run_id: str, ticker: str, task: str) -> Optional[dict]:
+        rows = self._read("SELECT output FROM tasks WHERE run_id = ? AND ticker = ? AND task = ?", run_id, ticker, task)
+        return json.loads(rows[0][0]) if rows else None
+
+    def save_task(self, run_id: str, ticker: str, task: str, output: dict) -> None:
+        self._write("INSERT OR REPLACE INTO tasks (run_id, ticker, task, output, created) VALUES (?, ?, ?, ?, ?)",
+                    run_id, ticker, task, json.dumps(output, default=str), time.time())
+
+    def tool_output(self, run_id: str, ticker: str, tool: str, input: str) -> Optional[str]:
+        rows = self._read("SELECT output FROM tools WHERE run_id = ? AND ticker = ? AND tool = ? AND input = ?",
+                          run_id, ticker, tool, input)
+        return rows[0][0] if rows else None
+
+    def save_tool(self, run_id: str, ticker: str, tool: str, input: str, output: str) -> None:
+        self._write("INSERT OR REPLACE INTO tools (run_id, ticker, tool, input, output) VALUES (?, ?, ?, ?, ?)",
+                    run_id, ticker, tool, input, output)
+
+    def ticker(self, run_id: str, ticker: str) -> "TickerCheckpoint":
+        return TickerCheckpoint(store=self, run_id=run_id, ticker=ticker)
+
+
+class TickerCheckpoint(CacheHandler):
+    """
+    Checkpoint of one ticker in one run. It doubles as the crew's tool cache,
+    so every tool output is persisted as soon as it is fetched and replayed
+    on resume (see AiTradingAgent(checkpoint=...)).
+    """
+
+    _store: CheckpointStore = PrivateAttr()
+    _run_id: str = PrivateAttr()
+    _ticker: str = PrivateAttr()
+
+    def __init__(self, store: CheckpointStore, run_id: str, ticker: str):
+        super().__init__()
+        self._store, self._run_id, self._ticker = store, run_id, ticker
+
+    @property
+    def ticker(self) -> str:
+        return self._ticker
+
+    def add(self, tool: str, input: str, output: Any) -> None:
+        super().add(tool, input, output)
+        if isinstance(output, str):
+            self._store.save_tool(self._run_id, self._ticker, tool, input, output)
+
+    def read(self, tool: str, input: str) -> Any | None:
+        output = super().read(tool, input)
+        if output is None:
+            output = self._store.tool_output(self._run_id, self._ticker, tool, input)
+        return output
+
+    def task_output(self, task: str) -> Optional[dict]:
+        return self._store.task_output(self._run_id, self._ticker, task)
+
+    def save_task(self, task: str, output: dict) -> None:
+        self._store.save_task(self._run_id, self._ticker, task, output)
+
+
+# Shared instance (None when CHECKPOINT_PATH is "")
+checkpoint_store = CheckpointStore(CHECKPOINT_PATH) if CHECKPOINT_PATH else None
@@ -0,0 +1,178 @@
+"""
+Compaction of tool outputs and task context, with per-task token accounting.
+
+Tool reports are written for people: banners, emoji, aligned tables and
+16-digit floats. Every token of that is paid again by each agent that reads
+it, and the head trader reads all of them. `compact_output` strips a tool's
+report down to its facts, and `compact_context` does the same for the
+upstream outputs a task receives. Both are lossless by default.
+
+Budgets are opt-in: with TOOL_OUTPUT_TOKEN_BUDGET a tool report is capped,
+and with CONTEXT_TOKEN_BUDGET a task's upstream outputs are fitted into it
+together, sharing the budget fairly. Trimming never drops the trade levels
+(entry, stop-loss, targets, position size, allocation) the head trader
+decides on. `token_ledger` records, per task, how large the context was
+before and after, and the prompt and completion sizes of every LLM call, so
+budgets can be sized to the real reports.
+
+Token counts are estimates (about four characters per token), which is
+accurate enough to compare tasks and runs without a tokenizer dependency.
+"""
+import functools
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from crewai.utilities.formatter import DIVIDERS
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "0"))          # upstream context per task (0: no limit)
+TOOL_OUTPUT_TOKEN_BUDGET = int(os.getenv("TOOL_OUTPUT_TOKEN_BUDGET", "0"))   # per tool call (0: no limit)
+CHARS_PER_TOKEN = 4
+
+_EMOJI = re.compile("[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\u2139\uFE0F\u200D]")  # emoji, symbols, dingbats
+_RULE = re.compile(r"^\s*([=\-_*~\u2500-\u257F])\1{2,}\s*$")        # ----- / ===== / box-drawing lines
+_HEADING = re.compile(r"^\s*=+\s*(.+?)\s*=+\s*$")                  # === VALUATION METRICS ===
+_LONG_FLOAT = re.compile(r"\d+\.\d{5,}")                           # 59.03617237170993 -> 59.04
+_KEY_LINE = re.compile(r"entry|stop.?loss|take.?profit|\btp\d|target|position size|allocation|"  # trade levels,
+                       r"risk.?reward|max(imum)?( potential)? loss|decision|recommend", re.IGNORECASE)  # kept by trim
+_SPACES = re.compile(r"[ \t]{2,}")
+_OMITTED_CHARS = len("[... 100 lines omitted ...]\n")
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    return -(-len(text or "") // CHARS_PER_TOKEN)
+
+
+def _round(match: re.Match) -> str:
+    return f"{float(match.group(0)):.2f}"
+
+
+def compact(text: str) -> str:
+    """Drops decoration (emoji, rules, blank lines, alignment padding) and over-precise floats."""
+    lines = []
+    for line in str(text).splitlines():
+        if _RULE.match(line):
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            line = f"{heading.group(1)}:"
+        line = _SPACES.sub(" ", _LONG_FLOAT.sub(_round, _EMOJI.sub("", line))).strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def trim(text: str, max_tokens: int) -> str:
+    """
+    Cuts the middle of `text` to fit `max_tokens`: the head and the closing
+    summary are kept, and so are the trade-level lines of the middle (up to
+    half the budget).
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    lines = text.splitlines()
+    keep, used = set(), 0
+    for index, line in enumerate(lines):
+        cost = len(line) + 1 + _OMITTED_CHARS  # a kept middle line may need an omission marker
+        if _KEY_LINE.search(line) and used + cost <= max_chars // 2:
+            keep.add(index)
+            used += cost
+    head_chars, tail_chars = (max_chars - used) * 2 // 3, (max_chars - used) // 3
+    for indices, budget in ((range(len(lines)), head_chars), (range(len(lines) - 1, -1, -1), tail_chars)):
+        for index in indices:
+            if index in keep:
+                continue
+            if len(lines[index]) + 1 > budget:
+                break
+            keep.add(index)
+            budget -= len(lines[index]) + 1
+    if not keep:  # one long line
+        return text[:max_chars]
+    kept, omitted = [], 0
+    for index, line in enumerate(lines):
+        if index in keep:
+            if omitted:
+                kept.append(f"[... {omitted} lines omitted ...]")
+                omitted = 0
+            kept.append(line)
+        else:
+            omitted += 1
+    if omitted:
+        kept.append(f"[... {omitted} lines omitted ...]")
+    return "\n".join(kept)
+
+
+def compact_output(run):
+    """Decorator for a tool's `_run`: compacts the returned report, capped at TOOL_OUTPUT_TOKEN_BUDGET if set."""
+    @functools.wraps(run)
+    def wrapper(*args, **kwargs):
+        result = run(*args, **kwargs)
+        if not isinstance(result, str):
+            return result
+        result = compact(result)
+        return trim(result, TOOL_OUTPUT_TOKEN_BUDGET) if TOOL_OUTPUT_TOKEN_BUDGET > 0 else result
+    return wrapper
+
+
+def compact_context(context: Optional[str], budget: int = CONTEXT_TOKEN_BUDGET) -> Optional[str]:
+    """
+    Compacts every upstream output in a task's context and, if `budget` is
+    set, fits them into it together: outputs under their fair share are kept
+    whole, and what they leave over is split among the longer ones.
+    """
+    if not context:
+        return context
+    sections = [compact(section) for section in context.split(DIVIDERS)]
+    if budget <= 0:
+        return DIVIDERS.join(sections)
+    sizes = [estimate_tokens(section) for section in sections]
+    remaining, open_sections = budget, sorted(range(len(sections)), key=sizes.__getitem__)
+    shares: List[int] = [0] * len(sections)
+    while open_sections:
+        share = remaining // len(open_sections)
+        index = open_sections.pop(0)
+        shares[index] = min(sizes[index], share)
+        remaining -= shares[index]
+    return DIVIDERS.join(trim(section, share) for section, share in zip(sections, shares))
+
+
+class TokenLedger:
+    """Thread-safe per-task token totals for a process (reset at the start of a batch)."""
+
+    FIELDS = ('context_in', 'context_out', 'prompt', 'completion', 'calls', 'runs')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+
+    def add(self, task: str, **amounts: int) -> None:
+        with self._lock:
+            totals = self._totals[task]
+            for field, amount in amounts.items():
+                totals[field] += amount
+
+    def record_context(self, task: str, before: Optional[str], after: Optional[str]) -> None:
+        self.add(task, context_in=estimate_tokens(before), context_out=estimate_tokens(after), runs=1)
+
+    def record_call(self, task: str, messages, response) -> tuple:
+        """Records one LLM call; returns its (prompt, completion) token estimates."""
+        prompt = messages if isinstance(messages, str) else "".join(
+            str(message.get('content') or '') for message in messages)
+        prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(str(response or ""))
+        self.add(task, prompt=prompt_tokens, completion=completion_tokens, calls=1)
+        return prompt_tokens, completion_tokens
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {task: dict(totals) for task, totals in self._totals.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+
+# Shared instance
+token_ledger = TokenLedger()
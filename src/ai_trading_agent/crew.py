@@ -1,46 +1,196 @@
-from crewai import Agent, Crew, Process, Task, LLM
+from crewai import Agent, Crew, Process, Task
+from crewai.agents.cache.cache_handler import CacheHandler
 from crewai.project import CrewBase, agent, crew, task
-from crewai_tools import SerperDevTool
-from typing import List
+from crewai.tasks.task_output import TaskOutput
+from pydantic import Field
+from typing import Any, Callable, List, Optional
+import copy
+import functools
+import importlib
 import os
+import threading
 from dotenv import load_dotenv
-from .tools.stocktwits_sentiment_tool import StockTwitsSentimentTool
+from .compaction import compact_context, token_ledger
+from .telemetry import telemetry
+from .models import TradingDecision
 
 
-# Import custom tools
-from .tools.financial_tools import (
-    StockDataTool,
-    TechnicalIndicatorsTool,
-    FinancialNewsTool,
-    FundamentalAnalysisTool,
-    PortfolioRiskTool
-)
-
 load_dotenv()
 
+# Execution modes:
+# - "sequential": every task waits for the one before it (original behaviour)
+# - "parallel":   tasks without upstream inputs run concurrently and the
+#                 downstream tasks wait only on the tasks listed below
+EXECUTION_MODES = ("sequential", "parallel")
+
+# Real data dependencies between tasks (used by the parallel mode).
+# Tasks that are not a key here have no upstream inputs.
+TASK_DEPENDENCIES = {
+    'assess_risk': [
+        'gather_market_data',
+        'perform_technical_analysis',
+        'analyze_fundamentals',
+        'analyze_news_sentiment',
+    ],
+    'optimize_portfolio_allocation': [
+        'gather_market_data',
+        'analyze_fundamentals',
+        'assess_risk',
+    ],
+    'make_trading_decision': [
+        'gather_market_data',
+        'perform_technical_analysis',
+        'analyze_fundamentals',
+        'analyze_news_sentiment',
+        'analyze_social_sentiment',
+        'assess_risk',
+        'optimize_portfolio_allocation',
+    ],
+}
+
+
+class _Shared:
+    """
+    Class attribute built on first access and then shared by every crew.
+    Keeps the LLM and the tools (and yfinance, pandas and crewai_tools behind
+    them) out of the import of this module.
+    """
+
+    def __init__(self, build: Callable[[], Any]):
+        self.build = build
+        self._value = None
+        self._lock = threading.Lock()
+
+    def __get__(self, instance, owner=None):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self.build()
+        return self._value
+
+
+def _shared_tool(module: str, name: str) -> _Shared:
+    """Shared instance of tool class `name`, imported from `module` (relative to this package) on first use."""
+    return _Shared(lambda: getattr(importlib.import_module(module, __package__), name)())
+
+
+def _trading_llm():
+    from .llm import TradingLLM
+    # Initialize DeepSeek Chimera R1T
+    return TradingLLM(
+        model="cerebras/llama-3.3-70b",
+        api_key=os.getenv("CEREBRAS_API_KEY"),
+        base_url="https://api.cerebras.ai/v1", # Optional but safe to add
+        temperature=0.7
+    )
+
+
+class CrewTask(Task):
+    """
+    Task whose asynchronous execution reports failures to the crew.
+    The stock Task leaves its Future unresolved when the worker thread raises,
+    which would block a parallel crew forever.
+
+    Structured outputs that carry a Markdown `report` write that report to
+    `output_file` instead of the JSON dump.
+
+    With a `checkpoint` (see checkpoints.py) the output is saved as soon as
+    the task completes, and a task that already completed in an interrupted
+    run is restored from it instead of being executed again.
+
+    The upstream outputs a task receives as context are compacted to fit
+    CONTEXT_TOKEN_BUDGET (see compaction.py) before the agent sees them.
+
+    With `progress` (see streaming.py) the task reports when it starts and
+    its output as soon as it completes, while the rest of the crew runs on.
+    """
+
+    checkpoint: Optional[Any] = Field(default=None, exclude=True)
+    progress: Optional[Any] = Field(default=None, exclude=True)
+
+    def _execute_task_async(self, agent, context, tools, future):
+        try:
+            future.set_result(self._execute_core(agent, context, tools))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _execute_core(self, agent, context, tools):
+        progress = self.progress
+        if progress is not None:
+            progress.task_started(self)
+        output = self._run_or_restore(agent, context, tools)
+        if progress is not None:
+            progress.task_finished(self, output)
+        return output
+
+    def _run_or_restore(self, agent, context, tools):
+        if self.checkpoint is not None:
+            saved = self.checkpoint.task_output(self.name)
+            if saved is not None:
+                return self._restore(agent or self.agent, saved)
+        compacted = compact_context(context)
+        token_ledger.record_context(self.name, context, compacted)
+        with telemetry.span('task', self.name):
+            output = super()._execute_core(agent, compacted, tools)
+        if self.checkpoint is None:
+            return output
+        self.checkpoint.save_task(self.name, {
+            'raw': output.raw,
+            'pydantic': output.pydantic.model_dump() if output.pydantic else None,
+            'json_dict': output.json_dict,
+        })
+        return output
+
+    def _restore(self, agent, saved):
+        """Rebuilds a checkpointed output without calling the agent or its tools."""
+        pydantic_output = self.output_pydantic.model_validate(saved['pydantic']) if saved['pydantic'] else None
+        self.agent = agent
+        self.output = TaskOutput(
+            name=self.name or self.description,
+            description=self.description,
+            expected_output=self.expected_output,
+            raw=saved['raw'],
+            pydantic=pydantic_output,
+            json_dict=saved['json_dict'],
+            agent=agent.role,
+            output_format=self._get_output_format(),
+        )
+        if self.output_file:
+            self._save_file(saved['raw'])
+        print(f"♻️ Restored '{self.name}' for {self.checkpoint.ticker} from the checkpoint")
+        return self.output
+
+    def _save_file(self, result):
+        report = getattr(self.output.pydantic, 'report', None) if self.output else None
+        super()._save_file(report or result)
+
+
 @CrewBase
 class AiTradingAgent():
     """Advanced AI Trading Agent Crew"""
     
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
+
+    def __init__(self, execution_mode: str = "sequential", checkpoint=None):
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{execution_mode}' (expected one of {EXECUTION_MODES})")
+        self.execution_mode = execution_mode
+        self.checkpoint = checkpoint  # checkpoints.TickerCheckpoint of the ticker this crew analyzes
     
-    # Initialize DeepSeek Chimera R1T
-    llm = LLM(
-        model="cerebras/llama-3.3-70b", 
-        api_key=os.getenv("CEREBRAS_API_KEY"),
-        base_url="https://api.cerebras.ai/v1", # Optional but safe to add
-        temperature=0.7
-    )
+    # LLM and tools are built on first use and shared by every crew
+    llm = _Shared(_trading_llm)
     
     # Initialize tools
-    stock_data_tool = StockDataTool()
-    technical_indicators_tool = TechnicalIndicatorsTool()
-    financial_news_tool = FinancialNewsTool()
-    fundamental_analysis_tool = FundamentalAnalysisTool()
-    portfolio_risk_tool = PortfolioRiskTool()
-    serper_tool = SerperDevTool()
-    stocktwits_sentiment_tool = StockTwitsSentimentTool()
+    stock_data_tool = _shared_tool('.tools.financial_tools', 'StockDataTool')
+    technical_indicators_tool = _shared_tool('.tools.financial_tools', 'TechnicalIndicatorsTool')
+    financial_news_tool = _shared_tool('.tools.financial_tools', 'FinancialNewsTool')
+    fundamental_analysis_tool = _shared_tool('.tools.financial_tools', 'FundamentalAnalysisTool')
+    portfolio_risk_tool = _shared_tool('.tools.financial_tools', 'PortfolioRiskTool')
+    portfolio_correlation_tool = _shared_tool('.tools.financial_tools', 'PortfolioCorrelationTool')
+    portfolio_optimizer_tool = _shared_tool('.tools.financial_tools', 'PortfolioOptimizerTool')
+    serper_tool = _shared_tool('crewai_tools', 'SerperDevTool')
+    stocktwits_sentiment_tool = _shared_tool('.tools.stocktwits_sentiment_tool', 'StockTwitsSentimentTool')
 
     
     @agent
@@ -102,7 +252,8 @@ class AiTradingAgent():
     def portfolio_strategist(self) -> Agent:
         return Agent(
             config=self.agents_config['portfolio_strategist'],
-            tools=[self.portfolio_risk_tool, self.stock_data_tool],
+            tools=[self.portfolio_risk_tool, self.portfolio_optimizer_tool, self.portfolio_correlation_tool,
+                   self.stock_data_tool],
             llm=self.llm,
             verbose=True
         )
@@ -119,56 +270,73 @@ class AiTradingAgent():
     # Tasks
     @task
     def gather_market_data(self) -> Task:
-        return Task(
+        return CrewTask(
             config=self.tasks_config['gather_market_data']
         )
     
     @task
     def perform_technical_analysis(self) -> Task:
-        return Task(
+        return CrewTask(
             config=self.tasks_config['perform_technical_analysis']
         )
     
     @task
     def analyze_fundamentals(self) -> Task:
-        return Task(
+        return CrewTask(
             config=self.tasks_config['analyze_fundamentals']
         )
     
     @task
     def analyze_news_sentiment(self) -> Task:
-        return Task(
+        return CrewTask(
             config=self.tasks_config['analyze_news_sentiment']
         )
     
     @task
     def analyze_social_sentiment(self) -> Task:
-        return Task(
+        return CrewTask(
             config=self.tasks_config['analyze_social_sentiment']
         )
 
     @task
     def assess_risk(self) -> Task:
-        return Task(
+        return CrewTask(
             config=self.tasks_config['assess_risk']
         )
     
     @task
     def optimize_portfolio_allocation(self) -> Task:
-        return Task(
+        return CrewTask(
             config=self.tasks_config['optimize_portfolio_allocation']
         )
     
     @task
     def make_trading_decision(self) -> Task:
-        return Task(
-            config=self.tasks_config['make_trading_decision']
+        return CrewTask(
+            config=self.tasks_config['make_trading_decision'],
+            output_pydantic=TradingDecision
         )
     
+    def _wire_task_dependencies(self):
+        """Marks independent tasks as async and restricts each downstream task to its real inputs."""
+        for task_name in self.__crew_metadata__["original_tasks"]:
+            task = getattr(self, task_name)()
+            if task_name in TASK_DEPENDENCIES:
+                task.async_execution = False
+                task.context = [getattr(self, dep)() for dep in TASK_DEPENDENCIES[task_name]]
+            else:
+                task.async_execution = True
+                task.context = []
+
     @crew
     def crew(self) -> Crew:
         """Creates the AI Trading Agent crew"""
-        return Crew(
+        if self.execution_mode == "parallel":
+            self._wire_task_dependencies()
+        
+        # Independent tasks are declared first, so in parallel mode they are all
+        # in flight before the first dependent task (assess_risk) blocks on them
+        trading_crew = Crew(
             agents=self.agents,
             tasks=self.tasks,
             process=Process.sequential,
@@ -181,3 +349,39 @@ class AiTradingAgent():
             #     }
             # }
         )
+        if self.checkpoint is not None:
+            prepare_run(trading_crew, self.checkpoint)
+        return trading_crew
+
+
+def prepare_run(trading_crew: Crew, checkpoint=None, progress=None) -> Crew:
+    """
+    Readies a built crew for its next kickoff: every agent gets an empty tool
+    cache, or the ticker's checkpoint (which is also the tool cache, so tool
+    outputs persist with the tasks), and every task reports to `progress`.
+    """
+    cache_handler = checkpoint if checkpoint is not None else CacheHandler()
+    for task_instance in trading_crew.tasks:
+        task_instance.checkpoint = checkpoint
+        task_instance.progress = progress
+    for agent_instance in trading_crew.agents:
+        agent_instance.set_cache_handler(cache_handler)
+    return trading_crew
+
+
+def _load_yaml(config_path) -> dict:
+    """crewAI's load_yaml, parsing each file once per modification."""
+    path = os.fspath(config_path)
+    return copy.deepcopy(_parse_yaml(path, os.stat(path).st_mtime_ns))
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_yaml(path: str, mtime_ns: int) -> dict:
+    return _crewai_load_yaml(path)
+
+
+# Agent and task configs are parsed once instead of for every crew (CrewBase
+# installs its own loader on the class, so it is replaced afterwards); every
+# crew still gets its own copy, since crewAI resolves tools and LLMs in place
+_crewai_load_yaml = AiTradingAgent.load_yaml
+AiTradingAgent.load_yaml = staticmethod(_load_yaml)
@@ -0,0 +1,88 @@
+"""
+Warm crews, reused between runs.
+
+Building a crew reads the agent and task configs and validates eight agents
+and eight tasks. The pool keeps finished crews per execution mode and hands
+them out again, so a run only changes its inputs. The LLM, the tools and the
+HTTP sessions behind them are shared by every crew anyway (see crew.py). A
+checked-out crew gets an empty tool cache, or the ticker's checkpoint, so no
+tool output carries over from a previous run.
+
+A crew is used by one run at a time. One that raised is dropped instead of
+being returned, since its tasks may be half-way through.
+"""
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+from crewai import Crew
+
+from .crew import EXECUTION_MODES, AiTradingAgent, prepare_run
+
+CREW_POOL_MAX_IDLE = int(os.getenv("CREW_POOL_MAX_IDLE", "16"))  # idle crews kept per execution mode
+
+
+class CrewPool:
+    """Idle crews per execution mode."""
+
+    def __init__(self, max_idle: int = CREW_POOL_MAX_IDLE):
+        self.max_idle = max_idle
+        self._idle: Dict[str, List[Crew]] = defaultdict(list)
+        self._lock = threading.Lock()
+        self.built = 0
+        self.reused = 0
+
+    @staticmethod
+    def _build(execution_mode: str) -> Crew:
+        return AiTradingAgent(execution_mode=execution_mode).crew()
+
+    def acquire(self, execution_mode: str = "sequential", checkpoint=None, progress=None) -> Crew:
+        """An idle crew (a new one if there is none), ready for a run with `checkpoint` and `progress`."""
+        with self._lock:
+            idle = self._idle[execution_mode]
+            trading_crew = idle.pop() if idle else None
+            if trading_crew is None:
+                self.built += 1
+            else:
+                self.reused += 1
+        if trading_crew is None:
+            trading_crew = self._build(execution_mode)
+        return prepare_run(trading_crew, checkpoint, progress)
+
+    def release(self, trading_crew: Crew, execution_mode: str) -> None:
+        """Returns a crew whose run finished, detached from that run's checkpoint and progress."""
+        prepare_run(trading_crew)
+        with self._lock:
+            idle = self._idle[execution_mode]
+            if len(idle) < self.max_idle:
+                idle.append(trading_crew)
+
+    @contextmanager
+    def crew(self, execution_mode: str = "sequential", checkpoint=None, progress=None):
+        """Checks a crew out for the block and back in if the block did not raise."""
+        trading_crew = self.acquire(execution_mode, checkpoint, progress)
+        yield trading_crew
+        self.release(trading_crew, execution_mode)
+
+    def prime(self, modes: Iterable[str] = EXECUTION_MODES, count: int = 1) -> None:
+        """Builds crews ahead of the first run (and with them the shared LLM and tools)."""
+        for execution_mode in modes:
+            with self._lock:
+                missing = min(count, self.max_idle) - len(self._idle[execution_mode])
+            for _ in range(missing):
+                self.release(self._build(execution_mode), execution_mode)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'built': self.built, 'reused': self.reused,
+                    'idle': {mode: len(crews) for mode, crews in self._idle.items()}}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.built = self.reused = 0
+
+
+# Shared instance
+crew_pool = CrewPool()
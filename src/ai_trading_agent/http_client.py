@@ -0,0 +1,153 @@
+"""
+Shared HTTP layer for the external REST APIs (Serper, StockTwits).
+
+One pooled, keep-alive client per process, plus one async client per event
+loop for batch fetches. HTTP/2 is used when the `h2` package is installed.
+Every request has a timeout; connection errors and 5xx responses are
+retried. A 429 is raised as RateLimited, so the provider's token bucket
+backs off as it does for every other API.
+"""
+import asyncio
+import os
+import threading
+import time
+import weakref
+from typing import Any, Optional
+
+import httpx
+
+from .rate_limiter import RateLimited, rate_limiter, retry_after_seconds
+from .telemetry import telemetry
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))              # seconds per request
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))                 # on connection errors and 5xx
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+RETRY_BACKOFF_SECONDS = 0.5
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+
+class HttpClient:
+    """Pooled sync and async httpx clients behind the provider rate limits."""
+
+    def __init__(self, timeout: float = HTTP_TIMEOUT, retries: int = HTTP_RETRIES,
+                 max_connections: int = HTTP_MAX_CONNECTIONS, transport: Optional[httpx.BaseTransport] = None):
+        self.timeout = timeout
+        self.retries = retries
+        self.max_connections = max_connections
+        self.transport = transport  # swapped for a MockTransport by the offline benchmarks
+        self._client: Optional[httpx.Client] = None
+        self._async_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncClient
+        self._lock = threading.Lock()
+
+    def _options(self) -> dict:
+        options = dict(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections // 2),
+            follow_redirects=True,
+        )
+        if self.transport is not None:
+            options['transport'] = self.transport
+        else:
+            options['http2'] = HTTP2
+        return options
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(**self._options())
+            return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        """The AsyncClient of the running event loop (connections cannot cross loops)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_clients[loop] = httpx.AsyncClient(**self._options())
+            return client
+
+    @staticmethod
+    def _check(provider: str, response: httpx.Response) -> httpx.Response:
+        if response.status_code == 429:
+            raise RateLimited(provider, retry_after_seconds(response))
+        return response
+
+    def _retryable(self, attempt: int, response: Optional[httpx.Response] = None) -> bool:
+        return attempt < self.retries and (response is None or response.status_code >= 500)
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+    def request(self, provider: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Sends a request under `provider`'s rate limit; 4xx/5xx responses are returned, not raised."""
+        def send():
+            for attempt in range(self.retries + 1):
+                try:
+                    response = self.client.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    if not self._retryable(attempt):
+                        raise
+                else:
+                    telemetry.count(bytes=len(response.content))
+                    if not self._retryable(attempt, response):
+                        return self._check(provider, response)
+                telemetry.count(retries=1)
+                time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+        return rate_limiter.call(provider, send)
+
+    async def arequest(self, provider: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Async `request` on the event loop's pooled client."""
+        async def send():
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await self.async_client.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    if not self._retryable(attempt):
+                        raise
+                else:
+                    telemetry.count(bytes=len(response.content))
+                    if not self._retryable(attempt, response):
+                        return self._check(provider, response)
+                telemetry.count(retries=1)
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+        return await rate_limiter.acall(provider, send)
+
+    def get(self, provider: str, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request(provider, "GET", url, **kwargs)
+
+    def post(self, provider: str, url: str, **kwargs: Any) -> httpx.Response:
+        return self.request(provider, "POST", url, **kwargs)
+
+    async def aget(self, provider: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.arequest(provider, "GET", url, **kwargs)
+
+    async def apost(self, provider: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.arequest(provider, "POST", url, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def aclose(self) -> None:
+        """Closes the running loop's async client (call before the loop ends)."""
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+
+# Shared instance used by the news and social sentiment tools
+http_client = HttpClient()
@@ -0,0 +1,76 @@
+import threading
+
+from crewai import LLM
+
+from .compaction import token_ledger
+from .llm_cache import cache_key, llm_cache
+from .rate_limiter import rate_limiter
+from .streaming import stream_for
+from .telemetry import telemetry
+
+
+class TradingLLM(LLM):
+    """
+    crewAI LLM that routes every completion through the provider's rate
+    limiter, so parallel crews share one request budget and back off
+    together when the provider answers 429.
+
+    When LLM_CACHE_PATH is set, completions are also looked up in the
+    content-addressed response cache first, so replaying a batch with
+    identical prompts and tool outputs never reaches the provider.
+
+    Prompt and completion sizes are recorded per task in `token_ledger`, and
+    every call is a telemetry span of its agent.
+
+    Calls made for a task whose progress is being streamed (see streaming.py)
+    stream their completion, so the page shows the answer as it is written.
+    The LLM is shared by all crews, so this is decided per calling thread.
+    """
+
+    # Bucket in rate_limiter.PROVIDER_LIMITS that this model's calls draw from
+    rate_limit_provider = "cerebras"
+
+    _streaming = threading.local()
+
+    @property
+    def stream(self):
+        return self._stream or getattr(self._streaming, 'on', False)
+
+    @stream.setter
+    def stream(self, value):
+        self._stream = value
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None,
+             from_agent=None, response_model=None):
+        role = (getattr(from_agent, 'role', None) or 'unknown').strip()
+        streaming = self._streaming
+        was_on, streaming.on = getattr(streaming, 'on', False), stream_for(from_task) is not None
+        try:
+            with telemetry.span('agent', role, model=self.model) as span:
+                response = self._complete(messages, tools=tools, callbacks=callbacks,
+                                          available_functions=available_functions, from_task=from_task,
+                                          from_agent=from_agent, response_model=response_model)
+                prompt, completion = token_ledger.record_call(
+                    getattr(from_task, 'name', None) or 'unknown', messages, response)
+                span.prompt_tokens, span.completion_tokens = prompt, completion
+        finally:
+            streaming.on = was_on
+        return response
+
+    def _complete(self, messages, **kwargs):
+        # Native function calls execute tools inside the call, so only plain completions are cached
+        if llm_cache is None or kwargs['available_functions']:
+            return rate_limiter.call(self.rate_limit_provider, super().call, messages, **kwargs)
+
+        key = cache_key(self.model, self.temperature, messages, kwargs['tools'], kwargs['response_model'])
+        cached = llm_cache.get(key)
+        if cached is not None:
+            telemetry.count(cache_hits=1)
+            if self.stream:
+                self._emit_stream_chunk_event(cached, from_task=kwargs['from_task'], from_agent=kwargs['from_agent'])
+            return cached
+        telemetry.count(cache_misses=1)
+        response = rate_limiter.call(self.rate_limit_provider, super().call, messages, **kwargs)
+        if isinstance(response, str) and response.strip():
+            llm_cache.set(key, self.model, response)
+        return response
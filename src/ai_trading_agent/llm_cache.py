@@ -0,0 +1,113 @@
+"""
+Content-addressed cache of LLM completions, stored in SQLite.
+
+The key is a SHA-256 of the model, temperature, the fully rendered messages,
+the tool schemas and the response model, so a rerun whose prompts and tool
+outputs are identical is answered locally. Least recently used entries are
+evicted once the stored responses exceed the size budget.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")  # e.g. ".cache/llm.sqlite" - unset disables the cache
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+
+
+def cache_key(model: str, temperature: Optional[float], messages: Any, tools: Any = None,
+              response_model: Any = None) -> str:
+    """Stable fingerprint of everything that determines a completion."""
+    payload = {
+        'model': model,
+        'temperature': temperature,
+        'messages': messages,
+        'tools': tools,
+        'response_model': getattr(response_model, '__name__', response_model),
+    }
+    rendered = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(rendered.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed completion cache with size-based LRU eviction."""
+
+    def __init__(self, path: str, max_bytes: int = int(LLM_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL,"
+            " size INTEGER NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_last_used ON responses (last_used)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used rows until the budget fits again
+        freed = 0
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if total - freed <= self.max_bytes:
+                break
+            doomed.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+                'bytes': size,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+# Shared instance (None unless LLM_CACHE_PATH is set)
+llm_cache = LLMResponseCache(LLM_CACHE_PATH) if LLM_CACHE_PATH else None
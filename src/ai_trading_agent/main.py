@@ -1,7 +1,8 @@
 #!/usr/bin/env python
+import json
 import sys
 import warnings
-from ai_trading_agent.crew import AiTradingAgent
+from ai_trading_agent.warmup import crew_class, crew_pool, preload
 
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
@@ -9,6 +10,7 @@ def run():
     """
     Run the AI Trading Agent crew.
     """
+    preload()  # crewAI loads and a crew is built in the background while the inputs are typed
     print("=" * 80)
     print("🤖 AI TRADING AGENT - POWERED BY DEEPSEEK CHIMERA R1T")
     print("=" * 80)
@@ -18,11 +20,13 @@ def run():
     account_size = input("💰 Enter account size in USD (e.g., 10000): ")
     analysis_period = input("📅 Analysis period (1mo, 3mo, 6mo, 1y) [default: 3mo]: ") or "3mo"
     current_portfolio = input("📂 Current portfolio holdings (comma-separated, or press Enter for none): ") or "None"
+    execution_mode = input("⚡ Execution mode (sequential, parallel) [default: sequential]: ").strip().lower() or "sequential"
     
     print(f"\n🚀 Starting analysis for {stock_ticker}...")
     print(f"💵 Account Size: ${account_size}")
     print(f"📈 Analysis Period: {analysis_period}")
-    print(f"📊 Current Portfolio: {current_portfolio}\n")
+    print(f"📊 Current Portfolio: {current_portfolio}")
+    print(f"⚡ Execution Mode: {execution_mode}\n")
     
     inputs = {
         'stock_ticker': stock_ticker,
@@ -32,7 +36,8 @@ def run():
     }
     
     try:
-        result = AiTradingAgent().crew().kickoff(inputs=inputs)
+        with crew_pool().crew(execution_mode) as crew:
+            result = crew.kickoff(inputs=inputs)
         
         print("\n" + "=" * 80)
         print("✅ ANALYSIS COMPLETE")
@@ -56,6 +61,7 @@ def train():
         'current_portfolio': 'None'
     }
     try:
+        AiTradingAgent = crew_class()
         AiTradingAgent().crew().train(
             n_iterations=int(sys.argv[1]), 
             filename=sys.argv[2], 
@@ -69,6 +75,7 @@ def replay():
     Replay the crew execution from a specific task.
     """
     try:
+        AiTradingAgent = crew_class()
         AiTradingAgent().crew().replay(task_id=sys.argv[1])
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
@@ -84,6 +91,7 @@ def test():
         'current_portfolio': 'AAPL:30%, GOOGL:25%'
     }
     try:
+        AiTradingAgent = crew_class()
         AiTradingAgent().crew().test(
             n_iterations=int(sys.argv[1]), 
             openai_model_name=sys.argv[2], 
@@ -92,5 +100,36 @@ def test():
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
 
+def run_with_trigger():
+    """
+    Run the crew from a trigger payload (a scheduler, webhook or CrewAI trigger), e.g.
+    run_with_trigger '{"stock_ticker": "NVDA", "reason": "price +4.2%"}'
+    """
+    if len(sys.argv) < 2:
+        raise Exception("No trigger payload provided. Please provide JSON payload as argument.")
+
+    try:
+        trigger_payload = json.loads(sys.argv[1])
+    except json.JSONDecodeError:
+        raise Exception("Invalid JSON payload provided as argument")
+
+    if not trigger_payload.get('stock_ticker'):
+        raise Exception("Trigger payload must contain a stock_ticker")
+
+    inputs = {
+        'stock_ticker': str(trigger_payload['stock_ticker']).upper(),
+        'account_size': str(trigger_payload.get('account_size', '10000')),
+        'analysis_period': trigger_payload.get('analysis_period', '3mo'),
+        'current_portfolio': trigger_payload.get('current_portfolio', 'None'),
+        'crewai_trigger_payload': trigger_payload
+    }
+    execution_mode = trigger_payload.get('execution_mode', 'sequential')
+
+    try:
+        AiTradingAgent = crew_class()
+        return AiTradingAgent(execution_mode=execution_mode).crew().kickoff(inputs=inputs)
+    except Exception as e:
+        raise Exception(f"An error occurred while running the crew with trigger: {e}")
+
 if __name__ == "__main__":
     run()
@@ -0,0 +1,24 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class TradingDecision(BaseModel):
+    """Structured output of the `make_trading_decision` task."""
+
+    ticker: str = Field(description="Stock ticker symbol the decision is for")
+    decision: Literal["BUY", "SELL", "HOLD"] = Field(description="Final trading decision")
+    entry_price: Optional[float] = Field(default=None, description="Entry price in USD (null for HOLD)")
+    stop_loss: Optional[float] = Field(default=None, description="Stop-loss price in USD")
+    take_profit_1: Optional[float] = Field(default=None, description="First take-profit target in USD")
+    take_profit_2: Optional[float] = Field(default=None, description="Second take-profit target in USD")
+    take_profit_3: Optional[float] = Field(default=None, description="Third take-profit target in USD")
+    position_size: Optional[str] = Field(default=None, description="Position size, e.g. '120 shares ($21,000)'")
+    holding_period: Optional[str] = Field(default=None, description="Expected holding period, e.g. '2-4 weeks'")
+    confidence: Literal["High", "Medium", "Low"] = Field(description="Confidence level in the decision")
+    rationale: str = Field(description="2-3 paragraph synthesis of the analysis explaining the decision")
+    report: str = Field(description="The complete decision report in Markdown")
+
+    def __str__(self) -> str:
+        # Printing a crew result shows the human-readable report, as before
+        return self.report
@@ -0,0 +1,278 @@
+"""
+Per-provider rate limiting with automatic backoff on HTTP 429, plus an
+adaptive concurrency controller for the batch runner.
+
+Every outbound call (Cerebras LLM, Alpha Vantage, Serper, StockTwits, Yahoo)
+takes a token from its provider's bucket first. A throttled response halves
+that provider's refill rate and backs off exponentially; successful calls
+slowly restore it (AIMD). The controller raises the number of concurrent
+crews while every provider has headroom and cuts it back on throttling.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+from .telemetry import telemetry
+
+# Default limits as (requests, per_seconds). Override with e.g. RATE_LIMIT_CEREBRAS=60/60
+PROVIDER_LIMITS = {
+    'cerebras': (30, 60.0),        # free tier: 30 requests/minute
+    'alpha_vantage': (5, 60.0),    # free tier: 5 requests/minute
+    'serper': (5, 1.0),
+    'stocktwits': (200, 3600.0),   # unauthenticated: 200 requests/hour
+    'yahoo': (2, 1.0),             # unofficial API, be polite
+}
+
+MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+BASE_BACKOFF_SECONDS = 2.0
+MAX_BACKOFF_SECONDS = 120.0
+
+
+class RateLimited(Exception):
+    """Raised by a provider call that received HTTP 429 (or an equivalent signal)."""
+
+    def __init__(self, provider: str, retry_after: Optional[float] = None):
+        super().__init__(f"{provider} rate limit exceeded")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Seconds from an HTTP response's Retry-After header, if the provider sent a numeric one."""
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+# Throttling notes of providers that answer 200 (Alpha Vantage) or raise untyped errors
+RATE_LIMIT_MESSAGES = ('too many requests', 'rate limit', 'call frequency')
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Recognises throttling from requests/httpx (status 429), litellm and
+    yfinance (their RateLimitError types) and Alpha Vantage (its rate-limit
+    note). A bare "429" in a message is not enough: tickers, prices and row
+    counts contain it too.
+    """
+    if isinstance(error, RateLimited):
+        return True
+    if 'ratelimit' in type(error).__name__.lower():
+        return True
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return any(note in message for note in RATE_LIMIT_MESSAGES)
+
+
+def _limits_from_env(provider: str, default: tuple) -> tuple:
+    value = os.getenv(f"RATE_LIMIT_{provider.upper()}")
+    if not value:
+        return default
+    requests, _, per = value.partition('/')
+    return int(requests), float(per or 1)
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate adapts to throttling (AIMD)."""
+
+    def __init__(self, requests: int, per_seconds: float):
+        self.capacity = max(1, requests)
+        self.base_rate = requests / per_seconds
+        self.rate = self.base_rate
+        self.tokens = float(self.capacity)
+        self.blocked_until = 0.0
+        self.throttle_count = 0
+        self.last_throttle = -MAX_BACKOFF_SECONDS
+        self._streak = 0  # consecutive throttles, drives the exponential backoff
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Takes a token and returns how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            return max(wait, self.blocked_until - now)
+
+    def on_success(self) -> None:
+        with self._lock:
+            # Additive increase: recover ~5% of the base rate per good call
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.05)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> float:
+        """Halves the rate, blocks the bucket and returns the backoff to apply."""
+        with self._lock:
+            now = time.monotonic()
+            self.throttle_count += 1
+            recent = now - self.last_throttle < MAX_BACKOFF_SECONDS
+            self.last_throttle = now
+            self.rate = max(self.base_rate / 64, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            self._streak = self._streak + 1 if recent else 1
+            backoff = retry_after or min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** (self._streak - 1))
+            backoff *= 1 + random.random() * 0.25  # jitter so parallel crews don't retry in lockstep
+            self.blocked_until = max(self.blocked_until, now + backoff)
+            return backoff
+
+    def scale(self, fraction: float) -> None:
+        """Keeps `fraction` of the budget (the rest belongs to other processes)."""
+        with self._lock:
+            self.base_rate *= fraction
+            self.rate *= fraction
+            self.capacity = max(1, int(self.capacity * fraction))
+            self.tokens = min(self.tokens, float(self.capacity))
+
+    def headroom(self) -> float:
+        """Fraction of the burst capacity currently available (0.0 - 1.0)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.rate < self.base_rate:
+                return 0.0
+            return max(0.0, self.tokens) / self.capacity
+
+
+class RateLimiter:
+    """Registry of per-provider token buckets."""
+
+    def __init__(self, limits: Optional[dict] = None):
+        limits = limits or PROVIDER_LIMITS
+        self.buckets = {name: TokenBucket(*_limits_from_env(name, limit)) for name, limit in limits.items()}
+
+    def bucket(self, provider: str) -> TokenBucket:
+        if provider not in self.buckets:
+            self.buckets[provider] = TokenBucket(5, 1.0)
+        return self.buckets[provider]
+
+    def share(self, fraction: float) -> None:
+        """Scales every provider's budget, e.g. to 1/N in each of N worker processes."""
+        for bucket in self.buckets.values():
+            bucket.scale(fraction)
+
+    def acquire(self, provider: str) -> None:
+        """Blocks until the provider's bucket allows another request."""
+        wait = self.bucket(provider).reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def call(self, provider: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs `fn` under the provider's rate limit, retrying 429s with exponential backoff."""
+        bucket = self.bucket(provider)
+        with telemetry.span('provider', provider):
+            for attempt in range(MAX_RETRIES + 1):
+                self.acquire(provider)
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == MAX_RETRIES:
+                        raise
+                    backoff = bucket.on_throttle(getattr(e, 'retry_after', None))
+                    telemetry.count(retries=1)
+                    print(f"⏳ {provider} rate limited - backing off {backoff:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})")
+                    continue
+                bucket.on_success()
+                return result
+
+    async def acall(self, provider: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Async `call`: awaits `fn` under the provider's rate limit without blocking the event loop."""
+        bucket = self.bucket(provider)
+        with telemetry.span('provider', provider):
+            for attempt in range(MAX_RETRIES + 1):
+                wait = bucket.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception as e:
+                    if not is_rate_limit_error(e) or attempt == MAX_RETRIES:
+                        raise
+                    backoff = bucket.on_throttle(getattr(e, 'retry_after', None))
+                    telemetry.count(retries=1)
+                    print(f"⏳ {provider} rate limited - backing off {backoff:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})")
+                    continue
+                bucket.on_success()
+                return result
+
+    def healthy(self, window: float = 60.0) -> bool:
+        """True if no provider was throttled within `window` seconds and all have spare tokens."""
+        now = time.monotonic()
+        return all(
+            now - bucket.last_throttle > window and bucket.headroom() >= 0.25
+            for bucket in self.buckets.values()
+        )
+
+    def throttle_count(self) -> int:
+        return sum(bucket.throttle_count for bucket in self.buckets.values())
+
+
+class ConcurrencyController:
+    """
+    Asyncio limiter whose slot count follows provider health: one more
+    concurrent crew per `increase_interval` while every provider has
+    headroom, half as many as soon as any provider is throttled.
+    """
+
+    def __init__(self, limiter: RateLimiter, min_concurrency: int = 1, max_concurrency: int = 16,
+                 increase_interval: float = 20.0):
+        self.limiter = limiter
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.increase_interval = increase_interval
+        self.limit = min_concurrency
+        self.active = 0
+        self.peak = 0
+        self._seen_throttles = limiter.throttle_count()
+        self._last_change = time.monotonic()
+        self._condition = asyncio.Condition()
+
+    def _adjust(self) -> None:
+        now = time.monotonic()
+        throttles = self.limiter.throttle_count()
+        if throttles > self._seen_throttles:
+            self._seen_throttles = throttles
+            new_limit = max(self.min_concurrency, self.limit // 2)
+        elif now - self._last_change >= self.increase_interval and self.limiter.healthy():
+            new_limit = min(self.max_concurrency, self.limit + 1)
+        else:
+            return
+        if new_limit != self.limit:
+            print(f"🎛️ Concurrency {self.limit} → {new_limit}")
+            self.limit = new_limit
+        self._last_change = now
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._condition:
+            while True:
+                self._adjust()
+                if self.active < self.limit:
+                    break
+                try:
+                    await asyncio.wait_for(self._condition.wait(), timeout=self.increase_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.active -= 1
+                self._adjust()
+                self._condition.notify_all()
+
+
+# Shared instance used by the LLM wrapper, the tools and the batch runner
+rate_limiter = RateLimiter()
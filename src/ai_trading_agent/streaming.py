@@ -0,0 +1,121 @@
+"""
+Live progress of a crew run, for pages that render it while the crew works.
+
+A CrewStream runs the crew on a background thread and queues what happens:
+- started: a task began (its agent is now working on it)
+- token: a piece of the agent's answer, as the provider streams it
+- finished: a task completed, with its TaskOutput
+- done / failed: the run ended, with the CrewOutput or the exception
+
+Tasks report their start and output through `CrewTask.progress` (see
+crew.py). Tokens come from crewAI's LLMStreamChunkEvent: while a task of a
+stream is running, TradingLLM asks the provider for a streamed completion,
+and every chunk is routed to the stream that owns the task. Completions
+served from the LLM cache arrive as a single chunk.
+"""
+import queue
+import threading
+from typing import Any, Dict, Iterator, NamedTuple, Optional
+
+from crewai.events import crewai_event_bus
+from crewai.events.types.llm_events import LLMCallType, LLMStreamChunkEvent
+
+POLL_SECONDS = 0.1
+
+# Running task id -> the stream it reports to
+_streams: Dict[str, "CrewStream"] = {}
+_lock = threading.Lock()
+
+
+class StreamEvent(NamedTuple):
+    kind: str                 # started, token, finished, done, failed
+    task: str = ""            # task name
+    agent: str = ""           # agent role
+    text: str = ""            # token text, or the error message
+    output: Any = None        # TaskOutput (finished) or CrewOutput (done)
+
+
+def stream_for(task) -> Optional["CrewStream"]:
+    """The stream `task` is currently reporting to, if any."""
+    if task is None:
+        return None
+    with _lock:
+        return _streams.get(str(task.id))
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _on_chunk(source, event: LLMStreamChunkEvent):
+    if event.call_type == LLMCallType.TOOL_CALL or not event.task_id:
+        return
+    with _lock:
+        stream = _streams.get(event.task_id)
+    if stream is not None:
+        stream.put('token', event.task_name or "", (event.agent_role or "").strip(), event.chunk)
+
+
+def _label(task):
+    agent = getattr(task, 'agent', None)
+    return task.name or "", (getattr(agent, 'role', None) or "").strip()
+
+
+class CrewStream:
+    """One crew run on a background thread and the queue of its progress events."""
+
+    def __init__(self):
+        self.events: "queue.Queue[StreamEvent]" = queue.Queue()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def put(self, kind: str, task: str = "", agent: str = "", text: str = "", output: Any = None) -> None:
+        self.events.put(StreamEvent(kind, task, agent, text, output))
+
+    # ------------------------------------------------------------------
+    # CrewTask.progress
+    # ------------------------------------------------------------------
+    def task_started(self, task) -> None:
+        with _lock:
+            _streams[str(task.id)] = self
+        self.put('started', *_label(task))
+
+    def task_finished(self, task, output) -> None:
+        with _lock:
+            _streams.pop(str(task.id), None)
+        self.put('finished', *_label(task), output=output)
+
+    # ------------------------------------------------------------------
+    # Running
+    # ------------------------------------------------------------------
+    def start(self, pool, execution_mode: str, inputs: dict, checkpoint=None) -> "CrewStream":
+        """Kicks off a crew from `pool` (see crew_pool.py) on a daemon thread; returns immediately."""
+        self.thread = threading.Thread(target=self._run, args=(pool, execution_mode, inputs, checkpoint),
+                                       name="crew-stream", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self, pool, execution_mode, inputs, checkpoint):
+        try:
+            with pool.crew(execution_mode, checkpoint, progress=self) as trading_crew:
+                self.result = trading_crew.kickoff(inputs=inputs)
+        except Exception as e:
+            self.error = e
+            self.put('failed', text=f"{type(e).__name__}: {e}")
+        else:
+            self.put('done', output=self.result)
+        finally:
+            with _lock:
+                for task_id in [task_id for task_id, stream in _streams.items() if stream is self]:
+                    del _streams[task_id]
+
+    def __iter__(self) -> Iterator[StreamEvent]:
+        """Events as they arrive, until (and including) done or failed."""
+        while True:
+            try:
+                event = self.events.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if self.thread is not None and not self.thread.is_alive() and self.events.empty():
+                    return
+                continue
+            yield event
+            if event.kind in ('done', 'failed'):
+                return
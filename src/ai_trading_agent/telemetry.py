@@ -0,0 +1,198 @@
+"""
+Latency, retry, byte, token and cache-hit instrumentation of crew runs.
+
+Work is recorded as nested spans of four kinds:
+- task: one crew task, LLM calls and tools included
+- agent: one LLM call, keyed by the agent's role
+- tool: one tool `_run`
+- provider: one rate-limited call to an external API
+
+Counters raised inside a span (retries, bytes fetched, cache hits and
+misses) are credited to every open span of the thread, so a StockTwits retry
+shows up on both the StockTwitsSentimentTool and the stocktwits provider.
+
+Every finished span is written as one JSON line to TELEMETRY_LOG (and to the
+"ai_trading_agent.telemetry" logger). Totals are served in the Prometheus
+text format on METRICS_PORT, and summarized at the end of
+main_scalable.run_batch.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+TELEMETRY_LOG = os.getenv("TELEMETRY_LOG", "")          # JSON-lines span log, e.g. "logs/telemetry.jsonl"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))      # 0 disables the /metrics endpoint
+
+KINDS = ('task', 'agent', 'tool', 'provider')
+COUNTERS = ('retries', 'bytes', 'prompt_tokens', 'completion_tokens', 'cache_hits', 'cache_misses')
+
+logger = logging.getLogger("ai_trading_agent.telemetry")
+
+_open_spans: contextvars.ContextVar[Tuple["Span", ...]] = contextvars.ContextVar("telemetry_spans", default=())
+
+
+class Span:
+    """One timed unit of work and the counters raised while it ran."""
+
+    __slots__ = ('kind', 'name', 'attrs', 'started', 'seconds', 'error') + COUNTERS
+
+    def __init__(self, kind: str, name: str, **attrs):
+        self.kind, self.name, self.attrs = kind, name, attrs
+        self.started = time.time()
+        self.seconds = 0.0
+        self.error: Optional[str] = None
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+
+    def as_dict(self) -> dict:
+        record = {'kind': self.kind, 'name': self.name, 'started': round(self.started, 3),
+                  'seconds': round(self.seconds, 4), 'error': self.error}
+        record.update((counter, getattr(self, counter)) for counter in COUNTERS if getattr(self, counter))
+        record.update(self.attrs)
+        return record
+
+
+class Telemetry:
+    """Thread-safe span totals per (kind, name), with JSON-lines export and a metrics endpoint."""
+
+    def __init__(self, log_path: str = TELEMETRY_LOG):
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(self._empty)
+        self._server: Optional[ThreadingHTTPServer] = None
+        if log_path:
+            directory = os.path.dirname(log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = logging.FileHandler(log_path)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+
+    @staticmethod
+    def _empty() -> Dict[str, float]:
+        return dict(calls=0, errors=0, seconds=0.0, max_seconds=0.0, **dict.fromkeys(COUNTERS, 0))
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    @contextmanager
+    def span(self, kind: str, name: str, **attrs):
+        """Times the block as a `kind` span; yields the Span so callers can set its counters."""
+        span = Span(kind, name, **attrs)
+        token = _open_spans.set(_open_spans.get() + (span,))
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.seconds = time.perf_counter() - started
+            _open_spans.reset(token)
+            self._record(span)
+
+    @staticmethod
+    def count(**amounts: int) -> None:
+        """Adds counters (e.g. retries=1, bytes=512) to every open span of this thread."""
+        for span in _open_spans.get():
+            for counter, amount in amounts.items():
+                setattr(span, counter, getattr(span, counter) + amount)
+
+    def _record(self, span: Span) -> None:
+        with self._lock:
+            totals = self._totals[(span.kind, span.name)]
+            totals['calls'] += 1
+            totals['errors'] += span.error is not None
+            totals['seconds'] += span.seconds
+            totals['max_seconds'] = max(totals['max_seconds'], span.seconds)
+            for counter in COUNTERS:
+                totals[counter] += getattr(span, counter)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(span.as_dict(), default=str))
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Totals as {kind: {name: totals}}, slowest first."""
+        with self._lock:
+            items = sorted(self._totals.items(), key=lambda item: -item[1]['seconds'])
+            summary: Dict[str, Dict[str, Dict[str, float]]] = {kind: {} for kind in KINDS}
+            for (kind, name), totals in items:
+                summary.setdefault(kind, {})[name] = dict(totals)
+        return summary
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+    def prometheus(self) -> str:
+        """Totals in the Prometheus text exposition format."""
+        lines = []
+        fields = ('calls', 'errors', 'seconds') + COUNTERS
+        with self._lock:
+            totals = dict(self._totals)
+        for field in fields:
+            metric = f"trading_agent_{field}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (kind, name), values in sorted(totals.items()):
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{metric}{{kind="{kind}",name="{label}"}} {values[field]}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int = METRICS_PORT) -> Optional[int]:
+        """Serves /metrics (Prometheus) and /metrics.json on localhost; returns the port (None if disabled)."""
+        if self._server is not None:
+            return self._server.server_address[1]
+        if not port:
+            return None
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = telemetry.prometheus().encode(), "text/plain; version=0.0.4"
+                elif self.path == '/metrics.json':
+                    body, content_type = json.dumps(telemetry.summary()).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        return self._server.server_address[1]
+
+    def stop(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+def instrument_tool(run):
+    """Decorator for a tool's `_run`: records it as a span named after the tool class."""
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        with telemetry.span('tool', type(self).__name__):
+            return run(self, *args, **kwargs)
+    return wrapper
+
+
+# Shared instance
+telemetry = Telemetry()
@@ -0,0 +1,190 @@
+"""
+Rolling, exponentially weighted mean and covariance of the tracked universe.
+
+The matrices live in memory and every new daily bar is folded in with one
+rank-one update, so questions like "how does NVDA correlate with the current
+book" are O(n) reads instead of a pass over a year of returns per candidate.
+Tickers join the universe on first use; only their own row and column are
+seeded from history.
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .market_cache import market_cache
+
+HALFLIFE_DAYS = float(os.getenv("COVARIANCE_HALFLIFE", "63"))  # about one quarter of trading days
+SEED_PERIOD = "1y"  # history used to seed a ticker that joins the universe
+TRADING_DAYS = 252
+
+
+class RollingCovariance:
+    """EWMA covariance of daily returns, updated incrementally; safe to share between crews."""
+
+    def __init__(self, halflife: float = HALFLIFE_DAYS, period: str = SEED_PERIOD,
+                 refresh_seconds: Optional[float] = None):
+        self.halflife = halflife
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.period = period
+        self.refresh_seconds = market_cache.ttl if refresh_seconds is None else refresh_seconds
+        self.updates = 0  # bars folded in incrementally
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.tickers: List[str] = []
+        self.mean = np.zeros(0)         # daily
+        self.cov = np.zeros((0, 0))     # daily
+        self.last_date: Optional[pd.Timestamp] = None
+        self._index: Dict[str, int] = {}
+        self._last_close = np.zeros(0)  # close of every ticker on last_date
+        self._checked = 0.0
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def _seed_moments(self, returns: np.ndarray):
+        """Exponentially weighted mean and demeaned returns of a T x k matrix (missing bars get no weight)."""
+        weights = (1 - self.alpha) ** np.arange(len(returns) - 1, -1, -1)
+        weights /= weights.sum()
+        valid = ~np.isnan(returns)
+        mean = np.nansum(returns * weights[:, None], axis=0) / np.maximum(valid.T @ weights, 1e-12)
+        centered = np.where(valid, returns - mean, 0.0)
+        return mean, centered * np.sqrt(weights)[:, None]
+
+    def _step(self, returns: np.ndarray) -> None:
+        """Folds one day of returns into the mean and covariance (tickers without a bar are left as is)."""
+        delta = np.where(np.isnan(returns), 0.0, returns - self.mean)
+        self.mean = self.mean + self.alpha * delta
+        self.cov = (1 - self.alpha) * (self.cov + self.alpha * np.outer(delta, delta))
+
+    def track(self, tickers: Sequence[str]) -> None:
+        """Adds tickers to the universe, seeding only their rows and columns from history."""
+        with self._lock:
+            new = list(dict.fromkeys(t.upper() for t in tickers if t.upper() not in self._index))
+            if not new:
+                return
+            closes = market_cache.close_prices(self.tickers + new, period=self.period)
+            if self.last_date is not None:
+                closes = closes[closes.index <= self.last_date]
+            new = [t for t in new if closes[t].notna().sum() > 1]
+            if not new:
+                return
+            if self.last_date is None:
+                self.last_date = closes.index[-1]
+
+            returns = closes.pct_change(fill_method=None).iloc[1:].to_numpy()
+            mean, scaled = self._seed_moments(returns)
+            k, n = len(new), len(self.tickers)
+            cross = scaled[:, n:].T @ scaled  # k x (n + k)
+
+            cov = np.zeros((n + k, n + k))
+            cov[:n, :n] = self.cov
+            cov[n:, :] = cross
+            cov[:, n:] = cross.T
+            self.cov = cov
+            self.mean = np.concatenate([self.mean, mean[n:]])
+            self._last_close = np.concatenate([self._last_close, closes[new].iloc[-1].to_numpy()])
+            for ticker in new:
+                self._index[ticker] = len(self.tickers)
+                self.tickers.append(ticker)
+
+    def refresh(self, force: bool = False) -> int:
+        """Folds in every daily bar newer than `last_date`; returns the number of bars applied."""
+        with self._lock:
+            if not self.tickers or (not force and time.time() - self._checked < self.refresh_seconds):
+                return 0
+            closes = market_cache.close_prices(self.tickers, period=self.period)
+            self._checked = time.time()
+            if closes.index[0] > self.last_date:
+                # Idle for longer than the seed window: start over
+                tickers = self.tickers
+                self._reset()
+                self.track(tickers)
+                self._checked = time.time()
+                return 0
+
+            newer = closes[closes.index > self.last_date]
+            previous = self._last_close
+            for date, row in zip(newer.index, newer.to_numpy()):
+                self._step(row / previous - 1)
+                previous = np.where(np.isnan(row), previous, row)
+                self.last_date = date
+            self._last_close = previous
+            self.updates += len(newer)
+            return len(newer)
+
+    def ensure(self, tickers: Sequence[str]) -> List[int]:
+        """Tracks and refreshes `tickers`, returning their positions in the matrices."""
+        self.track(tickers)
+        self.refresh()
+        missing = [t for t in tickers if t.upper() not in self._index]
+        if missing:
+            raise ValueError(f"No price history for {', '.join(missing)}")
+        return [self._index[t.upper()] for t in tickers]
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+    def covariance(self, tickers: Sequence[str], annualize: bool = True) -> pd.DataFrame:
+        """Covariance sub-matrix of `tickers`."""
+        with self._lock:
+            idx = self.ensure(tickers)
+            matrix = self.cov[np.ix_(idx, idx)]
+        names = [t.upper() for t in tickers]
+        return pd.DataFrame(matrix * (TRADING_DAYS if annualize else 1), index=names, columns=names)
+
+    def volatility(self, tickers: Sequence[str]) -> pd.Series:
+        """Annualized volatility of each ticker."""
+        with self._lock:
+            idx = self.ensure(tickers)
+            variance = self.cov[idx, idx]
+        return pd.Series(np.sqrt(variance * TRADING_DAYS), index=[t.upper() for t in tickers])
+
+    def correlation(self, ticker: str, others: Sequence[str]) -> pd.Series:
+        """Correlation of `ticker` with each of `others`: one row of the matrix, O(n)."""
+        with self._lock:
+            i, *idx = self.ensure([ticker, *others])
+            sd = np.sqrt(np.diag(self.cov)[[i, *idx]])
+            row = self.cov[i, idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = row / (sd[0] * sd[1:])
+        return pd.Series(values, index=[t.upper() for t in others])
+
+    def book_correlation(self, candidates: Sequence[str], holdings: Dict[str, float]) -> pd.DataFrame:
+        """
+        Correlation and covariance of each candidate with a weighted book, plus the
+        book's own variance (all daily), computed from the cached matrix.
+        """
+        names = list(holdings)
+        weights = np.array([holdings[t] for t in names], dtype=float)
+        with self._lock:
+            idx_c = self.ensure(candidates)
+            idx_h = self.ensure(names)
+            book_variance = float(weights @ self.cov[np.ix_(idx_h, idx_h)] @ weights)
+            covariance = self.cov[np.ix_(idx_c, idx_h)] @ weights
+            variance = self.cov[idx_c, idx_c]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = covariance / np.sqrt(variance * book_variance)
+        return pd.DataFrame({
+            'correlation': correlation,
+            'covariance': covariance,
+            'variance': variance,
+            'book_variance': book_variance,
+        }, index=[t.upper() for t in candidates])
+
+    def stats(self) -> dict:
+        return {
+            'tickers': len(self.tickers),
+            'as_of': self.last_date.date().isoformat() if self.last_date is not None else None,
+            'incremental_updates': self.updates,
+            'halflife_days': self.halflife,
+        }
+
+
+# Shared instance used by PortfolioCorrelationTool
+covariance_service = RollingCovariance()
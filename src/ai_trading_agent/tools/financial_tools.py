@@ -1,13 +1,20 @@
 from crewai.tools import BaseTool
 from typing import Type, Optional
 from pydantic import BaseModel, Field
-import yfinance as yf
-from alpha_vantage.timeseries import TimeSeries
-from alpha_vantage.techindicators import TechIndicators
+import asyncio
 import os
-import requests
 import pandas as pd
 from datetime import datetime, timedelta
+from .market_cache import market_cache
+from .indicators import latest_indicators
+from .portfolio_analytics import portfolio_engine, BENCHMARK_TICKER
+from .covariance import covariance_service
+from .optimizer import OBJECTIVES, optimize
+from ..compaction import compact_output
+from ..http_client import http_client
+from ..telemetry import instrument_tool
+from ..rate_limiter import rate_limiter
+
 
 # Tool 1: Real-Time Stock Data Tool
 class StockDataInput(BaseModel):
@@ -21,23 +28,26 @@ class StockDataTool(BaseTool):
     description: str = "Fetches real-time and historical stock price data including OHLCV, volume, and market cap"
     args_schema: Type[BaseModel] = StockDataInput
 
+    @instrument_tool
+    @compact_output
     def _run(self, ticker: str, period: str = "1mo", interval: str = "1d") -> str:
         try:
-            stock = yf.Ticker(ticker)
-            
-            # Get historical data
-            hist = stock.history(period=period, interval=interval)
+            # Get historical data (shared cache - other agents reuse this fetch)
+            hist = market_cache.history(ticker, period=period, interval=interval)
             
             # Get current info
-            info = stock.info
+            info = market_cache.info(ticker)
             
             # Calculate basic metrics
             current_price = info.get('currentPrice', 0)
             prev_close = info.get('previousClose', 0)
             change_pct = ((current_price - prev_close) / prev_close * 100) if prev_close else 0
             
-            # Get recent data
-            recent_data = hist.tail(5).to_string()
+            # Get recent data (CSV is a fraction of the tokens of an aligned table)
+            recent = hist.tail(5).round(2)
+            if 'Volume' in recent:
+                recent['Volume'] = recent['Volume'].fillna(0).astype('int64')
+            recent_data = recent.to_csv(date_format='%Y-%m-%d').strip()
             
             result = f"""
 Stock Data for {ticker}:
@@ -71,25 +81,32 @@ Industry: {info.get('industry', 'N/A')}
 class TechnicalIndicatorsInput(BaseModel):
     """Input for TechnicalIndicatorsTool"""
     ticker: str = Field(..., description="Stock ticker symbol")
-    indicators: str = Field(default="RSI,MACD,SMA,EMA", description="Comma-separated indicators to fetch")
+    indicators: str = Field(default="RSI,MACD,SMA,EMA,BBANDS", description="Comma-separated indicators to compute: RSI, MACD, SMA, EMA, BBANDS")
 
 class TechnicalIndicatorsTool(BaseTool):
     name: str = "Get Technical Indicators"
-    description: str = "Fetches technical indicators like RSI, MACD, SMA, EMA, Bollinger Bands for technical analysis"
+    description: str = "Computes technical indicators like RSI, MACD, SMA, EMA, Bollinger Bands for technical analysis"
     args_schema: Type[BaseModel] = TechnicalIndicatorsInput
+    # Optional Alpha Vantage cross-check (costs one API call per indicator)
+    cross_check: bool = Field(default_factory=lambda: os.getenv('ALPHA_VANTAGE_CROSS_CHECK', '').lower() in ('1', 'true', 'yes'))
 
-    def _run(self, ticker: str, indicators: str = "RSI,MACD,SMA,EMA") -> str:
+    @instrument_tool
+    @compact_output
+    def _run(self, ticker: str, indicators: str = "RSI,MACD,SMA,EMA,BBANDS") -> str:
         try:
-            api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
-            ti = TechIndicators(key=api_key, output_format='pandas')
+            # One year of daily bars covers the 200-day windows; usually already cached by other agents
+            hist = market_cache.history(ticker, period="1y", interval="1d")
+            if hist.empty:
+                return f"Error fetching technical indicators: no price history for {ticker}"
+            
+            values = latest_indicators(hist)
             
             results = []
-            indicator_list = [ind.strip() for ind in indicators.split(',')]
+            indicator_list = [ind.strip().upper() for ind in indicators.split(',')]
             
             for indicator in indicator_list:
                 if indicator == "RSI":
-                    data, meta = ti.get_rsi(symbol=ticker, interval='daily', time_period=14)
-                    latest_rsi = data.iloc[0]['RSI']
+                    latest_rsi = values['rsi_14']
                     results.append(f"RSI (14): {latest_rsi:.2f}")
                     
                     # Interpretation
@@ -101,35 +118,72 @@ class TechnicalIndicatorsTool(BaseTool):
                         results.append("  → Neutral")
                         
                 elif indicator == "MACD":
-                    data, meta = ti.get_macd(symbol=ticker, interval='daily')
-                    latest = data.iloc[0]
-                    results.append(f"MACD: {latest['MACD']:.4f}")
-                    results.append(f"Signal: {latest['MACD_Signal']:.4f}")
-                    results.append(f"Histogram: {latest['MACD_Hist']:.4f}")
+                    results.append(f"MACD: {values['macd']:.4f}")
+                    results.append(f"Signal: {values['macd_signal']:.4f}")
+                    results.append(f"Histogram: {values['macd_hist']:.4f}")
                     
-                    if latest['MACD'] > latest['MACD_Signal']:
+                    if values['macd'] > values['macd_signal']:
                         results.append("  → Bullish crossover")
                     else:
                         results.append("  → Bearish crossover")
                         
-                elif indicator == "SMA":
-                    data_20, _ = ti.get_sma(symbol=ticker, interval='daily', time_period=20)
-                    data_50, _ = ti.get_sma(symbol=ticker, interval='daily', time_period=50)
-                    sma_20 = data_20.iloc[0]['SMA']
-                    sma_50 = data_50.iloc[0]['SMA']
-                    results.append(f"SMA (20): ${sma_20:.2f}")
-                    results.append(f"SMA (50): ${sma_50:.2f}")
+                elif indicator in ("SMA", "EMA"):
+                    prefix = indicator.lower()
+                    for window in (20, 50, 200):
+                        results.append(f"{indicator} ({window}): ${values[f'{prefix}_{window}']:.2f}")
                     
-                    if sma_20 > sma_50:
+                    if values[f'{prefix}_20'] > values[f'{prefix}_50']:
                         results.append("  → Bullish trend (Golden Cross)")
                     else:
                         results.append("  → Bearish trend (Death Cross)")
+                    
+                    if values['close'] > values[f'{prefix}_200']:
+                        results.append(f"  → Price above {indicator} 200 (long-term uptrend)")
+                    elif values['close'] < values[f'{prefix}_200']:
+                        results.append(f"  → Price below {indicator} 200 (long-term downtrend)")
+                
+                elif indicator in ("BBANDS", "BOLLINGER"):
+                    results.append(f"Bollinger Upper (20, 2): ${values['bb_upper']:.2f}")
+                    results.append(f"Bollinger Middle: ${values['bb_middle']:.2f}")
+                    results.append(f"Bollinger Lower: ${values['bb_lower']:.2f}")
+                    
+                    if values['close'] > values['bb_upper']:
+                        results.append("  → Trading above upper band (stretched)")
+                    elif values['close'] < values['bb_lower']:
+                        results.append("  → Trading below lower band (oversold)")
+                    else:
+                        results.append("  → Inside the bands")
+            
+            if self.cross_check:
+                results.append(self._alpha_vantage_cross_check(ticker, values))
             
-            return f"\nTechnical Indicators for {ticker}:\n" + "\n".join(results)
+            return f"\nTechnical Indicators for {ticker} (Close: ${values['close']:.2f}):\n" + "\n".join(results)
             
         except Exception as e:
             return f"Error fetching technical indicators: {str(e)}"
 
+    def _alpha_vantage_cross_check(self, ticker: str, values: dict) -> str:
+        """Compares the local RSI/MACD/SMA values against Alpha Vantage."""
+        try:
+            from alpha_vantage.techindicators import TechIndicators
+            
+            ti = TechIndicators(key=os.getenv('ALPHA_VANTAGE_API_KEY'), output_format='pandas')
+            rsi_data, _ = rate_limiter.call('alpha_vantage', ti.get_rsi, symbol=ticker, interval='daily', time_period=14)
+            macd_data, _ = rate_limiter.call('alpha_vantage', ti.get_macd, symbol=ticker, interval='daily')
+            sma_data, _ = rate_limiter.call('alpha_vantage', ti.get_sma, symbol=ticker, interval='daily', time_period=50)
+            
+            remote = {
+                'rsi_14': rsi_data.iloc[0]['RSI'],
+                'macd': macd_data.iloc[0]['MACD'],
+                'sma_50': sma_data.iloc[0]['SMA'],
+            }
+            lines = ["", "Alpha Vantage Cross-Check:"]
+            for name, remote_value in remote.items():
+                lines.append(f"  {name}: local {values[name]:.4f} vs remote {remote_value:.4f} (Δ {values[name] - remote_value:+.4f})")
+            return "\n".join(lines)
+        except Exception as e:
+            return f"\nAlpha Vantage cross-check unavailable: {str(e)}"
+
 
 # Tool 3: Financial News Tool
 class FinancialNewsInput(BaseModel):
@@ -137,37 +191,62 @@ class FinancialNewsInput(BaseModel):
     ticker: str = Field(..., description="Stock ticker symbol or company name")
     days: int = Field(default=7, description="Number of days of news to fetch")
 
+SERPER_URL = "https://google.serper.dev/search"
+
+def _news_request(ticker: str, num: int, info: dict) -> dict:
+    """Serper news search for a ticker, by company name (from its `info`) for better results."""
+    company_name = info.get('longName', ticker)
+    return {
+        'json': {
+            "q": f"{company_name} {ticker} stock news",
+            "num": num,
+            "tbm": "nws"  # News search
+        },
+        'headers': {
+            'X-API-KEY': os.getenv('SERPER_API_KEY', ''),
+            'Content-Type': 'application/json'
+        },
+    }
+
+def fetch_news(ticker: str, num: int = 10) -> list:
+    """
+    Latest Serper news results for a ticker. Cached like market data, so the
+    scheduler's change check and the news agent share one search per TTL.
+    """
+    def search():
+        response = http_client.post('serper', SERPER_URL, **_news_request(ticker, num, market_cache.info(ticker)))
+        response.raise_for_status()
+        return response.json().get('news', [])
+
+    return market_cache.get_or_fetch(("news", ticker.upper(), num), search)
+
+async def afetch_news(ticker: str, num: int = 10) -> list:
+    """Async `fetch_news` for batch pre-fetching; fills the same cache entry."""
+    key = ("news", ticker.upper(), num)
+    cached = market_cache.get_cached(key)
+    if cached is not None:
+        return cached
+    # A snapshot or cache miss is a blocking yfinance call: keep it off the event loop
+    info = await asyncio.to_thread(market_cache.info, ticker)
+    response = await http_client.apost('serper', SERPER_URL, **_news_request(ticker, num, info))
+    response.raise_for_status()
+    news = response.json().get('news', [])
+    market_cache.put(key, news)
+    return news
+
 class FinancialNewsTool(BaseTool):
     name: str = "Get Financial News"
     description: str = "Fetches latest financial news and sentiment for a stock or company"
     args_schema: Type[BaseModel] = FinancialNewsInput
 
+    @instrument_tool
+    @compact_output
     def _run(self, ticker: str, days: int = 7) -> str:
         try:
-            # Get company name for better search
-            stock = yf.Ticker(ticker)
-            company_name = stock.info.get('longName', ticker)
-            
-            # Search for news using Serper
-            serper_api_key = os.getenv('SERPER_API_KEY')
-            url = "https://google.serper.dev/search"
-            
-            payload = {
-                "q": f"{company_name} {ticker} stock news",
-                "num": 10,
-                "tbm": "nws"  # News search
-            }
-            
-            headers = {
-                'X-API-KEY': serper_api_key,
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.post(url, json=payload, headers=headers)
-            data = response.json()
+            company_name = market_cache.info(ticker).get('longName', ticker)
             
             news_items = []
-            for item in data.get('news', [])[:5]:
+            for item in fetch_news(ticker)[:5]:
                 news_items.append(f"""
 Title: {item.get('title')}
 Source: {item.get('source')}
@@ -192,15 +271,17 @@ class FundamentalAnalysisTool(BaseTool):
     description: str = "Fetches comprehensive fundamental data including financials, ratios, and valuation metrics"
     args_schema: Type[BaseModel] = FundamentalAnalysisInput
 
+    @instrument_tool
+    @compact_output
     def _run(self, ticker: str) -> str:
         try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = market_cache.info(ticker)
             
             # Get financial statements
-            income_stmt = stock.income_stmt
-            balance_sheet = stock.balance_sheet
-            cash_flow = stock.cashflow
+            financials = market_cache.financials(ticker)
+            income_stmt = financials['income_stmt']
+            balance_sheet = financials['balance_sheet']
+            cash_flow = financials['cashflow']
             
             result = f"""
 Fundamental Analysis for {ticker}:
@@ -258,9 +339,11 @@ class PortfolioRiskInput(BaseModel):
 
 class PortfolioRiskTool(BaseTool):
     name: str = "Calculate Portfolio Risk"
-    description: str = "Calculates portfolio risk metrics including volatility, Sharpe ratio, and VaR"
+    description: str = "Calculates portfolio risk metrics including volatility, Sharpe ratio, beta, historical and parametric VaR/CVaR, drawdown and per-holding risk contributions"
     args_schema: Type[BaseModel] = PortfolioRiskInput
 
+    @instrument_tool
+    @compact_output
     def _run(self, tickers: str, weights: str, period: str = "1y") -> str:
         try:
             ticker_list = [t.strip() for t in tickers.split(',')]
@@ -272,36 +355,20 @@ class PortfolioRiskTool(BaseTool):
             if abs(sum(weight_list) - 1.0) > 0.01:
                 return f"Error: Weights must sum to 1.0 (current sum: {sum(weight_list)})"
             
-            # Download data
-            data = yf.download(ticker_list, period=period, progress=False)['Adj Close']
-            
-            # Calculate returns
-            returns = data.pct_change().dropna()
-            
-            # Portfolio metrics
-            portfolio_return = (returns.mean() * weight_list).sum() * 252  # Annualized
-            portfolio_volatility = (returns @ weight_list).std() * (252 ** 0.5)  # Annualized
-            
-            # Sharpe Ratio (assuming 4% risk-free rate)
-            risk_free_rate = 0.04
-            sharpe_ratio = (portfolio_return - risk_free_rate) / portfolio_volatility
-            
-            # Value at Risk (VaR) at 95% confidence
-            var_95 = returns @ weight_list
-            var_95 = var_95.quantile(0.05)
-            
-            # Maximum Drawdown
-            cumulative = (1 + returns @ weight_list).cumprod()
-            running_max = cumulative.expanding().max()
-            drawdown = (cumulative - running_max) / running_max
-            max_drawdown = drawdown.min()
+            # Cached returns matrix; all metrics are matrix operations over the holdings
+            risk = portfolio_engine.analyze(ticker_list, weight_list, period=period)
+            sharpe_ratio = risk.sharpe
+            max_drawdown = risk.max_drawdown
+            portfolio_volatility = risk.volatility
             
             # Individual stock metrics
-            stock_metrics = []
-            for ticker, weight in zip(ticker_list, weight_list):
-                vol = returns[ticker].std() * (252 ** 0.5)
-                ret = returns[ticker].mean() * 252
-                stock_metrics.append(f"{ticker}: Weight {weight*100:.1f}%, Return {ret*100:.2f}%, Volatility {vol*100:.2f}%")
+            stock_metrics = [
+                f"{ticker}: Weight {weight*100:.1f}%, Return {ret*100:.2f}%, Volatility {vol*100:.2f}%, "
+                f"Risk Contribution {contribution*100:.1f}%"
+                for ticker, weight, ret, vol, contribution in zip(
+                    risk.tickers, risk.weights, risk.asset_returns, risk.asset_volatility, risk.risk_contribution)
+            ]
+            beta = f"{risk.beta:.2f} (vs {BENCHMARK_TICKER})" if risk.beta is not None else "N/A"
             
             result = f"""
 Portfolio Risk Analysis:
@@ -310,13 +377,17 @@ Portfolio Risk Analysis:
 {chr(10).join(stock_metrics)}
 
 === PORTFOLIO METRICS ===
-Expected Annual Return: {portfolio_return*100:.2f}%
+Expected Annual Return: {risk.expected_return*100:.2f}%
 Annual Volatility: {portfolio_volatility*100:.2f}%
 Sharpe Ratio: {sharpe_ratio:.2f}
+Beta: {beta}
 
 === RISK METRICS ===
-Value at Risk (95%): {var_95*100:.2f}% (daily)
+Value at Risk (95%, historical): {risk.var_historical*100:.2f}% (daily)
+Value at Risk (95%, parametric): {risk.var_parametric*100:.2f}% (daily)
+Conditional VaR / Expected Shortfall (95%): {risk.cvar_historical*100:.2f}% (daily)
 Maximum Drawdown: {max_drawdown*100:.2f}%
+Observations: {risk.observations} trading days
 
 === RISK ASSESSMENT ===
 """
@@ -339,3 +410,130 @@ Maximum Drawdown: {max_drawdown*100:.2f}%
             
         except Exception as e:
             return f"Error calculating portfolio risk: {str(e)}"
+
+
+# Tool 6: Correlation with Current Holdings
+class PortfolioCorrelationInput(BaseModel):
+    """Input for PortfolioCorrelationTool"""
+    ticker: str = Field(..., description="Candidate stock ticker symbol")
+    holdings: str = Field(default="None", description="Current holdings, e.g. 'AAPL:30%, GOOGL:25%' or 'AAPL,GOOGL'")
+
+
+def _parse_holdings(holdings: str) -> dict:
+    """'AAPL:30%, GOOGL:25%' -> {'AAPL': 0.545, 'GOOGL': 0.455}; bare tickers are equally weighted."""
+    parsed = {}
+    for item in holdings.replace(';', ',').split(','):
+        name, _, weight = item.partition(':')
+        name = name.strip().upper()
+        if name and name != 'NONE':
+            parsed[name] = float(weight.strip().rstrip('%') or 1)
+    total = sum(parsed.values())
+    return {name: weight / total for name, weight in parsed.items()} if total else {}
+
+
+class PortfolioCorrelationTool(BaseTool):
+    name: str = "Get Portfolio Correlation"
+    description: str = "Correlation of a candidate with each current holding and with the whole book, and the book volatility after adding it"
+    args_schema: Type[BaseModel] = PortfolioCorrelationInput
+
+    @instrument_tool
+    @compact_output
+    def _run(self, ticker: str, holdings: str = "None") -> str:
+        try:
+            ticker = ticker.strip().upper()
+            book = _parse_holdings(holdings)
+            book.pop(ticker, None)
+            if not book:
+                book = {BENCHMARK_TICKER: 1.0}
+            total = sum(book.values())
+            book = {name: weight / total for name, weight in book.items()}
+
+            # Rows of the incrementally maintained EWMA covariance; no history is rescanned
+            correlations = covariance_service.correlation(ticker, list(book))
+            exposure = covariance_service.book_correlation([ticker], book).iloc[0]
+            volatility = covariance_service.volatility([ticker]).iloc[0]
+            stats = covariance_service.stats()
+
+            holding_lines = [f"{name} ({book[name]*100:.1f}%): {corr:.2f}" for name, corr in correlations.items()]
+            book_volatility = (exposure['book_variance'] * 252) ** 0.5
+            impact_lines = []
+            for size in (0.05, 0.10, 0.20):
+                variance = ((1 - size) ** 2 * exposure['book_variance'] + 2 * size * (1 - size) * exposure['covariance']
+                            + size ** 2 * exposure['variance'])
+                impact_lines.append(f"With a {size*100:.0f}% position: {(variance * 252) ** 0.5 * 100:.2f}%")
+
+            result = f"""
+Correlation Analysis for {ticker} (EWMA, {stats['halflife_days']:.0f}-day half-life, as of {stats['as_of']}):
+
+{ticker} Annual Volatility: {volatility*100:.2f}%
+
+=== CORRELATION WITH HOLDINGS ===
+{chr(10).join(holding_lines)}
+
+=== BOOK ===
+Correlation with Current Book: {exposure['correlation']:.2f}
+Book Annual Volatility: {book_volatility*100:.2f}%
+{chr(10).join(impact_lines)}
+
+=== DIVERSIFICATION ===
+"""
+            if exposure['correlation'] > 0.7:
+                result += "⚠ Highly correlated with the book - concentrates risk\n"
+            elif exposure['correlation'] > 0.3:
+                result += "➖ Moderately correlated with the book\n"
+            else:
+                result += "✓ Low correlation - diversifies the book\n"
+
+            return result
+
+        except Exception as e:
+            return f"Error calculating correlation: {str(e)}"
+
+
+# Tool 7: Portfolio Optimizer
+class PortfolioOptimizerInput(BaseModel):
+    """Input for PortfolioOptimizerTool"""
+    tickers: str = Field(..., description="Comma-separated list of tickers to allocate between")
+    objective: str = Field(default="all", description="min_variance, max_sharpe, risk_parity or all")
+    max_weight: float = Field(default=1.0, description="Largest weight of a single position (0.25 = 25%)")
+    max_sector_weight: float = Field(default=1.0, description="Largest combined weight of one sector (0.4 = 40%)")
+    period: str = Field(default="1y", description="Historical period for calculation")
+
+class PortfolioOptimizerTool(BaseTool):
+    name: str = "Optimize Portfolio Weights"
+    description: str = "Solves for optimal long-only weights (min-variance, max-Sharpe, risk parity) with position and sector caps in one call"
+    args_schema: Type[BaseModel] = PortfolioOptimizerInput
+
+    @instrument_tool
+    @compact_output
+    def _run(self, tickers: str, objective: str = "all", max_weight: float = 1.0,
+             max_sector_weight: float = 1.0, period: str = "1y") -> str:
+        try:
+            ticker_list = [t.strip().upper() for t in tickers.split(',') if t.strip()]
+            objective = objective.strip().lower().replace('-', '_').replace(' ', '_')
+            objectives = OBJECTIVES if objective == 'all' else (objective,)
+
+            results = optimize(ticker_list, objectives, max_weight=max_weight,
+                               max_sector_weight=max_sector_weight, period=period)
+
+            result = f"""
+Portfolio Optimization ({len(ticker_list)} holdings, max position {max_weight*100:.0f}%, max sector {max_sector_weight*100:.0f}%):
+"""
+            for name, risk in results.items():
+                order = sorted(range(len(risk.tickers)), key=lambda i: -risk.weights[i])
+                allocation = [f"{risk.tickers[i]}: {risk.weights[i]*100:.1f}% (risk contribution {risk.risk_contribution[i]*100:.1f}%)"
+                              for i in order if risk.weights[i] >= 0.001]
+                result += f"""
+=== {name.replace('_', ' ').upper()} ===
+{chr(10).join(allocation)}
+Expected Annual Return: {risk.expected_return*100:.2f}%
+Annual Volatility: {risk.volatility*100:.2f}%
+Sharpe Ratio: {risk.sharpe:.2f}
+Value at Risk (95%, historical): {risk.var_historical*100:.2f}% (daily)
+Maximum Drawdown: {risk.max_drawdown*100:.2f}%
+Weights ({",".join(risk.tickers)}): {",".join(f"{w:.4f}" for w in risk.weights)}
+"""
+            return result
+
+        except Exception as e:
+            return f"Error optimizing portfolio: {str(e)}"
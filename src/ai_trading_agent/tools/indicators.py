@@ -0,0 +1,74 @@
+"""
+Vectorized technical indicators shared by TechnicalIndicatorsTool and the screener.
+
+Every function accepts either a price Series (one ticker) or a wide DataFrame
+(dates x tickers) and returns the same shape, so a whole universe is computed
+with a single pandas call instead of a Python loop per ticker.
+"""
+import numpy as np
+import pandas as pd
+
+# Longest look-back used by the default indicator set (SMA/EMA 200)
+LONGEST_WINDOW = 200
+
+
+def sma(prices, window: int):
+    """Simple moving average."""
+    return prices.rolling(window=window, min_periods=window).mean()
+
+
+def ema(prices, span: int):
+    """Exponential moving average (same convention as Alpha Vantage / TradingView)."""
+    return prices.ewm(span=span, adjust=False, min_periods=span).mean()
+
+
+def rsi(prices, period: int = 14):
+    """Relative Strength Index with Wilder's smoothing."""
+    delta = prices.diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+    avg_gain = gain.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    avg_loss = loss.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+    rs = avg_gain / avg_loss.replace(0, np.nan)
+    result = 100 - 100 / (1 + rs)
+    # No losses in the window means RSI is pinned at 100
+    return result.where(avg_loss != 0, 100.0).where(avg_gain.notna())
+
+
+def macd(prices, fast: int = 12, slow: int = 26, signal: int = 9):
+    """Returns (macd_line, signal_line, histogram)."""
+    macd_line = ema(prices, fast) - ema(prices, slow)
+    signal_line = macd_line.ewm(span=signal, adjust=False, min_periods=signal).mean()
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def bollinger_bands(prices, window: int = 20, num_std: float = 2.0):
+    """Returns (upper, middle, lower) bands."""
+    middle = sma(prices, window)
+    std = prices.rolling(window=window, min_periods=window).std(ddof=0)
+    return middle + num_std * std, middle, middle - num_std * std
+
+
+def latest_indicators(hist: pd.DataFrame) -> dict:
+    """
+    Computes the full indicator set from an OHLCV frame and returns the latest values.
+    Windows that need more history than is available come back as NaN.
+    """
+    close = hist['Close'].astype(float)
+    macd_line, signal_line, histogram = macd(close)
+    upper, middle, lower = bollinger_bands(close)
+
+    values = {
+        'close': close.iloc[-1],
+        'rsi_14': rsi(close).iloc[-1],
+        'macd': macd_line.iloc[-1],
+        'macd_signal': signal_line.iloc[-1],
+        'macd_hist': histogram.iloc[-1],
+        'bb_upper': upper.iloc[-1],
+        'bb_middle': middle.iloc[-1],
+        'bb_lower': lower.iloc[-1],
+    }
+    for window in (20, 50, LONGEST_WINDOW):
+        values[f'sma_{window}'] = sma(close, window).iloc[-1]
+        values[f'ema_{window}'] = ema(close, window).iloc[-1]
+    return {name: float(value) for name, value in values.items()}
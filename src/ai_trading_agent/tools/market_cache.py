@@ -0,0 +1,285 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from ..rate_limiter import rate_limiter
+from ..telemetry import telemetry
+from .price_store import price_store
+
+# Configuration (override through environment variables)
+DEFAULT_TTL_SECONDS = float(os.getenv("MARKET_CACHE_TTL", "900"))  # 15 minutes
+DEFAULT_MAX_ENTRIES = int(os.getenv("MARKET_CACHE_MAX_ENTRIES", "2048"))
+DEFAULT_DISK_DIR = os.getenv("MARKET_CACHE_DIR")  # e.g. ".cache/market" - unset disables the disk tier
+
+_MISSING = object()
+
+
+class MarketDataCache:
+    """
+    Process-wide, TTL-bounded cache in front of every yfinance call.
+
+    Tier 1 is an in-memory LRU, tier 2 an optional pickle directory that
+    survives restarts. A batch can also install a pre-fetched MarketSnapshot,
+    which is consulted before either tier and never expires. Daily bars are
+    served from the persistent PriceStore when it is enabled. Concurrent
+    requests for the same key are collapsed into a single upstream fetch, so
+    the agents of a crew (and the crews of a batch) never download the same
+    ticker twice.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 disk_dir: Optional[str] = DEFAULT_DISK_DIR):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.snapshot = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.snapshot_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Core read-through logic
+    # ------------------------------------------------------------------
+    def get_or_fetch(self, key: tuple, fetch: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Returns the cached value for `key`, calling `fetch()` at most once per TTL window."""
+        value = self._get_memory(key)
+        if value is not _MISSING:
+            return value
+
+        with self._lock_for(key):
+            # Another thread may have filled the entry while we waited
+            value = self._get_memory(key, count_hit=False)
+            if value is not _MISSING:
+                self._count('hits')
+                return value
+
+            value = self._get_disk(key)
+            if value is not _MISSING:
+                self._count('disk_hits')
+                self._set_memory(key, value, ttl)
+                return value
+
+            self._count('misses')
+            value = fetch()
+            self._set_memory(key, value, ttl)
+            self._set_disk(key, value, ttl)
+            return value
+
+    def get_cached(self, key: tuple) -> Any:
+        """The cached value for `key` from memory or disk, or None (never fetches)."""
+        value = self._get_memory(key)
+        if value is _MISSING:
+            value = self._get_disk(key)
+            if value is _MISSING:
+                return None
+            self._count('disk_hits')
+            self._set_memory(key, value)
+        return value
+
+    def put(self, key: tuple, value: Any, ttl: Optional[float] = None) -> None:
+        """Stores a value fetched elsewhere (e.g. by an async batch fetch) in both tiers."""
+        self._set_memory(key, value, ttl)
+        self._set_disk(key, value, ttl)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        telemetry.count(**{'cache_misses' if counter == 'misses' else 'cache_hits': 1})
+
+    def _lock_for(self, key: tuple) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _get_memory(self, key: tuple, count_hit: bool = True) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            if count_hit:
+                self.hits += 1
+        if count_hit:
+            telemetry.count(cache_hits=1)
+        return value
+
+    def _set_memory(self, key: tuple, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._key_locks.pop(evicted, None)
+
+    def _disk_path(self, key: tuple) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.pkl")
+
+    def _get_disk(self, key: tuple) -> Any:
+        if not self.disk_dir:
+            return _MISSING
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            return _MISSING
+        if expires_at < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return _MISSING
+        return value
+
+    def _set_disk(self, key: tuple, value: Any, ttl: Optional[float] = None) -> None:
+        if not self.disk_dir:
+            return
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump((expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PickleError):
+            pass
+
+    # ------------------------------------------------------------------
+    # Pre-fetched snapshot
+    # ------------------------------------------------------------------
+    def install_snapshot(self, snapshot) -> None:
+        """Serves tool requests from a pre-fetched MarketSnapshot (pass None to remove it)."""
+        self.snapshot = snapshot
+
+    def _from_snapshot(self, kind: str, *args) -> Any:
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
+        value = getattr(snapshot, kind)(*args)
+        if value is not None:
+            self._count('snapshot_hits')
+        return value
+
+    def _from_store(self, ticker: str, period: str, interval: str):
+        if price_store is None or interval != '1d' or not price_store.supports(period):
+            return None
+        hist = price_store.history(ticker, period)
+        if hist is None or not price_store.covers(ticker, period):
+            return None
+        self._count('store_hits')
+        return hist
+
+    # ------------------------------------------------------------------
+    # yfinance accessors
+    # ------------------------------------------------------------------
+    def history(self, ticker: str, period: str = "1mo", interval: str = "1d"):
+        """Cached equivalent of `yf.Ticker(ticker).history(period, interval)`."""
+        hist = self._from_snapshot('history', ticker, period, interval)
+        if hist is None:
+            hist = self._from_store(ticker, period, interval)
+        if hist is not None:
+            return hist.copy()
+        key = ("history", ticker.upper(), period, interval)
+        hist = self.get_or_fetch(key, lambda: rate_limiter.call(
+            'yahoo', yf.Ticker(ticker).history, period=period, interval=interval))
+        return hist.copy()
+
+    def info(self, ticker: str) -> dict:
+        """Cached equivalent of `yf.Ticker(ticker).info`."""
+        info = self._from_snapshot('info', ticker)
+        if info is not None:
+            return dict(info)
+        key = ("info", ticker.upper())
+        return dict(self.get_or_fetch(key, lambda: rate_limiter.call('yahoo', lambda: yf.Ticker(ticker).info) or {}))
+
+    def financials(self, ticker: str) -> dict:
+        """Cached income statement, balance sheet and cash flow for a ticker."""
+        statements = self._from_snapshot('financials', ticker)
+        if statements is not None:
+            return dict(statements)
+
+        def fetch():
+            stock = yf.Ticker(ticker)
+            return {
+                'income_stmt': stock.income_stmt,
+                'balance_sheet': stock.balance_sheet,
+                'cashflow': stock.cashflow,
+            }
+
+        key = ("financials", ticker.upper())
+        return dict(self.get_or_fetch(key, lambda: rate_limiter.call('yahoo', fetch)))
+
+    def download(self, tickers, period: str = "1mo", interval: str = "1d", **kwargs):
+        """Cached equivalent of a batched `yf.download(tickers, period, interval, ...)`."""
+        ticker_list = [tickers] if isinstance(tickers, str) else list(tickers)
+        options = tuple(sorted((k, v) for k, v in kwargs.items() if k != 'progress'))
+        key = ("download", tuple(t.upper() for t in ticker_list), period, interval, options)
+        data = self.get_or_fetch(key, lambda: rate_limiter.call(
+            'yahoo', yf.download, ticker_list, period=period, interval=interval, **kwargs))
+        return data.copy()
+
+    def close_prices(self, tickers, period: str = "1y"):
+        """Wide dates x tickers frame of daily closes, bringing the price store up to date in one request."""
+        ticker_list = [tickers] if isinstance(tickers, str) else list(tickers)
+        if price_store is not None and price_store.supports(period):
+            price_store.update(ticker_list)
+        closes = {}
+        for ticker in ticker_list:
+            close = self.history(ticker, period=period)['Close']
+            close.index = pd.DatetimeIndex(close.index).tz_localize(None).normalize()
+            closes[ticker] = close
+        return pd.DataFrame(closes)
+
+    # ------------------------------------------------------------------
+    # Housekeeping
+    # ------------------------------------------------------------------
+    def stats(self) -> dict:
+        """Hit/miss counters since the last reset."""
+        with self._lock:
+            saved = self.hits + self.disk_hits + self.snapshot_hits + self.store_hits
+            lookups = saved + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'snapshot_hits': self.snapshot_hits,
+                'store_hits': self.store_hits,
+                'misses': self.misses,
+                'saved_fetches': saved,
+                'hit_rate': saved / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.disk_hits = self.snapshot_hits = self.store_hits = self.misses = 0
+
+    def clear(self) -> None:
+        """Drops every in-memory entry (the disk tier expires on its own TTL)."""
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+
+# Shared instance used by the tools and the screener
+market_cache = MarketDataCache()
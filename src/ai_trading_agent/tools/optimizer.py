@@ -0,0 +1,195 @@
+"""
+Long-only portfolio optimizer over the cached returns of `portfolio_engine`.
+
+Min-variance and max-Sharpe weights come from one batched projected-gradient
+solve that traces the whole efficient frontier at once (one row per risk
+aversion); risk parity is a Newton solve. Position and sector caps are
+enforced by exact projection onto the constraint set, so every result is
+feasible. Everything is plain NumPy, no solver dependency.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .market_cache import market_cache
+from .portfolio_analytics import RISK_FREE_RATE, TRADING_DAYS, PortfolioRisk, portfolio_engine
+
+OBJECTIVES = ("min_variance", "max_sharpe", "risk_parity")
+FRONTIER_POINTS = 24       # risk aversions solved together, twice (coarse grid, then refined)
+MAX_ITERATIONS = 3000
+TOLERANCE = 1e-7           # largest weight change between iterations at convergence
+BISECTION_STEPS = 30
+
+
+# ----------------------------------------------------------------------
+# Projection onto the constraint set
+# ----------------------------------------------------------------------
+def _clip(V: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    return np.minimum(np.maximum(V, 0), upper)
+
+
+def _bisect_shift(V: np.ndarray, upper: np.ndarray, groups: np.ndarray, target: float) -> np.ndarray:
+    """
+    For every row and group, the shift s with sum(clip(v - s, 0, upper)) over the group
+    equal to `target` (-inf where the group cannot reach it). Returns rows x groups.
+    """
+    count = groups.max() + 1
+    capacity = np.bincount(groups, weights=upper, minlength=count)
+    membership = np.eye(count)[groups]  # n x groups
+    lo = np.full((len(V), count), (V - upper).min() - 1)
+    hi = np.full_like(lo, V.max())
+    for _ in range(BISECTION_STEPS):
+        mid = (lo + hi) / 2
+        over = _clip(V - mid[:, groups], upper) @ membership > target
+        lo = np.where(over, mid, lo)
+        hi = np.where(over, hi, mid)
+    # Exact shift from the weights left free inside each group's bracket
+    mid = (lo + hi) / 2
+    shifted = V - mid[:, groups]
+    free = (shifted > 0) & (shifted < upper)
+    fixed = np.where(free, 0.0, _clip(shifted, upper)) @ membership
+    count = free @ membership
+    exact = (np.where(free, V, 0.0) @ membership + fixed - target) / np.maximum(count, 1)
+    return np.where(capacity > target, np.where(count > 0, exact, mid), -np.inf)
+
+
+def make_projection(upper: np.ndarray, groups: Optional[np.ndarray] = None, sector_cap: float = 1.0):
+    """
+    Row-wise Euclidean projection onto {sum(w) = 1, 0 <= w <= upper, weight of every sector <= sector_cap},
+    where `groups` holds the sector number of each holding.
+
+    The solution is w = clip(v - max(t, s_sector), 0, upper): each sector whose weight
+    would exceed the cap gets its own shift s_sector, and one common shift t makes the
+    weights sum to one. Sectors are disjoint, so both shifts are found by bisection.
+    """
+    sectored = groups is not None and sector_cap < 1
+
+    def project(V):
+        lo = np.full((len(V), 1), (V - upper).min() - 1)
+        hi = np.full((len(V), 1), V.max())
+        floor = _bisect_shift(V, upper, groups, sector_cap)[:, groups] if sectored else -np.inf
+        for _ in range(BISECTION_STEPS):
+            mid = (lo + hi) / 2
+            over = _clip(V - np.maximum(mid, floor), upper).sum(axis=1, keepdims=True) > 1
+            lo = np.where(over, mid, lo)
+            hi = np.where(over, hi, mid)
+        # The bracket fixes which weights are free; solve the common shift exactly from them
+        mid = (lo + hi) / 2
+        shifted = V - np.maximum(mid, floor)
+        free = (mid >= floor) & (shifted > 0) & (shifted < upper)
+        fixed = np.where(free, 0.0, _clip(shifted, upper)).sum(axis=1, keepdims=True)
+        count = free.sum(axis=1, keepdims=True)
+        exact = (np.where(free, V, 0.0).sum(axis=1, keepdims=True) + fixed - 1) / np.maximum(count, 1)
+        shift = np.where(count > 0, exact, mid)
+        return _clip(V - np.maximum(shift, floor), upper)
+    return project
+
+
+# ----------------------------------------------------------------------
+# Solvers
+# ----------------------------------------------------------------------
+def efficient_frontier(mean: np.ndarray, cov: np.ndarray, project, gammas: np.ndarray) -> np.ndarray:
+    """
+    Solves min 0.5 w'Cw - gamma * mu'w for every gamma at once with accelerated
+    projected gradient (FISTA). Returns a k x n weight matrix.
+    """
+    n = len(mean)
+    step = 1 / max(np.linalg.eigvalsh(cov)[-1], 1e-12)
+    W = project(np.full((len(gammas), n), 1 / n))
+    Y, t = W, np.ones(len(gammas))
+    for _ in range(MAX_ITERATIONS):
+        W_next = project(Y - step * (Y @ cov - gammas[:, None] * mean))
+        # Adaptive restart: drop the momentum of rows that started moving uphill
+        restart = np.einsum('ki,ki->k', Y - W_next, W_next - W) > 0
+        t = np.where(restart, 1.0, t)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        Y = W_next + ((t - 1) / t_next)[:, None] * (W_next - W)
+        done = np.abs(W_next - W).max() < TOLERANCE
+        W, t = W_next, t_next
+        if done:
+            break
+    return W
+
+
+def risk_parity(cov: np.ndarray, budget: Optional[np.ndarray] = None) -> np.ndarray:
+    """Equal (or budgeted) risk contributions: Newton on min 0.5 y'Cy - b'log(y), w = y / sum(y)."""
+    n = len(cov)
+    budget = np.full(n, 1 / n) if budget is None else budget
+    y = 1 / np.sqrt(np.diag(cov))
+    y *= np.sqrt(budget.sum() / (y @ cov @ y))
+    for _ in range(100):
+        gradient = cov @ y - budget / y
+        if np.abs(gradient).max() < 1e-12:
+            break
+        step = np.linalg.solve(cov + np.diag(budget / y ** 2), gradient)
+        scale = 1.0
+        while np.any(y - scale * step <= 0):
+            scale /= 2
+        y = y - scale * step
+    return y / y.sum()
+
+
+def _sharpe(W: np.ndarray, mean: np.ndarray, cov: np.ndarray) -> np.ndarray:
+    volatility = np.sqrt(np.einsum('ki,ij,kj->k', W, cov, W) * TRADING_DAYS)
+    excess = W @ mean * TRADING_DAYS - RISK_FREE_RATE
+    return np.divide(excess, volatility, out=np.full(len(W), -np.inf), where=volatility > 0)
+
+
+def sectors_of(tickers: Sequence[str]) -> Dict[str, str]:
+    """Sector of every ticker from the (cached) Yahoo profile."""
+    sectors = {}
+    for ticker in tickers:
+        try:
+            sectors[ticker] = market_cache.info(ticker).get('sector') or 'Unknown'
+        except Exception:
+            sectors[ticker] = 'Unknown'
+    return sectors
+
+
+def optimize(tickers: Sequence[str], objectives: Sequence[str] = OBJECTIVES, max_weight: float = 1.0,
+             max_sector_weight: float = 1.0, sectors: Optional[Dict[str, str]] = None,
+             period: str = "1y") -> Dict[str, PortfolioRisk]:
+    """
+    Optimal long-only weights for each objective, as full risk profiles.
+    Sectors are looked up only when `max_sector_weight` < 1 and none are given.
+    """
+    unknown = [o for o in objectives if o not in OBJECTIVES]
+    if unknown:
+        raise ValueError(f"Unknown objective(s) {', '.join(unknown)} (expected {', '.join(OBJECTIVES)})")
+    tickers: List[str] = [t.upper() for t in tickers]
+    n = len(tickers)
+    if max_weight * n < 1 - 1e-9:
+        raise ValueError(f"A {max_weight*100:.0f}% position cap cannot be met with {n} holdings")
+
+    stats = portfolio_engine.stats(tickers, period)
+    upper = np.full(n, float(max_weight))
+    groups = None
+    if max_sector_weight < 1:
+        sectors = sectors or sectors_of(tickers)
+        names = sorted(set(sectors[t] for t in tickers))
+        groups = np.array([names.index(sectors[t]) for t in tickers])
+        capacity = np.minimum(np.bincount(groups) * max_weight, max_sector_weight).sum()
+        if capacity < 1 - 1e-9:
+            raise ValueError(f"Caps leave only {capacity*100:.0f}% investable across {len(names)} sectors")
+    project = make_projection(upper, groups, max_sector_weight)
+
+    weights = {}
+    if 'min_variance' in objectives or 'max_sharpe' in objectives:
+        # gamma = 0 is min-variance; large gammas approach the max-return corner
+        scale = np.diag(stats.cov).mean() / max(np.abs(stats.mean).max(), 1e-12)
+        gammas = np.concatenate([[0.0], scale * np.logspace(-2, 2, FRONTIER_POINTS - 1)])
+        frontier = efficient_frontier(stats.mean, stats.cov, project, gammas)
+        weights['min_variance'] = frontier[0]
+        best = int(np.argmax(_sharpe(frontier, stats.mean, stats.cov)))
+        # Refine between the neighbours of the best sampled point
+        fine = np.linspace(gammas[max(best - 1, 0)], gammas[min(best + 1, len(gammas) - 1)], FRONTIER_POINTS)
+        refined = efficient_frontier(stats.mean, stats.cov, project, fine)
+        weights['max_sharpe'] = refined[int(np.argmax(_sharpe(refined, stats.mean, stats.cov)))]
+    if 'risk_parity' in objectives:
+        w = risk_parity(stats.cov)
+        if np.any(w > upper + 1e-9) or groups is not None:
+            w = project(w[None, :])[0]
+        weights['risk_parity'] = w
+
+    return {objective: portfolio_engine.analyze(tickers, weights[objective], period=period)
+            for objective in objectives}
@@ -0,0 +1,214 @@
+"""
+Vectorized portfolio risk engine.
+
+Daily returns are cached per ticker and the aligned returns matrix, mean
+vector and covariance are cached per (tickers, period), so the portfolio
+strategist can evaluate many weightings of the same holdings in
+milliseconds. Every metric is computed with matrix operations over all
+holdings at once, and `analyze_many` scores a whole batch of weight vectors
+in one pass.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .market_cache import market_cache
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.04"))
+BENCHMARK_TICKER = os.getenv("BENCHMARK_TICKER", "SPY")  # used for beta
+MAX_CACHED_MATRICES = 256
+
+
+@dataclass
+class ReturnStats:
+    """Aligned daily returns of a set of holdings and their first two moments."""
+    tickers: List[str]
+    period: str
+    index: pd.DatetimeIndex
+    returns: np.ndarray  # T x n
+    mean: np.ndarray     # n, daily
+    cov: np.ndarray      # n x n, daily
+
+
+@dataclass
+class PortfolioRisk:
+    """Risk profile of one weighting. Returns and VaR figures are fractions (-0.02 = -2%)."""
+    tickers: List[str]
+    weights: np.ndarray
+    expected_return: float      # annualized
+    volatility: float           # annualized
+    sharpe: float
+    var_parametric: float       # daily, at `confidence`
+    cvar_parametric: float
+    var_historical: float
+    cvar_historical: float
+    max_drawdown: float
+    beta: Optional[float]
+    asset_returns: np.ndarray   # annualized, per holding
+    asset_volatility: np.ndarray
+    marginal_risk: np.ndarray   # d(volatility)/d(weight), annualized
+    risk_contribution: np.ndarray  # share of portfolio volatility, sums to 1
+    confidence: float
+    observations: int
+
+
+def _drawdowns(portfolio_returns: np.ndarray) -> np.ndarray:
+    """Maximum drawdown of every column of a T x k returns matrix."""
+    wealth = np.cumprod(1 + portfolio_returns, axis=0)
+    peaks = np.maximum.accumulate(wealth, axis=0)
+    return (wealth / peaks - 1).min(axis=0)
+
+
+def _tail_stats(portfolio_returns: np.ndarray, confidence: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Historical VaR and CVaR (expected shortfall) of every column."""
+    var = np.quantile(portfolio_returns, 1 - confidence, axis=0)
+    tail = np.where(portfolio_returns <= var, portfolio_returns, np.nan)
+    return var, np.nanmean(tail, axis=0)
+
+
+class PortfolioRiskEngine:
+    """Computes portfolio risk from cached returns; safe to share between crews."""
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = market_cache.ttl if ttl is None else ttl
+        self._returns: Dict[Tuple[str, str], Tuple[float, pd.Series]] = {}
+        self._stats = OrderedDict()  # (tickers, period) -> (expires_at, ReturnStats)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Cached inputs
+    # ------------------------------------------------------------------
+    def returns(self, tickers: Sequence[str], period: str = "1y") -> pd.DataFrame:
+        """Daily returns (dates x tickers) on the dates every ticker traded."""
+        tickers = [t.upper() for t in tickers]
+        now = time.time()
+        with self._lock:
+            cached = {t: self._returns.get((t, period)) for t in tickers}
+        missing = [t for t, entry in cached.items() if entry is None or entry[0] < now]
+        if missing:
+            closes = market_cache.close_prices(missing, period=period)
+            with self._lock:
+                for ticker in missing:
+                    series = closes[ticker].pct_change(fill_method=None).dropna()
+                    self._returns[(ticker, period)] = (now + self.ttl, series)
+                    cached[ticker] = self._returns[(ticker, period)]
+        return pd.DataFrame({t: cached[t][1] for t in tickers}).dropna()
+
+    def stats(self, tickers: Sequence[str], period: str = "1y") -> ReturnStats:
+        """Returns matrix, mean vector and covariance for a set of holdings (cached)."""
+        key = (tuple(t.upper() for t in tickers), period)
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is not None and entry[0] >= time.time():
+                self._stats.move_to_end(key)
+                return entry[1]
+
+        frame = self.returns(key[0], period)
+        matrix = frame.to_numpy()
+        if len(matrix) < 2:
+            raise ValueError(f"Not enough overlapping price history for {', '.join(key[0])}")
+        stats = ReturnStats(
+            tickers=list(key[0]),
+            period=period,
+            index=frame.index,
+            returns=matrix,
+            mean=matrix.mean(axis=0),
+            cov=np.atleast_2d(np.cov(matrix, rowvar=False)),
+        )
+        with self._lock:
+            self._stats[key] = (time.time() + self.ttl, stats)
+            while len(self._stats) > MAX_CACHED_MATRICES:
+                self._stats.popitem(last=False)
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._returns.clear()
+            self._stats.clear()
+
+    # ------------------------------------------------------------------
+    # Analytics
+    # ------------------------------------------------------------------
+    def _beta(self, stats: ReturnStats, portfolio_returns: np.ndarray, benchmark: Optional[str]) -> Optional[float]:
+        if not benchmark:
+            return None
+        try:
+            bench = self.returns([benchmark], stats.period)[benchmark.upper()]
+        except Exception:
+            return None
+        aligned = pd.Series(portfolio_returns, index=stats.index).to_frame('p').join(bench.rename('b'), how='inner')
+        if len(aligned) < 2 or aligned['b'].var() == 0:
+            return None
+        return float(aligned['p'].cov(aligned['b']) / aligned['b'].var())
+
+    def analyze(self, tickers: Sequence[str], weights: Sequence[float], period: str = "1y",
+                confidence: float = 0.95, benchmark: Optional[str] = BENCHMARK_TICKER) -> PortfolioRisk:
+        """Full risk profile of one weighting."""
+        stats = self.stats(tickers, period)
+        w = np.asarray(weights, dtype=float)
+        if w.shape != (len(stats.tickers),):
+            raise ValueError("Number of weights must match number of tickers")
+
+        portfolio_returns = stats.returns @ w
+        sigma_w = stats.cov @ w
+        daily_vol = float(np.sqrt(w @ sigma_w))
+        daily_mean = float(stats.mean @ w)
+        z = NormalDist().inv_cdf(1 - confidence)
+        var_hist, cvar_hist = _tail_stats(portfolio_returns[:, None], confidence)
+
+        volatility = daily_vol * np.sqrt(TRADING_DAYS)
+        expected_return = daily_mean * TRADING_DAYS
+        marginal = sigma_w / daily_vol if daily_vol else np.zeros_like(w)
+        return PortfolioRisk(
+            tickers=stats.tickers,
+            weights=w,
+            expected_return=expected_return,
+            volatility=volatility,
+            sharpe=(expected_return - RISK_FREE_RATE) / volatility if volatility else 0.0,
+            var_parametric=daily_mean + z * daily_vol,
+            cvar_parametric=daily_mean - daily_vol * NormalDist().pdf(z) / (1 - confidence),
+            var_historical=float(var_hist[0]),
+            cvar_historical=float(cvar_hist[0]),
+            max_drawdown=float(_drawdowns(portfolio_returns[:, None])[0]),
+            beta=self._beta(stats, portfolio_returns, benchmark),
+            asset_returns=stats.mean * TRADING_DAYS,
+            asset_volatility=np.sqrt(np.diag(stats.cov) * TRADING_DAYS),
+            marginal_risk=marginal * np.sqrt(TRADING_DAYS),
+            risk_contribution=w * marginal / daily_vol if daily_vol else np.zeros_like(w),
+            confidence=confidence,
+            observations=len(portfolio_returns),
+        )
+
+    def analyze_many(self, tickers: Sequence[str], weight_matrix, period: str = "1y",
+                     confidence: float = 0.95) -> pd.DataFrame:
+        """Headline metrics for k weightings at once (weight_matrix is k x n), one row per weighting."""
+        stats = self.stats(tickers, period)
+        W = np.atleast_2d(np.asarray(weight_matrix, dtype=float))
+        portfolio_returns = stats.returns @ W.T                      # T x k
+        daily_vol = np.sqrt(np.einsum('ki,ij,kj->k', W, stats.cov, W))
+        daily_mean = W @ stats.mean
+        var_hist, cvar_hist = _tail_stats(portfolio_returns, confidence)
+        volatility = daily_vol * np.sqrt(TRADING_DAYS)
+        expected_return = daily_mean * TRADING_DAYS
+        return pd.DataFrame({
+            'expected_return': expected_return,
+            'volatility': volatility,
+            'sharpe': np.divide(expected_return - RISK_FREE_RATE, volatility,
+                                out=np.zeros_like(volatility), where=volatility > 0),
+            'var_parametric': daily_mean + NormalDist().inv_cdf(1 - confidence) * daily_vol,
+            'var_historical': var_hist,
+            'cvar_historical': cvar_hist,
+            'max_drawdown': _drawdowns(portfolio_returns),
+        })
+
+
+# Shared instance used by PortfolioRiskTool
+portfolio_engine = PortfolioRiskEngine()
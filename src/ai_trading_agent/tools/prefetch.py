@@ -0,0 +1,200 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from ..rate_limiter import rate_limiter
+
+# yfinance periods expressed as trailing windows over a daily index
+_TRADING_DAY_PERIODS = {'1d': 1, '5d': 5}
+_CALENDAR_PERIODS = {
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+# Shortest to longest; 'ytd' never spans more than a year
+PERIOD_ORDER = ['1d', '5d', '1mo', '3mo', '6mo', 'ytd', '1y', '2y', '5y', '10y', 'max']
+
+
+def period_start(index: pd.DatetimeIndex, period: str):
+    """First timestamp a yfinance `period` would cover, measured back from the last bar."""
+    if index.empty:
+        return None
+    last = index[-1]
+    if period in _TRADING_DAY_PERIODS:
+        n = _TRADING_DAY_PERIODS[period]
+        return index[-n] if len(index) >= n else index[0]
+    if period == 'ytd':
+        return pd.Timestamp(year=last.year, month=1, day=1, tz=last.tz)
+    if period in _CALENDAR_PERIODS:
+        return last - _CALENDAR_PERIODS[period]
+    return None  # 'max' or unknown
+
+
+def split_panel(data: pd.DataFrame, tickers: List[str]) -> Dict[str, pd.DataFrame]:
+    """Splits a batched `yf.download` frame into one OHLCV frame per ticker."""
+    frames = {}
+    if data is None or data.empty:
+        return frames
+
+    if not isinstance(data.columns, pd.MultiIndex):
+        # Flat columns only happen for a single-ticker download
+        if len(tickers) == 1:
+            frames[tickers[0]] = data.dropna(how='all')
+        return frames
+
+    # group_by='ticker' puts the ticker on level 0, the default puts it on level 1
+    level = 0 if set(tickers) & set(data.columns.get_level_values(0)) else 1
+    available = set(data.columns.get_level_values(level))
+    for ticker in tickers:
+        if ticker in available:
+            frames[ticker] = data.xs(ticker, axis=1, level=level).dropna(how='all')
+    return frames
+
+
+class MarketSnapshot:
+    """
+    Point-in-time market data for a whole batch, downloaded once before the
+    LLM phase. The market-data cache serves tool requests from the snapshot
+    first, so the crews run against local data only.
+    """
+
+    def __init__(self, period: str, interval: str, history: Dict[str, pd.DataFrame],
+                 info: Dict[str, dict], financials: Dict[str, dict]):
+        self.period = period
+        self.interval = interval
+        self.created_at = time.time()
+        self._history = history
+        self._info = info
+        self._financials = financials
+
+    @property
+    def tickers(self) -> List[str]:
+        return sorted(self._history)
+
+    def covers(self, period: str) -> bool:
+        """True if a request for `period` can be answered by slicing the snapshot."""
+        if period not in PERIOD_ORDER or self.period not in PERIOD_ORDER:
+            return period == self.period
+        return PERIOD_ORDER.index(period) <= PERIOD_ORDER.index(self.period)
+
+    def history(self, ticker: str, period: str, interval: str) -> Optional[pd.DataFrame]:
+        hist = self._history.get(ticker.upper())
+        if hist is None or interval != self.interval or not self.covers(period):
+            return None
+        start = period_start(hist.index, period)
+        return hist if start is None else hist[hist.index >= start]
+
+    def info(self, ticker: str) -> Optional[dict]:
+        return self._info.get(ticker.upper())
+
+    def financials(self, ticker: str) -> Optional[dict]:
+        return self._financials.get(ticker.upper())
+
+
+def prefetch_universe(tickers: List[str], period: str = "1y", interval: str = "1d",
+                      history: Optional[pd.DataFrame] = None, include_financials: bool = True,
+                      max_workers: int = 8) -> MarketSnapshot:
+    """
+    Downloads history, info and financial statements for every ticker in bulk.
+
+    `history` may be a batched download the caller already holds (e.g. the
+    screener panel); it is reused as long as it spans `period`.
+    """
+    tickers = [t.upper() for t in tickers]
+    print(f"📥 Pre-fetching market data for {len(tickers)} tickers...")
+    started = time.time()
+
+    # 1. Price history: one batched request for the whole universe
+    frames = split_panel(history, tickers) if history is not None else {}
+    if frames:
+        sample = next(iter(frames.values()))
+        start = period_start(sample.index, period)
+        if start is not None and sample.index[0] > start + pd.Timedelta(days=7):
+            frames = {}  # The caller's panel is too short for the requested period
+    missing = [t for t in tickers if t not in frames]
+    if missing:
+        data = rate_limiter.call('yahoo', yf.download, missing, period=period, interval=interval,
+                                 group_by='ticker', auto_adjust=True, progress=False, threads=True)
+        frames.update(split_panel(data, missing))
+
+    # 2. Info and statements: one request per ticker, so run them concurrently
+    def fetch_fundamentals(ticker):
+        stock = yf.Ticker(ticker)
+        try:
+            info = rate_limiter.call('yahoo', lambda: stock.info) or {}
+        except Exception as e:
+            print(f"⚠️ Could not pre-fetch info for {ticker}: {e}")
+            info = None
+        statements = None
+        if include_financials:
+            try:
+                statements = rate_limiter.call('yahoo', lambda: {
+                    'income_stmt': stock.income_stmt,
+                    'balance_sheet': stock.balance_sheet,
+                    'cashflow': stock.cashflow,
+                })
+            except Exception as e:
+                print(f"⚠️ Could not pre-fetch financials for {ticker}: {e}")
+        return ticker, info, statements
+
+    info, financials = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for ticker, ticker_info, statements in pool.map(fetch_fundamentals, tickers):
+            if ticker_info is not None:
+                info[ticker] = ticker_info
+            if statements is not None:
+                financials[ticker] = statements
+
+    print(f"✅ Pre-fetch complete in {time.time() - started:.1f}s "
+          f"({len(frames)} histories, {len(info)} info, {len(financials)} statements)\n")
+    return MarketSnapshot(period, interval, frames, info, financials)
+
+
+async def prefetch_feeds(tickers: List[str], news: bool = True, social: bool = True) -> Dict[str, int]:
+    """
+    Fetches the Serper news and StockTwits stream of every ticker concurrently
+    over the shared async HTTP client and leaves them in the market cache, so
+    the news and social agents never wait on the network. Requests are paced
+    by the provider rate limits; failures are left for the tools to retry.
+    The messages of all fetched streams are then scored in one batch, so the
+    social agents find their lexicon scores cached too.
+    """
+    # Imported here: the tools import the market cache, which imports this module
+    from .financial_tools import afetch_news
+    from .stocktwits_sentiment_tool import afetch_stream, unlabeled_messages
+    from .sentiment import sentiment_scorer
+    from ..http_client import http_client
+
+    tickers = [t.upper() for t in tickers]
+    started = time.time()
+    fetchers = ([('news', afetch_news)] if news else []) + ([('social', afetch_stream)] if social else [])
+    jobs = [(kind, ticker, fetch(ticker)) for kind, fetch in fetchers for ticker in tickers]
+    print(f"📰 Pre-fetching news and social feeds for {len(tickers)} tickers...")
+    try:
+        results = await asyncio.gather(*(job for _, _, job in jobs), return_exceptions=True)
+    finally:
+        await http_client.aclose()
+
+    fetched = {kind: 0 for kind, _ in fetchers}
+    unlabeled = []
+    for (kind, ticker, _), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            print(f"⚠️ Could not pre-fetch {kind} feed for {ticker}: {result}")
+        else:
+            fetched[kind] += 1
+            if kind == 'social':
+                unlabeled.extend(unlabeled_messages(result))
+    if unlabeled:
+        sentiment_scorer.score_messages(unlabeled)
+    print(f"✅ Feeds pre-fetched in {time.time() - started:.1f}s "
+          f"({', '.join(f'{count} {kind}' for kind, count in fetched.items())})\n")
+    return fetched
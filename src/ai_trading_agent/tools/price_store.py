@@ -0,0 +1,216 @@
+"""
+Persistent on-disk store of daily OHLCV bars, one Parquet file per ticker.
+
+Reads never hit the network unless the stored series is stale; updates only
+download bars newer than the latest stored date (one batched request for the
+whole universe). Prices are split/dividend adjusted, so when the last
+completed stored bar no longer matches the download the ticker's full history
+is refetched.
+"""
+import importlib.util
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from ..rate_limiter import rate_limiter
+from .prefetch import PERIOD_ORDER, period_start, split_panel
+
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", "data/prices")  # set to "" to disable the store
+PRICE_STORE_OFFLINE = os.getenv("PRICE_STORE_OFFLINE", "").lower() in ("1", "true", "yes")
+INITIAL_PERIOD = os.getenv("PRICE_STORE_INITIAL_PERIOD", "2y")  # history fetched for a new ticker
+MAX_AGE_SECONDS = 6 * 3600  # re-check a series at most this often
+ADJUSTMENT_TOLERANCE = 0.005  # relative Close drift on the last completed bar that triggers a full refetch
+
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+_PARQUET = importlib.util.find_spec("pyarrow") is not None or importlib.util.find_spec("fastparquet") is not None
+
+
+class PriceStore:
+    """Columnar per-ticker price store with incremental daily updates."""
+
+    def __init__(self, root: str = PRICE_STORE_DIR, offline: bool = PRICE_STORE_OFFLINE):
+        self.root = root
+        self.offline = offline
+        self.extension = "parquet" if _PARQUET else "pkl"
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._checked: Dict[str, float] = {}  # ticker -> last time we asked Yahoo for new bars
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()  # one download at a time, so tickers are never fetched twice
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker.upper()}.{self.extension}")
+
+    def load(self, ticker: str) -> Optional[pd.DataFrame]:
+        """Returns the stored bars for a ticker (None if it was never fetched)."""
+        ticker = ticker.upper()
+        with self._lock:
+            if ticker in self._frames:
+                return self._frames[ticker]
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        frame = pd.read_parquet(path) if _PARQUET else pd.read_pickle(path)
+        with self._lock:
+            self._frames[ticker] = frame
+            self._checked.setdefault(ticker, os.path.getmtime(path))
+        return frame
+
+    def save(self, ticker: str, frame: pd.DataFrame) -> None:
+        ticker = ticker.upper()
+        frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(ticker)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        if _PARQUET:
+            frame.to_parquet(tmp_path)
+        else:
+            frame.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._frames[ticker] = frame
+            self._checked[ticker] = time.time()
+
+    def last_date(self, ticker: str) -> Optional[pd.Timestamp]:
+        frame = self.load(ticker)
+        return None if frame is None or frame.empty else frame.index[-1]
+
+    def reference_date(self, ticker: str) -> Optional[pd.Timestamp]:
+        """The last stored bar that was a completed session (the one before the latest)."""
+        frame = self.load(ticker)
+        return None if frame is None or len(frame) < 2 else frame.index[-2]
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def is_stale(self, ticker: str) -> bool:
+        """
+        True if the series was not checked for MAX_AGE_SECONDS. Today's bar is
+        no exception (it may be a partial session), and neither is a ticker
+        whose download came back empty.
+        """
+        self.load(ticker)  # a stored file counts as checked when it was written
+        return time.time() - self._checked.get(ticker.upper(), 0) > MAX_AGE_SECONDS
+
+    def update(self, tickers: List[str], force: bool = False) -> Dict[str, int]:
+        """
+        Brings every ticker up to date and returns the number of new bars per ticker.
+        New tickers get INITIAL_PERIOD of history; the rest share one download that
+        starts at the oldest latest-stored date.
+        """
+        if self.offline:
+            return {}
+        with self._update_lock:
+            tickers = [t.upper() for t in tickers]
+            stale = [t for t in tickers if force or self.is_stale(t)]
+            if not stale:
+                return {}
+            return self._update(stale)
+
+    def _update(self, stale: List[str]) -> Dict[str, int]:
+        new = [t for t in stale if self.last_date(t) is None]
+        existing = [t for t in stale if t not in new]
+        added = {}
+
+        if existing:
+            # Re-download the last stored bar, which may have been a partial session, and
+            # the completed one before it, which tells whether the series was re-adjusted
+            start = min(self.reference_date(t) or self.last_date(t) for t in existing)
+            frames = self._download(existing, start=start.strftime('%Y-%m-%d'))
+            refetch = []
+            for ticker in existing:
+                stored = self.load(ticker)
+                fresh = frames.get(ticker)
+                if fresh is None or fresh.empty:
+                    with self._lock:
+                        self._checked[ticker] = time.time()
+                    continue
+                reference = self.reference_date(ticker)
+                if reference is not None and reference in fresh.index:
+                    old_close = stored.loc[reference, 'Close']
+                    new_close = fresh.loc[reference, 'Close']
+                    if old_close and abs(new_close / old_close - 1) > ADJUSTMENT_TOLERANCE:
+                        refetch.append(ticker)  # split or dividend re-based the adjusted series
+                        continue
+                newer = fresh[fresh.index >= stored.index[-1]]
+                self.save(ticker, pd.concat([stored[stored.index < stored.index[-1]], newer]))
+                added[ticker] = int((newer.index > stored.index[-1]).sum())
+            new.extend(refetch)
+
+        if new:
+            frames = self._download(new, period=INITIAL_PERIOD)
+            for ticker in new:
+                fresh = frames.get(ticker)
+                if fresh is not None and not fresh.empty:
+                    self.save(ticker, fresh)
+                    added[ticker] = len(fresh)
+                else:  # delisted, bad symbol or outage: don't ask again on every read
+                    with self._lock:
+                        self._checked[ticker] = time.time()
+
+        if added:
+            print(f"💽 Price store: {sum(added.values())} new bars for {len(added)} tickers")
+        return added
+
+    def _download(self, tickers: List[str], **window) -> Dict[str, pd.DataFrame]:
+        data = rate_limiter.call('yahoo', yf.download, tickers, interval='1d', group_by='ticker',
+                                 auto_adjust=True, progress=False, threads=True, **window)
+        frames = {}
+        for ticker, frame in split_panel(data, tickers).items():
+            frame = frame.reindex(columns=COLUMNS).dropna(subset=['Close'])
+            frame.index = pd.DatetimeIndex(frame.index).tz_localize(None).normalize()
+            frames[ticker] = frame
+        return frames
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def supports(self, period: str) -> bool:
+        """True if `period` fits inside the history the store keeps for each ticker."""
+        return period in PERIOD_ORDER and period != 'max' and \
+            PERIOD_ORDER.index(period) <= PERIOD_ORDER.index(INITIAL_PERIOD)
+
+    def history(self, ticker: str, period: str = "1y") -> Optional[pd.DataFrame]:
+        """Stored daily bars for `period`, updating first if the series is stale."""
+        self.update([ticker])
+        frame = self.load(ticker)
+        if frame is None or frame.empty:
+            return None
+        start = period_start(frame.index, period)
+        return frame if start is None else frame[frame.index >= start]
+
+    def covers(self, ticker: str, period: str) -> bool:
+        """True if the stored series reaches back far enough for `period`."""
+        frame = self.load(ticker)
+        if frame is None or frame.empty:
+            return False
+        start = period_start(frame.index, period)
+        return start is not None and frame.index[0] <= start + timedelta(days=7)
+
+    def panel(self, tickers: List[str], period: str = "1y") -> pd.DataFrame:
+        """
+        Batched read in the same layout as `yf.download(..., group_by='ticker')`
+        (columns are (ticker, field)), updating stale tickers in one request.
+        """
+        self.update(tickers)
+        frames = {}
+        for ticker in tickers:
+            frame = self.load(ticker)
+            if frame is None or frame.empty:
+                continue
+            start = period_start(frame.index, period)
+            frames[ticker] = frame if start is None else frame[frame.index >= start]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1)
+
+
+# Shared instance (None when PRICE_STORE_DIR is empty)
+price_store = PriceStore() if PRICE_STORE_DIR else None
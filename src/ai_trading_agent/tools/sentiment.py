@@ -0,0 +1,191 @@
+"""
+Batched lexicon sentiment scorer for social messages.
+
+Uses the same adjective lexicon as TextBlob's PatternAnalyzer (shipped with
+the textblob package, no NLTK corpora required) plus trader slang, and the
+same rules: an adverb such as "very" multiplies the next word by its
+intensity, and a negation flips the next word that carries sentiment ("not
+very good" is mildly negative). A message scores the mean of its
+assessments. Since those rules depend on word order, each text is still
+assessed token by token in Python; numpy only averages the assessments of
+a batch. What the scorer saves over TextBlob is its per-message setup
+(no TextBlob object, no NLTK). The lexicon is loaded on first use and
+scores are cached by message id: the batch prefetch scores the streams of
+all tickers in one call, and the social agents then read cached scores.
+"""
+import importlib.util
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Trader vocabulary missing from (or scored differently in) the general-purpose lexicon
+TRADING_LEXICON = {
+    'bullish': 0.8, 'bull': 0.5, 'bulls': 0.5, 'bearish': -0.8, 'bear': -0.5, 'bears': -0.5,
+    'buy': 0.4, 'buying': 0.4, 'long': 0.3, 'calls': 0.3, 'moon': 0.7, 'mooning': 0.8,
+    'rocket': 0.6, '🚀': 0.6, 'breakout': 0.6, 'squeeze': 0.4, 'rally': 0.6, 'rip': 0.4,
+    'undervalued': 0.5, 'beat': 0.5, 'upgrade': 0.6, 'support': 0.2, 'green': 0.3,
+    'sell': -0.4, 'selling': -0.4, 'short': -0.4, 'shorts': -0.3, 'puts': -0.3, 'dump': -0.6,
+    'dumping': -0.7, 'crash': -0.8, 'tank': -0.6, 'tanking': -0.7, 'overvalued': -0.5,
+    'miss': -0.5, 'downgrade': -0.6, 'bagholder': -0.6, 'bagholders': -0.6, 'red': -0.3,
+    '📉': -0.5, '📈': 0.5,
+}
+
+NEGATIONS = ("no", "not", "n't", "never")
+NEGATION_FACTOR = -0.5  # "not good" = -0.5 * good, "not bad" = slightly good
+MODIFIER_POS = "RB"     # lexicon senses that make a word an intensifier of the next one
+CACHE_SIZE = 100_000
+
+# "don't" splits into "do" + "n't", so contractions negate too (TextBlob's tokenizer
+# breaks them into "n", "'", "t" and misses them)
+TOKEN_PATTERN = re.compile(r"[a-z]+(?=n't)|n't|[a-z][a-z'\-]*|[\U0001F300-\U0001FAFF]")
+
+# Word -> (polarity, intensity, is a modifier)
+Lexicon = Dict[str, Tuple[float, float, bool]]
+
+
+def _textblob_lexicon_path() -> Optional[str]:
+    spec = importlib.util.find_spec("textblob")  # locate without importing textblob/nltk
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    path = os.path.join(spec.submodule_search_locations[0], "en", "en-sentiment.xml")
+    return path if os.path.exists(path) else None
+
+
+def load_lexicon() -> Lexicon:
+    """
+    Word -> (polarity, intensity, modifier), built like TextBlob's: senses are
+    averaged per part of speech, then over the parts of speech, and every
+    adjective also yields its adverb ("slight" -> "slightly"). Words of
+    TRADING_LEXICON take its polarity.
+    """
+    senses = defaultdict(lambda: defaultdict(list))
+    path = _textblob_lexicon_path()
+    if path:
+        for word in ET.parse(path).getroot().iter("word"):
+            form = word.attrib.get("form", "").lower()
+            if form and " " not in form:
+                senses[form][word.attrib.get("pos")].append(
+                    (float(word.attrib.get("polarity", 0.0)), float(word.attrib.get("intensity", 1.0))))
+    lexicon, adverbs = {}, {}
+    for form, by_pos in senses.items():
+        means = {pos: np.mean(scores, axis=0) for pos, scores in by_pos.items()}
+        polarity, intensity = np.mean(list(means.values()), axis=0)
+        lexicon[form] = (float(polarity), float(intensity), MODIFIER_POS in by_pos)
+        if "JJ" in means:
+            stem = form[:-1] + "i" if form.endswith("y") else form
+            stem = stem[:-2] if stem.endswith("le") else stem
+            adverbs[stem + "ly"] = (float(means["JJ"][0]), float(means["JJ"][1]), True)
+    lexicon.update(adverbs)
+    for form, polarity in TRADING_LEXICON.items():
+        _, intensity, modifier = lexicon.get(form, (0.0, 1.0, False))
+        lexicon[form] = (polarity, intensity, modifier)
+    return lexicon
+
+
+def assess(tokens: Iterable[str], lexicon: Lexicon) -> List[float]:
+    """
+    Polarity of each assessment in a token stream, by TextBlob's rules: a
+    known word preceded by a modifier joins its assessment (polarity times the
+    modifier's intensity), and a negation applies to the next known word,
+    surviving one-letter words in between ("not a good").
+    """
+    assessments = []  # [polarity, intensity, negated]
+    modifier = None   # preceding known word that modifies the next one
+    negation = None   # preceding negation
+    for token in tokens:
+        entry = lexicon.get(token)
+        if entry is not None:
+            polarity, intensity, is_modifier = entry
+            if modifier is None:
+                assessments.append([polarity, intensity, False])
+            else:
+                current = assessments[-1]
+                current[0] = max(-1.0, min(polarity * current[1], 1.0))
+                current[1] = intensity
+            if negation is not None:
+                assessments[-1][1] = 1.0 / assessments[-1][1]
+                assessments[-1][2] = True
+            modifier = token if is_modifier else None
+            negation = token if token in NEGATIONS else None
+            continue
+        if token in NEGATIONS:
+            negation = token
+        elif negation and len(token.strip("'")) > 1:
+            negation = None
+        if negation is not None and modifier is not None and modifier.endswith("ly"):
+            # "really not good": the negation joins the adverb's assessment
+            assessments[-1][2] = True
+            negation = None
+        elif modifier and len(token) > 2:
+            modifier = None
+    return [polarity * NEGATION_FACTOR if negated else polarity for polarity, _, negated in assessments]
+
+
+class SentimentScorer:
+    """Lexicon polarity scorer (-1.0 to +1.0) with a per-message-id cache."""
+
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.cache_size = cache_size
+        self._lexicon: Optional[Lexicon] = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self) -> None:
+        if self._lexicon is None:
+            with self._lock:
+                if self._lexicon is None:
+                    self._lexicon = load_lexicon()
+
+    def score_texts(self, texts: List[str]) -> np.ndarray:
+        """Scores every text in one pass; texts without known words score 0."""
+        self._ensure_loaded()
+        lexicon = self._lexicon
+        polarities, message_ids = [], []
+        for i, text in enumerate(texts):
+            assessments = assess(TOKEN_PATTERN.findall((text or "").lower()), lexicon)
+            polarities.extend(assessments)
+            message_ids.extend([i] * len(assessments))
+        if not polarities:
+            return np.zeros(len(texts))
+
+        message_ids = np.asarray(message_ids)
+        totals = np.bincount(message_ids, weights=np.asarray(polarities), minlength=len(texts))
+        counts = np.bincount(message_ids, minlength=len(texts))
+        scores = np.divide(totals, counts, out=np.zeros(len(texts)), where=counts > 0)
+        return np.clip(scores, -1.0, 1.0)
+
+    def score_messages(self, messages: Iterable[dict]) -> np.ndarray:
+        """
+        Scores StockTwits-style message dicts (`id`, `body`), reusing cached
+        scores for ids seen before. Pass the messages of many tickers at once
+        (as prefetch_feeds does) to score them in a single batch.
+        """
+        messages = list(messages)
+        scores = np.zeros(len(messages))
+        pending = []
+        with self._lock:
+            for i, msg in enumerate(messages):
+                cached = self._cache.get(msg.get('id'))
+                if cached is None:
+                    pending.append(i)
+                else:
+                    scores[i] = cached
+        if pending:
+            fresh = self.score_texts([messages[i].get('body', '') for i in pending])
+            scores[pending] = fresh
+            with self._lock:
+                for i, score in zip(pending, fresh):
+                    if messages[i].get('id') is not None:
+                        self._cache[messages[i]['id']] = float(score)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return scores
+
+
+# Shared instance (the lexicon loads on the first scoring call)
+sentiment_scorer = SentimentScorer()
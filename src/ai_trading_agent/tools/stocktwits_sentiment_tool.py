@@ -1,10 +1,45 @@
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
-import requests
-from textblob import TextBlob
+import httpx
 from collections import Counter
 from datetime import datetime
+from ..compaction import compact_output
+from ..http_client import http_client
+from ..telemetry import instrument_tool
+from .market_cache import market_cache
+from .sentiment import sentiment_scorer
+
+STREAM_URL = "https://api.stocktwits.com/api/2/streams/symbol/{ticker}.json"
+STREAM_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+def fetch_stream(ticker: str) -> dict:
+    """Latest StockTwits messages for a ticker (no auth needed), cached like market data."""
+    def fetch():
+        response = http_client.get('stocktwits', STREAM_URL.format(ticker=ticker), headers=STREAM_HEADERS)
+        response.raise_for_status()
+        return response.json()
+
+    return market_cache.get_or_fetch(("stocktwits", ticker.upper()), fetch)
+
+async def afetch_stream(ticker: str) -> dict:
+    """Async `fetch_stream` for batch pre-fetching; fills the same cache entry."""
+    key = ("stocktwits", ticker.upper())
+    cached = market_cache.get_cached(key)
+    if cached is not None:
+        return cached
+    response = await http_client.aget('stocktwits', STREAM_URL.format(ticker=ticker), headers=STREAM_HEADERS)
+    response.raise_for_status()
+    data = response.json()
+    market_cache.put(key, data)
+    return data
+
+def unlabeled_messages(data: dict, limit: int = 30) -> list:
+    """The messages of a stream without an explicit Bullish/Bearish tag (those get a lexicon score)."""
+    return [msg for msg in (data.get('messages') or [])[:limit]
+            if not msg.get('entities', {}).get('sentiment')]
 
 class StockTwitsSentimentInput(BaseModel):
     """Input for StockTwitsSentimentTool"""
@@ -19,23 +54,16 @@ class StockTwitsSentimentTool(BaseTool):
     """
     args_schema: Type[BaseModel] = StockTwitsSentimentInput
     
+    @instrument_tool
+    @compact_output
     def _run(self, ticker: str, limit: int = 30) -> str:
         try:
             print(f"🔍 Fetching StockTwits data for ${ticker}...")
             
-            # StockTwits API endpoint (no auth needed for basic access)
-            url = f"https://api.stocktwits.com/api/2/streams/symbol/{ticker}.json"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            if response.status_code != 200:
-                return f"Error fetching StockTwits data for {ticker}: HTTP {response.status_code}"
-            
-            data = response.json()
+            try:
+                data = fetch_stream(ticker)
+            except httpx.HTTPStatusError as e:
+                return f"Error fetching StockTwits data for {ticker}: HTTP {e.response.status_code}"
             
             if 'messages' not in data or not data['messages']:
                 return f"""
@@ -49,6 +77,9 @@ Recommendation: Limited social momentum - focus on fundamentals/technicals.
             
             messages = data['messages'][:limit]
             
+            # Lexicon scores for messages without explicit sentiment (already cached after a batch prefetch)
+            lexicon_scores = iter(sentiment_scorer.score_messages(unlabeled_messages(data, limit)))
+            
             # Extract sentiment data
             bullish_count = 0
             bearish_count = 0
@@ -73,10 +104,7 @@ Recommendation: Limited social momentum - focus on fundamentals/technicals.
                         sentiment_scores.append(0)
                 else:
                     neutral_count += 1
-                    # Use TextBlob for messages without explicit sentiment
-                    text = msg.get('body', '')
-                    blob = TextBlob(text)
-                    sentiment_scores.append(blob.sentiment.polarity)
+                    sentiment_scores.append(float(next(lexicon_scores)))
                 
                 message_texts.append(msg.get('body', ''))
                 user_followers.append(msg.get('user', {}).get('followers', 0))
@@ -138,7 +166,7 @@ Trend: {trend}
 🟡 Neutral: {neutral_count} ({neutral_count/total_messages*100:.1f}%)
 🔴 Bearish: {bearish_count} ({bearish_count/total_messages*100:.1f}%)
 
-Bull/Bear Ratio: {bullish_count/bearish_count:.2f}:1 if bearish_count > 0 else "∞" (all bulls)
+Bull/Bear Ratio: {f"{bullish_count/bearish_count:.2f}:1" if bearish_count > 0 else "∞ (no bears)"}
 
 ═══════════════════════════════════════════════════════════════
 👥 TOP INFLUENCER MESSAGES
@@ -163,14 +191,17 @@ Bull/Bear Ratio: {bullish_count/bearish_count:.2f}:1 if bearish_count > 0 else "
 ═══════════════════════════════════════════════════════════════
 """
             
-            for i, msg in enumerate(messages[:5], 1):
+            # Latest messages not already quoted above
+            quoted = {id(msg) for msg, _ in top_influencers}
+            recent = [msg for msg in messages if id(msg) not in quoted][:3]
+            for i, msg in enumerate(recent, 1):
                 sentiment_tag = msg.get('entities', {}).get('sentiment', {}).get('basic', 'Neutral')
                 sentiment_emoji = "🟢" if sentiment_tag == "Bullish" else "🔴" if sentiment_tag == "Bearish" else "🟡"
                 username = msg.get('user', {}).get('username', 'Unknown')
                 text = msg.get('body', '')[:120]
                 time_ago = msg.get('created_at', '')[:19]
                 
-                report += f"{i}. {sentiment_emoji} @{username}: \"{text}...\"\n   Posted: {time_ago}\n\n"
+                report += f"{i}. {sentiment_emoji} @{username} ({sentiment_tag}): \"{text}...\"\n   Posted: {time_ago}\n\n"
             
             report += f"""
 ═══════════════════════════════════════════════════════════════
@@ -252,7 +283,7 @@ Recommendation for Trading:
             
             return report
             
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             return f"Network error fetching StockTwits data for {ticker}: {str(e)}"
         except Exception as e:
             return f"Error analyzing StockTwits sentiment for {ticker}: {str(e)}"
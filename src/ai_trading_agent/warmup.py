@@ -0,0 +1,42 @@
+"""
+Background warm-up of the crew for interactive entry points.
+
+Importing crew.py loads crewAI and litellm, which takes several seconds, and
+the first crew builds the shared LLM and tools. The CLI and the Streamlit page
+do both on a background thread while the user is still typing, priming the
+crew pool, and only wait for it when a crew is actually needed.
+"""
+import importlib
+import threading
+from typing import Optional
+
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def _import_crew():
+    return importlib.import_module(".crew", __package__)
+
+
+def _prime_pool():
+    crew_pool().prime()
+
+
+def preload() -> threading.Thread:
+    """Starts importing the crew module and priming the crew pool in the background (once per process)."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_prime_pool, name="crew-preload", daemon=True)
+            _thread.start()
+        return _thread
+
+
+def crew_class():
+    """AiTradingAgent, waiting for a running preload (the import lock serializes the two)."""
+    return _import_crew().AiTradingAgent
+
+
+def crew_pool():
+    """The process's shared CrewPool (see crew_pool.py)."""
+    return importlib.import_module(".crew_pool", __package__).crew_pool
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modules are imported the way the entry points import them (src.ai_trading_agent...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.ai_trading_agent  # noqa: E402,F401  (its environment defaults apply before crewAI is imported)
@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("crewai")
+
+from crewai.utilities.formatter import DIVIDERS
+
+from src.ai_trading_agent.compaction import compact, compact_context, estimate_tokens
+
+RISK_LEVELS = ["- Entry Price: $412.35", "- Stop-Loss: $396.80 (risk: $1,555)",
+               "- Recommended position size: 100 shares ($41,235)", "- Risk-reward ratio: 1:2.6"]
+STRATEGY_LEVELS = ["- Target 1: $428.00", "- Target 2: $445.50", "- Recommended allocation: 8.5% of the portfolio"]
+
+
+def report(title, levels, lines=120):
+    """A long upstream report with its trade levels buried in the middle."""
+    body = [f"{title} observation {i}: volume and breadth were unremarkable on the session" for i in range(lines)]
+    return "\n".join([f"## {title}"] + body[: lines // 2] + levels + body[lines // 2:] + [f"{title} summary: see above"])
+
+
+def test_long_floats_are_rounded():
+    assert compact("P/E 59.03697123, beta 1.999999, price 3.14") == "P/E 59.04, beta 2.00, price 3.14"
+
+
+def test_context_is_only_compacted_without_a_budget():
+    context = DIVIDERS.join([report("Risk", RISK_LEVELS), report("Strategy", STRATEGY_LEVELS)])
+
+    compacted = compact_context(context, budget=0)
+
+    assert "lines omitted" not in compacted
+    assert compacted == DIVIDERS.join(compact(section) for section in context.split(DIVIDERS))
+
+
+def test_trade_levels_survive_the_head_traders_context():
+    analyses = [report(name, []) for name in ("Market data", "Technicals", "Fundamentals", "News", "Social")]
+    context = DIVIDERS.join(analyses + [report("Risk", RISK_LEVELS), report("Strategy", STRATEGY_LEVELS)])
+
+    compacted = compact_context(context, budget=1500)
+
+    assert estimate_tokens(compacted) < estimate_tokens(context) // 4
+    for line in RISK_LEVELS + STRATEGY_LEVELS:
+        assert line in compacted
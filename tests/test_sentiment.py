@@ -0,0 +1,41 @@
+import pytest
+
+from src.ai_trading_agent.tools.sentiment import SentimentScorer
+
+textblob = pytest.importorskip("textblob")
+
+PHRASES = [
+    "good",
+    "very good",
+    "not good",
+    "not very good",
+    "not a good stock",
+    "really not good",
+    "never really great",
+    "very bad day",
+    "this is not bad",
+    "not so terrible",
+    "extremely happy but slightly worried",
+    "the product is very very good",
+]
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return SentimentScorer()
+
+
+@pytest.mark.parametrize("phrase", PHRASES)
+def test_matches_textblob_polarity(scorer, phrase):
+    expected = textblob.TextBlob(phrase).sentiment.polarity
+    assert scorer.score_texts([phrase])[0] == pytest.approx(expected)
+
+
+def test_negated_intensifier_stays_negative(scorer):
+    very_good, not_very_good = scorer.score_texts(["very good", "not very good"])
+    assert very_good > 0.9
+    assert not_very_good < 0
+
+
+def test_contraction_negates(scorer):
+    assert scorer.score_texts(["it isn't good"])[0] == pytest.approx(scorer.score_texts(["it is not good"])[0])